@@ -0,0 +1,52 @@
+import re
+
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import decorator_from_middleware
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Brotli quality for responses compressed per request, well below the slow maximum of 11
+BROTLI_QUALITY = 5
+
+re_accepts_brotli = re.compile(r'\bbr\b')
+
+
+class PayloadCompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that answers with brotli instead when the client accepts
+    it and the brotli package is installed
+    """
+
+    def process_response(self, request, response):
+        if (
+            brotli is None
+            or response.streaming
+            or response.has_header('Content-Encoding')
+            or not re_accepts_brotli.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        ):
+            return super().process_response(request, response)
+
+        # Not worth compressing, same threshold as gzip
+        if len(response.content) < 200:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(response.content))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
+
+
+# Compress a view's response with brotli or gzip, whichever the client accepts
+compress_payload = decorator_from_middleware(PayloadCompressionMiddleware)
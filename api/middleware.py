@@ -1,6 +1,7 @@
 import logging
 import time
 import json
+from django.http.request import RawPostDataException
 from django.utils.deprecation import MiddlewareMixin
 
 logger = logging.getLogger('api.requests')
@@ -46,11 +47,17 @@ class RequestLogMiddleware(MiddlewareMixin):
             }
             
             # Log request data for non-GET requests
-            if request.method != 'GET' and request.body:
+            # The body is gone once a parser has read the stream
+            try:
+                body = request.body if request.method != 'GET' else b''
+            except RawPostDataException:
+                body = b''
+            if body:
                 try:
-                    log_data['request_body'] = json.loads(request.body)
-                except json.JSONDecodeError:
-                    log_data['request_body'] = str(request.body)
+                    log_data['request_body'] = json.loads(body)
+                except ValueError:
+                    # Not JSON, or a binary body such as msgpack
+                    log_data['request_body'] = str(body)
             
             logger.info(f"API Request: {json.dumps(log_data)}")
             
@@ -0,0 +1,29 @@
+import json
+
+import msgpack
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .renderers import MSGPACK_MEDIA_TYPE
+
+
+def unpack(data):
+    return msgpack.unpackb(data, raw=False)
+
+
+class MessagePackParser(BaseParser):
+    """Parses msgpack request bodies"""
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return unpack(stream.read())
+        except (ValueError, msgpack.UnpackException) as e:
+            raise ParseError(f'msgpack parse error - {e}')
+
+
+def request_payload(request):
+    """Body of a plain Django request, sent as msgpack or JSON"""
+    if request.content_type == MSGPACK_MEDIA_TYPE:
+        return unpack(request.body)
+    return json.loads(request.body)
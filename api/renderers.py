@@ -0,0 +1,42 @@
+import msgpack
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+
+
+def pack(data, encoder=DjangoJSONEncoder):
+    """
+    Encode data as msgpack, converting dates, decimals and the like the way
+    the given JSON encoder does, so both formats carry the same values
+    """
+    return msgpack.packb(data, default=encoder().default, use_bin_type=True)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Renders API responses as msgpack, a compact binary alternative to JSON"""
+    media_type = MSGPACK_MEDIA_TYPE
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return pack(data, encoder=JSONEncoder)
+
+
+def negotiated_response(request, data, status=200):
+    """
+    JsonResponse for plain Django views, or msgpack when the Accept header
+    prefers it; clients that send */* keep getting JSON
+    """
+    if request.get_preferred_type(['application/json', MSGPACK_MEDIA_TYPE]) == MSGPACK_MEDIA_TYPE:
+        response = HttpResponse(pack(data), content_type=MSGPACK_MEDIA_TYPE, status=status)
+    else:
+        response = JsonResponse(data, status=status)
+    patch_vary_headers(response, ('Accept',))
+    return response
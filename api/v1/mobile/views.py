@@ -2,6 +2,17 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.settings import api_settings
+from datetime import timezone as dt_timezone
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.decorators import method_decorator
+
+from api.compression import compress_payload
+from api.parsers import MessagePackParser
+from api.renderers import MessagePackRenderer
+
+from apps.api.sync import DEFAULT_PAGE_SIZE, InvalidCursor, sync_page
 
 class MobileConfigView(APIView):
     """
@@ -44,24 +55,44 @@ class RegisterDeviceView(APIView):
         
         return Response({'status': 'device registered'})
 
+@method_decorator(compress_payload, name='dispatch')
 class DataSyncView(APIView):
     """
     Synchronize data between mobile app and server
+    
+    Pull changes with the cursor from the previous response; the first sync
+    sends none and receives everything. Clients upgrading from timestamp
+    based sync may send last_sync_timestamp instead, once. Requests and
+    responses may be msgpack instead of JSON (application/msgpack).
     """
     permission_classes = [IsAuthenticated]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, MessagePackRenderer]
+    parser_classes = [*api_settings.DEFAULT_PARSER_CLASSES, MessagePackParser]
     
     def post(self, request):
-        # Handle data synchronization from mobile clients
-        # This would typically include handling offline changes
-        
+        cursor = request.data.get('cursor')
         last_sync = request.data.get('last_sync_timestamp')
-        changes = request.data.get('changes', [])
         
-        # Process changes from mobile client
-        # ...
+        since = None
+        if last_sync and not cursor:
+            since = parse_datetime(last_sync)
+            if since is None:
+                return Response(
+                    {'error': 'last_sync_timestamp must be an ISO 8601 datetime'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since, dt_timezone.utc)
         
-        # Return new data since last sync
-        return Response({
-            'sync_timestamp': '2023-11-15T12:00:00Z',
-            'changes': []
-        })
\ No newline at end of file
+        try:
+            page = sync_page(
+                request.user,
+                cursor=cursor,
+                since=since,
+                page_size=request.data.get('page_size', DEFAULT_PAGE_SIZE)
+            )
+        except (InvalidCursor, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Offline changes are pushed through the api sync endpoint
+        return Response(page)
@@ -30,6 +30,8 @@ class User(AbstractUser):
     
     # Additional fields
     is_verified = models.BooleanField(default=False)
+    # Bumped to revoke every calendar feed link handed out so far
+    calendar_feed_version = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
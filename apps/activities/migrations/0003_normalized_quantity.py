@@ -0,0 +1,86 @@
+# Generated by Django 5.2 on 2026-10-18 13:10
+
+from django.db import migrations, models
+
+from core.units import normalize
+
+# Detail models with the quantity and unit fields they normalize
+QUANTITY_FIELDS = {
+    'PlantingActivity': ('seed_quantity', 'seed_unit'),
+    'FertilizerActivity': ('quantity', 'unit'),
+    'PestControlActivity': ('quantity', 'unit'),
+    'IrrigationActivity': ('water_quantity', 'water_unit'),
+    'HarvestActivity': ('yield_quantity', 'yield_unit'),
+}
+
+
+def populate_normalized_quantities(apps, schema_editor):
+    for model_name, (quantity_field, unit_field) in QUANTITY_FIELDS.items():
+        Model = apps.get_model('activities', model_name)
+        rows = list(Model.objects.only('pk', quantity_field, unit_field))
+        for row in rows:
+            row.normalized_quantity, row.normalized_unit = normalize(
+                getattr(row, quantity_field), getattr(row, unit_field)
+            )
+        Model.objects.bulk_update(rows, ['normalized_quantity', 'normalized_unit'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0002_alter_activity_activity_type_alter_activity_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fertilizeractivity',
+            name='normalized_quantity',
+            field=models.DecimalField(blank=True, decimal_places=4, editable=False, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='fertilizeractivity',
+            name='normalized_unit',
+            field=models.CharField(blank=True, editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='harvestactivity',
+            name='normalized_quantity',
+            field=models.DecimalField(blank=True, decimal_places=4, editable=False, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='harvestactivity',
+            name='normalized_unit',
+            field=models.CharField(blank=True, editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='irrigationactivity',
+            name='normalized_quantity',
+            field=models.DecimalField(blank=True, decimal_places=4, editable=False, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='irrigationactivity',
+            name='normalized_unit',
+            field=models.CharField(blank=True, editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='pestcontrolactivity',
+            name='normalized_quantity',
+            field=models.DecimalField(blank=True, decimal_places=4, editable=False, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='pestcontrolactivity',
+            name='normalized_unit',
+            field=models.CharField(blank=True, editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='plantingactivity',
+            name='normalized_quantity',
+            field=models.DecimalField(blank=True, decimal_places=4, editable=False, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='plantingactivity',
+            name='normalized_unit',
+            field=models.CharField(blank=True, editable=False, max_length=10),
+        ),
+        migrations.RunPython(populate_normalized_quantities, migrations.RunPython.noop),
+    ]
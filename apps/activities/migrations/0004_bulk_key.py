@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 13:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0003_normalized_quantity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='bulk_key',
+            field=models.UUIDField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
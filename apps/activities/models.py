@@ -1,8 +1,10 @@
 from django.db import models
 from django.conf import settings
 from apps.farms.models import FarmSection, CropCycle
+from core.bulk import BulkInsertKey
+from core.units import BASE_UNITS, MASS, NormalizedQuantityMixin
 
-class Activity(models.Model):
+class Activity(BulkInsertKey):
     """Base model for all farm activities"""
     
     class ActivityType(models.TextChoices):
@@ -76,29 +78,37 @@ class ActivityImage(models.Model):
     def __str__(self):
         return f"Image for {self.activity.title}"
 
-class PlantingActivity(models.Model):
+class PlantingActivity(NormalizedQuantityMixin, models.Model):
     """Extended details for planting activities"""
+    quantity_field = 'seed_quantity'
+    unit_field = 'seed_unit'
     activity = models.OneToOneField(Activity, on_delete=models.CASCADE, primary_key=True)
     seed_quantity = models.DecimalField(max_digits=10, decimal_places=2)
     seed_unit = models.CharField(max_length=50)  # kg, bags, etc.
+    # Quantity in the base unit of core.units, kept up to date on save
+    normalized_quantity = models.DecimalField(max_digits=14, decimal_places=4, null=True, blank=True, editable=False)
+    normalized_unit = models.CharField(max_length=10, blank=True, editable=False)
     planting_method = models.CharField(max_length=100, blank=True)
     spacing = models.CharField(max_length=100, blank=True)  # e.g., "30cm x 30cm"
     
     def __str__(self):
         return f"Planting details for {self.activity.title}"
 
-class FertilizerActivity(models.Model):
+class FertilizerActivity(NormalizedQuantityMixin, models.Model):
     """Extended details for fertilizer application activities"""
     activity = models.OneToOneField(Activity, on_delete=models.CASCADE, primary_key=True)
     fertilizer_type = models.CharField(max_length=100)
     application_method = models.CharField(max_length=100, blank=True)
     quantity = models.DecimalField(max_digits=10, decimal_places=2)
     unit = models.CharField(max_length=50)  # kg, bags, liters, etc.
+    # Quantity in the base unit of core.units, kept up to date on save
+    normalized_quantity = models.DecimalField(max_digits=14, decimal_places=4, null=True, blank=True, editable=False)
+    normalized_unit = models.CharField(max_length=10, blank=True, editable=False)
     
     def __str__(self):
         return f"Fertilizer details for {self.activity.title}"
 
-class PestControlActivity(models.Model):
+class PestControlActivity(NormalizedQuantityMixin, models.Model):
     """Extended details for pest control activities"""
     activity = models.OneToOneField(Activity, on_delete=models.CASCADE, primary_key=True)
     product_name = models.CharField(max_length=100)
@@ -106,29 +116,42 @@ class PestControlActivity(models.Model):
     application_method = models.CharField(max_length=100, blank=True)
     quantity = models.DecimalField(max_digits=10, decimal_places=2)
     unit = models.CharField(max_length=50)  # liters, kg, etc.
+    # Quantity in the base unit of core.units, kept up to date on save
+    normalized_quantity = models.DecimalField(max_digits=14, decimal_places=4, null=True, blank=True, editable=False)
+    normalized_unit = models.CharField(max_length=10, blank=True, editable=False)
     
     def __str__(self):
         return f"Pest control details for {self.activity.title}"
 
-class IrrigationActivity(models.Model):
+class IrrigationActivity(NormalizedQuantityMixin, models.Model):
     """Extended details for irrigation activities"""
+    quantity_field = 'water_quantity'
+    unit_field = 'water_unit'
     activity = models.OneToOneField(Activity, on_delete=models.CASCADE, primary_key=True)
     irrigation_method = models.CharField(max_length=100)
     water_source = models.CharField(max_length=100, blank=True)
     duration_hours = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     water_quantity = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     water_unit = models.CharField(max_length=50, blank=True)  # liters, gallons, etc.
+    # Quantity in the base unit of core.units, kept up to date on save
+    normalized_quantity = models.DecimalField(max_digits=14, decimal_places=4, null=True, blank=True, editable=False)
+    normalized_unit = models.CharField(max_length=10, blank=True, editable=False)
     
     def __str__(self):
         return f"Irrigation details for {self.activity.title}"
 
-class HarvestActivity(models.Model):
+class HarvestActivity(NormalizedQuantityMixin, models.Model):
     """Extended details for harvesting activities"""
+    quantity_field = 'yield_quantity'
+    unit_field = 'yield_unit'
     activity = models.OneToOneField(Activity, on_delete=models.CASCADE, primary_key=True)
     yield_quantity = models.DecimalField(max_digits=10, decimal_places=2)
     yield_unit = models.CharField(max_length=50)  # kg, tons, bags, etc.
     quality_grade = models.CharField(max_length=50, blank=True)
     moisture_content = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    # Quantity in the base unit of core.units, kept up to date on save
+    normalized_quantity = models.DecimalField(max_digits=14, decimal_places=4, null=True, blank=True, editable=False)
+    normalized_unit = models.CharField(max_length=10, blank=True, editable=False)
     
     def __str__(self):
         return f"Harvest details for {self.activity.title}"
@@ -140,12 +163,11 @@ class HarvestActivity(models.Model):
         if self.activity.crop_cycle:
             crop_cycle = self.activity.crop_cycle
             
-            # Convert yield to kg if needed
-            yield_kg = self.yield_quantity
-            if self.yield_unit.lower() != 'kg':
-                # Basic conversion - in a real app, this would be more sophisticated
-                if self.yield_unit.lower() == 'ton' or self.yield_unit.lower() == 'tons':
-                    yield_kg = self.yield_quantity * 1000
+            # Yields in units without a conversion to kg, such as bags, are recorded as given
+            if self.normalized_unit == BASE_UNITS[MASS]:
+                yield_kg = self.normalized_quantity
+            else:
+                yield_kg = self.yield_quantity
             
             crop_cycle.actual_yield_kg = yield_kg
             crop_cycle.actual_harvest_date = self.activity.actual_date
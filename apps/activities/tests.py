@@ -1,3 +1,58 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
 from django.test import TestCase
+from django.urls import reverse
+
+from apps.farms.models import Crop, CropCycle, Farm, FarmSection
+from .models import Activity, HarvestActivity
+
+User = get_user_model()
+
+
+class HarvestNormalizationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='farmer', email='farmer@example.com', password='secret')
+        farm = Farm.objects.create(name='Test Farm', owner=self.user, farm_type='crop', location='Kaduna', size=Decimal('10'))
+        self.field = FarmSection.objects.create(farm=farm, name='North Field', size=Decimal('2.5'))
+        self.crop = Crop.objects.create(name='Maize', average_growing_period_days=120)
+
+    def harvest(self, quantity, unit):
+        cycle = CropCycle.objects.create(field=self.field, crop=self.crop, planting_date=date(2024, 4, 1))
+        activity = Activity.objects.create(
+            field=self.field, crop_cycle=cycle, activity_type='harvesting', title='Harvest maize',
+            planned_date=date(2024, 8, 1), actual_date=date(2024, 8, 1), status='completed', created_by=self.user
+        )
+        HarvestActivity.objects.create(activity=activity, yield_quantity=Decimal(quantity), yield_unit=unit)
+        cycle.refresh_from_db()
+        return cycle
+
+    def test_yield_is_recorded_in_kg(self):
+        cycle = self.harvest('2.5', 'Tons')
+
+        self.assertEqual(cycle.actual_yield_kg, Decimal('2500'))
+        self.assertEqual(cycle.status, 'harvested')
+
+    def test_unconvertible_yield_is_recorded_as_given(self):
+        cycle = self.harvest('40', 'bags')
+
+        self.assertEqual(cycle.actual_yield_kg, Decimal('40'))
+        self.assertIsNone(HarvestActivity.objects.get().normalized_quantity)
+
+    def test_harvest_records_total_kg_only(self):
+        self.harvest('2', 'tonnes')
+        self.harvest('500', 'kg')
+        self.harvest('40', 'bags')
+        self.client.force_login(self.user)
+
+        # The view's template isn't in the tree yet, so only its context is checked
+        with mock.patch('apps.activities.views.render', return_value=HttpResponse()) as render:
+            self.client.get(reverse('activities:harvest_records'))
 
-# Create your tests here.
+        context = render.call_args.args[2]
+        self.assertEqual(context['total_yield'], Decimal('2500'))
+        self.assertEqual(context['harvest_by_crop']['Maize']['harvest_count'], 3)
+        self.assertEqual(context['total_harvests'], 3)
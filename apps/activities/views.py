@@ -4,16 +4,18 @@ from django.contrib import messages
 from django.urls import reverse
 from django.utils import timezone
 from django.db.models import Count, Sum, Avg, Q
+from django.core.paginator import Paginator
 from django.http import JsonResponse
 from datetime import datetime, timedelta
 import json
 
 from .models import (
-    Activity, ActivityImage, PlantingActivity, FertilizerActivity, 
-    PestControlActivity, IrrigationActivity, HarvestActivity, ActivityReminder
+    Activity, ActivityImage, FertilizerActivity,
+    PestControlActivity, IrrigationActivity, ActivityReminder
 )
 from .forms import ActivityForm
 from apps.farms.models import CropCycle, FarmSection
+from core.units import BASE_UNITS, MASS
 
 @login_required
 def activity_list(request):
@@ -402,32 +404,27 @@ def planting_records(request):
     planting_activities = Activity.objects.filter(
         field__farm__owner=request.user,
         activity_type='planting'
-    ).select_related('field', 'crop_cycle').order_by('-actual_date')
-    
-    # Get planting details
-    planting_details = []
-    for activity in planting_activities:
-        try:
-            detail = PlantingActivity.objects.get(activity=activity)
-            planting_details.append({
-                'activity': activity,
-                'detail': detail
-            })
-        except PlantingActivity.DoesNotExist:
-            planting_details.append({
-                'activity': activity,
-                'detail': None
-            })
+    ).select_related('field', 'crop_cycle__crop', 'plantingactivity').order_by('-actual_date', '-id')
+    
+    # Pagination
+    paginator = Paginator(planting_activities, 20)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    
+    # Planting details come with the page's rows; activities without any get None
+    planting_details = [
+        {'activity': activity, 'detail': getattr(activity, 'plantingactivity', None)}
+        for activity in page_obj
+    ]
     
     # Planting statistics
-    total_plantings = planting_activities.count()
     total_seed_cost = planting_activities.aggregate(
         total=Sum('material_cost')
     )['total'] or 0
     
     context = {
+        'page_obj': page_obj,
         'planting_details': planting_details,
-        'total_plantings': total_plantings,
+        'total_plantings': paginator.count,
         'total_seed_cost': total_seed_cost,
         'active_page': 'records'
     }
@@ -440,52 +437,45 @@ def harvest_records(request):
     harvest_activities = Activity.objects.filter(
         field__farm__owner=request.user,
         activity_type='harvesting'
-    ).select_related('field', 'crop_cycle').order_by('-actual_date')
-    
-    # Get harvest details
-    harvest_details = []
-    total_yield = 0
-    
-    for activity in harvest_activities:
-        try:
-            detail = HarvestActivity.objects.get(activity=activity)
-            harvest_details.append({
-                'activity': activity,
-                'detail': detail
-            })
-            # Convert yield to kg for totaling
-            yield_kg = detail.yield_quantity
-            if detail.yield_unit.lower() in ['ton', 'tons']:
-                yield_kg *= 1000
-            total_yield += yield_kg
-        except HarvestActivity.DoesNotExist:
-            harvest_details.append({
-                'activity': activity,
-                'detail': None
-            })
+    ).select_related('field', 'crop_cycle__crop', 'harvestactivity').order_by('-actual_date', '-id')
+    
+    # Pagination
+    paginator = Paginator(harvest_activities, 20)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    
+    harvest_details = [
+        {'activity': activity, 'detail': getattr(activity, 'harvestactivity', None)}
+        for activity in page_obj
+    ]
+    
+    # Yield in kg from the normalized quantities; harvests counted in units
+    # without a conversion, such as bags, are left out of the totals
+    yield_kg = Sum(
+        'harvestactivity__normalized_quantity',
+        filter=Q(harvestactivity__normalized_unit=BASE_UNITS[MASS])
+    )
+    total_yield = harvest_activities.aggregate(total=yield_kg)['total'] or 0
     
     # Harvest statistics by crop
-    harvest_by_crop = {}
-    for item in harvest_details:
-        if item['detail'] and item['activity'].crop_cycle:
-            crop_name = item['activity'].crop_cycle.crop.name
-            if crop_name not in harvest_by_crop:
-                harvest_by_crop[crop_name] = {
-                    'total_yield': 0,
-                    'harvest_count': 0,
-                    'total_value': 0
-                }
-            
-            yield_kg = item['detail'].yield_quantity
-            if item['detail'].yield_unit.lower() in ['ton', 'tons']:
-                yield_kg *= 1000
-                
-            harvest_by_crop[crop_name]['total_yield'] += yield_kg
-            harvest_by_crop[crop_name]['harvest_count'] += 1
+    harvest_by_crop = {
+        row['crop_cycle__crop__name']: {
+            'total_yield': row['total_yield'] or 0,
+            'harvest_count': row['harvest_count'],
+            'total_value': 0
+        }
+        for row in harvest_activities.filter(
+            harvestactivity__isnull=False,
+            crop_cycle__isnull=False
+        ).values('crop_cycle__crop__name').annotate(
+            total_yield=yield_kg,
+            harvest_count=Count('id')
+        ).order_by('crop_cycle__crop__name')
+    }
     
     context = {
+        'page_obj': page_obj,
         'harvest_details': harvest_details,
-        'total_harvests': harvest_activities.count(),
+        'total_harvests': paginator.count,
         'total_yield': total_yield,
         'harvest_by_crop': harvest_by_crop,
         'active_page': 'records'
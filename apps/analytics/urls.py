@@ -18,5 +18,6 @@ urlpatterns = [
     
     # AJAX endpoints
     path('get-field-data/', views.get_field_data, name='get_field_data'),
+    path('harvest-rollup/', views.harvest_rollup_data, name='harvest_rollup_data'),
     path('update-alert/<int:alert_id>/', views.update_alert_status, name='update_alert_status'),
 ]
\ No newline at end of file
@@ -13,6 +13,7 @@ from .models import (
     ProfitabilityBenchmark, ProfitabilityAlert
 )
 from apps.farms.models import Farm, FarmSection, Crop, CropCycle
+from apps.farms.harvest_rollup import harvest_rollup, harvested_cycles, parse_rollup_query
 from apps.activities.models import Activity
 from apps.marketplace.models import ProduceProduct, Order, OrderItem
 
@@ -501,6 +502,33 @@ def get_field_data(request):
     return JsonResponse({'success': False})
 
 
+@login_required
+def harvest_rollup_data(request):
+    """AJAX endpoint returning harvest yields aggregated by month, season or year"""
+    try:
+        options = parse_rollup_query(request.GET)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    
+    crop = farm = None
+    if request.GET.get('crop'):
+        crop = get_object_or_404(Crop, id=request.GET['crop'])
+    if request.GET.get('farm'):
+        farm = get_object_or_404(Farm, id=request.GET['farm'], owner=request.user)
+    
+    cycles = harvested_cycles(
+        request.user, crop=crop, farm=farm, start_date=options['start_date'], end_date=options['end_date']
+    )
+    
+    return JsonResponse({
+        'success': True,
+        'period': options['period'],
+        'rollup': harvest_rollup(
+            cycles, period=options['period'], by_crop=options['by_crop'], date_field=options['date_field']
+        )
+    })
+
+
 @login_required
 def update_alert_status(request, alert_id):
     """AJAX endpoint to update alert status"""
@@ -0,0 +1,137 @@
+import gzip
+import json
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.http import JsonResponse
+from rest_framework.renderers import JSONRenderer
+
+from api.compression import BROTLI_QUALITY, brotli
+from api.parsers import unpack
+from api.renderers import pack
+from apps.activities.models import Activity
+from apps.farms.models import CropCalendar, CropCycle, FarmSection
+from apps.inventory.models import InventoryItem
+from apps.recommendations.benchmark import build_synthetic_farm
+from .sync import MAX_PAGE_SIZE, sync_page
+
+ACTIVITY_TYPES = ['land_preparation', 'planting', 'fertilizer', 'pest_control', 'weed_control', 'irrigation']
+ITEM_TYPES = ['seed', 'fertilizer', 'pesticide', 'equipment', 'tool']
+
+# Encoders as the sync endpoints use them: JsonResponse for the api app,
+# DRF's compact JSON for the mobile API and msgpack for either
+ENCODINGS = {
+    'json': (lambda payload: JsonResponse(payload).content, json.loads),
+    'json (compact)': (lambda payload: JSONRenderer().render(payload), json.loads),
+    'msgpack': (pack, unpack),
+}
+
+
+def build_farm_snapshot(fields=20, crops=10, cycles=4, activities=15, items=40, seed=None):
+    """
+    Create a synthetic farm with the crop cycles, activities, calendar events
+    and inventory a device mirrors, and return its full offline snapshot as
+    sync_page sends it. Call inside a transaction that is rolled back.
+    """
+    rng = random.Random(seed)
+    user, farm, crop_list = build_synthetic_farm(fields, crops, cycles, weather_days=0, seed=seed)
+    sections = list(FarmSection.objects.filter(farm=farm))
+    crop_cycles = list(CropCycle.objects.filter(field__farm=farm))
+
+    Activity.objects.bulk_create([
+        Activity(
+            field=section,
+            activity_type=rng.choice(ACTIVITY_TYPES),
+            title=f'{rng.choice(ACTIVITY_TYPES).replace("_", " ").title()} on {section.name}',
+            planned_date=farm.created_at.date() - timedelta(days=rng.randint(0, 365)),
+            status=rng.choice(['planned', 'completed']),
+            labor_cost=Decimal(rng.randint(0, 500)),
+            created_by=user
+        )
+        for section in sections
+        for _ in range(activities)
+    ])
+
+    CropCalendar.objects.bulk_create([
+        CropCalendar(
+            farm=farm,
+            crop_cycle=cycle,
+            event_type=event_type,
+            title=f'{event_type.title()} {cycle.crop.name}',
+            start_date=date,
+            end_date=date,
+            created_by=user
+        )
+        for cycle in crop_cycles
+        for event_type, date in (('planting', cycle.planting_date), ('harvesting', cycle.expected_harvest_date))
+    ])
+
+    inventory = [
+        InventoryItem(
+            user=user,
+            farm=farm,
+            name=f'Item {index + 1}',
+            item_type=rng.choice(ITEM_TYPES),
+            quantity=Decimal(str(round(rng.uniform(1, 500), 2))),
+            unit=rng.choice(['kg', 'litre', 'bag', 'piece']),
+            storage_location='Main store'
+        )
+        for index in range(items)
+    ]
+    for item in inventory:
+        item.normalize_quantity()
+    InventoryItem.objects.bulk_create(inventory)
+
+    # Pages merged into one, as if the device had asked for everything at once
+    page = sync_page(user, page_size=MAX_PAGE_SIZE)
+    snapshot = dict(page, changes={})
+    while True:
+        for key, rows in page['changes'].items():
+            snapshot['changes'].setdefault(key, []).extend(rows)
+        if not page['has_more']:
+            return dict(snapshot, cursor=page['cursor'], has_more=False)
+        page = sync_page(user, cursor=page['cursor'], page_size=MAX_PAGE_SIZE)
+
+
+def _timed(function, argument, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(argument)
+        samples.append(time.perf_counter() - start)
+    return result, statistics.mean(samples) * 1000
+
+
+def benchmark_sync_payload(fields=20, crops=10, cycles=4, activities=15, items=40, repeat=20, seed=42):
+    """
+    Compare the wire size and encode and decode time of a farm's offline
+    snapshot in each encoding, raw and compressed.
+
+    The synthetic farm is rolled back afterwards. Returns {'rows': n,
+    'encodings': {name: {'bytes', 'gzip_bytes', 'brotli_bytes', 'encode_ms',
+    'decode_ms'}}}; brotli_bytes is None without the brotli package.
+    """
+    with transaction.atomic():
+        snapshot = build_farm_snapshot(fields, crops, cycles, activities, items, seed=seed)
+        transaction.set_rollback(True)
+
+    results = {}
+    for name, (encode, decode) in ENCODINGS.items():
+        body, encode_ms = _timed(encode, snapshot, repeat)
+        _, decode_ms = _timed(decode, body, repeat)
+        results[name] = {
+            'bytes': len(body),
+            'gzip_bytes': len(gzip.compress(body, compresslevel=6)),
+            'brotli_bytes': len(brotli.compress(body, quality=BROTLI_QUALITY)) if brotli else None,
+            'encode_ms': round(encode_ms, 3),
+            'decode_ms': round(decode_ms, 3),
+        }
+
+    return {
+        'rows': sum(len(rows) for rows in snapshot['changes'].values()),
+        'encodings': results,
+    }
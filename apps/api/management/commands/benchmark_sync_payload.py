@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from apps.api.benchmark import benchmark_sync_payload
+
+
+class Command(BaseCommand):
+    help = 'Compare the size and encode time of an offline sync snapshot as JSON and msgpack (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fields', type=int, default=20)
+        parser.add_argument('--crops', type=int, default=10)
+        parser.add_argument('--cycles', type=int, default=4, help='Crop cycles per field')
+        parser.add_argument('--activities', type=int, default=15, help='Activities per field')
+        parser.add_argument('--items', type=int, default=40, help='Inventory items')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        result = benchmark_sync_payload(
+            fields=options['fields'],
+            crops=options['crops'],
+            cycles=options['cycles'],
+            activities=options['activities'],
+            items=options['items'],
+            repeat=options['repeat'],
+            seed=options['seed']
+        )
+
+        self.stdout.write(f"{result['rows']} rows, {options['repeat']} runs")
+        self.stdout.write(
+            f"{'encoding':<16}{'bytes':>10}{'gzip':>10}{'brotli':>10}{'encode (ms)':>14}{'decode (ms)':>14}"
+        )
+        for name, timing in result['encodings'].items():
+            brotli_bytes = timing['brotli_bytes'] if timing['brotli_bytes'] is not None else '-'
+            self.stdout.write(
+                f"{name:<16}{timing['bytes']:>10}{timing['gzip_bytes']:>10}{brotli_bytes:>10}"
+                f"{timing['encode_ms']:>14.3f}{timing['decode_ms']:>14.3f}"
+            )
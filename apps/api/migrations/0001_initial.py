@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 13:01
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('owner_id', models.BigIntegerField(blank=True, null=True)),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner_id', 'deleted_at', 'id'], name='api_synctom_owner_i_b1a05d_idx'), models.Index(fields=['deleted_at'], name='api_synctom_deleted_e3b2b6_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class SyncTombstone(models.Model):
+    """
+    Record of a deleted row, so offline clients pulling changes since a
+    cursor learn about deletes as well as updates
+    """
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    # Plain ids rather than a foreign key: tombstones outlive the rows, and
+    # owner None marks rows of the shared catalogue
+    owner_id = models.BigIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner_id', 'deleted_at', 'id']),
+            models.Index(fields=['deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"Deleted {self.model} #{self.object_id}"
+
+
+class OfflineSubmission(models.Model):
+    """
+    A record pushed from a device's offline queue, keyed by the id the device
+    gave it, so a retried upload maps back to the rows already created
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='offline_submissions')
+    offline_id = models.CharField(max_length=100)
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['user', 'offline_id']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.offline_id} -> {self.model} #{self.object_id}"
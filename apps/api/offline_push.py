@@ -0,0 +1,224 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from apps.activities.models import Activity
+from apps.farms.dashboard_summary import mark_dashboard_stale
+from apps.farms.models import FarmSection
+from apps.inventory.models import InventoryItem, InventoryTransaction
+from core.bulk import bulk_insert
+from core.units import normalize
+from .models import OfflineSubmission
+
+
+class OfflineRecordError(Exception):
+    pass
+
+
+def _date(value):
+    return datetime.fromisoformat(value).date() if value else None
+
+
+def _decimal(value, default=None):
+    return Decimal(str(value)) if value not in (None, '') else default
+
+
+def _require(record, *names):
+    missing = [name for name in names if record.get(name) in (None, '')]
+    if missing:
+        raise OfflineRecordError(f"Missing {', '.join(missing)}")
+
+
+def _offline_id(record):
+    offline_id = record.get('offline_id')
+    return str(offline_id) if offline_id not in (None, '') else None
+
+
+def _push(user, records, build, after_insert=None):
+    """
+    Insert a device's queued records in bulk, skipping those already pushed.
+
+    build(record) returns the unsaved instance for a record, or raises for a
+    record that can't be stored. Replays are answered from OfflineSubmission
+    with the ids created the first time; everything new is inserted in one
+    transaction together with its dedupe rows, and after_insert(instances)
+    is called inside that transaction with the new instances in order.
+    Returns a result per record, in order.
+    """
+    offline_ids = [_offline_id(record) for record in records]
+    pushed = dict(OfflineSubmission.objects.filter(
+        user=user,
+        offline_id__in={offline_id for offline_id in offline_ids if offline_id}
+    ).values_list('offline_id', 'object_id'))
+
+    results = [None] * len(records)
+    pending = []
+    first_index = {}
+    for index, (record, offline_id) in enumerate(zip(records, offline_ids)):
+        if offline_id in pushed:
+            results[index] = {
+                'id': pushed[offline_id],
+                'offline_id': record.get('offline_id'),
+                'status': 'synced',
+                'duplicate': True
+            }
+            continue
+        if offline_id in first_index:
+            # Queued twice in the same upload, filled in once the first is saved
+            continue
+        try:
+            instance = build(record)
+        except Exception as e:
+            results[index] = {'offline_id': record.get('offline_id'), 'status': 'error', 'error': str(e)}
+            continue
+        if offline_id:
+            first_index[offline_id] = index
+        pending.append((index, offline_id, instance))
+
+    with transaction.atomic():
+        for model in {type(instance) for _, _, instance in pending}:
+            bulk_insert(model, [instance for _, _, instance in pending if type(instance) is model])
+        # A concurrent upload of the same queue makes this fail and roll back
+        OfflineSubmission.objects.bulk_create([
+            OfflineSubmission(
+                user=user,
+                offline_id=offline_id,
+                model=instance._meta.label_lower,
+                object_id=instance.pk
+            )
+            for _, offline_id, instance in pending if offline_id
+        ])
+        if after_insert:
+            after_insert([instance for _, _, instance in pending])
+
+    for index, offline_id, instance in pending:
+        results[index] = {'id': instance.pk, 'offline_id': records[index].get('offline_id'), 'status': 'synced'}
+    for index, offline_id in enumerate(offline_ids):
+        if results[index] is None:
+            results[index] = dict(results[first_index[offline_id]], duplicate=True)
+
+    return results
+
+
+def _push_with_retry(user, records, build, after_insert=None):
+    try:
+        return _push(user, records, build, after_insert)
+    except IntegrityError:
+        # Another request stored part of this queue first; its rows now count as replays
+        return _push(user, records, build, after_insert)
+
+
+def push_activities(user, records):
+    """Create activities queued offline, resolving all their fields in one query"""
+    field_ids = set(
+        FarmSection.objects.filter(
+            id__in={record.get('farm_section_id') for record in records if record.get('farm_section_id')},
+            farm__owner=user
+        ).values_list('id', flat=True)
+    )
+
+    def build(record):
+        _require(record, 'farm_section_id', 'activity_type', 'planned_date')
+        field_id = int(record['farm_section_id'])
+        if field_id not in field_ids:
+            raise OfflineRecordError("Farm section not found")
+        return Activity(
+            field_id=field_id,
+            activity_type=record['activity_type'],
+            title=record.get('title') or '',
+            description=record.get('description') or '',
+            planned_date=_date(record['planned_date']),
+            actual_date=_date(record.get('actual_date')),
+            status=record.get('status') or 'planned',
+            labor_cost=_decimal(record.get('labor_cost'), 0),
+            material_cost=_decimal(record.get('material_cost'), 0),
+            # Older clients send a single cost
+            other_cost=_decimal(record.get('other_cost', record.get('cost')), 0),
+            notes=record.get('notes') or '',
+            created_by=user
+        )
+
+    results = _push_with_retry(user, records, build)
+    if any(result['status'] == 'synced' and not result.get('duplicate') for result in results):
+        # Bulk inserts send no post_save, so flag the dashboard here
+        mark_dashboard_stale(user.id, 'activities')
+    return results
+
+
+def push_inventory(user, records):
+    """Create inventory items and transactions queued offline"""
+    # Transactions count in their item's unit
+    item_units = dict(
+        InventoryItem.objects.filter(
+            id__in={
+                record.get('inventory_item_id') for record in records
+                if record.get('type') == 'transaction' and record.get('inventory_item_id')
+            },
+            user=user
+        ).values_list('id', 'unit')
+    )
+
+    def build(record):
+        if record.get('type') == 'transaction':
+            _require(record, 'inventory_item_id', 'transaction_type', 'quantity', 'date')
+            item_id = int(record['inventory_item_id'])
+            if item_id not in item_units:
+                raise OfflineRecordError("Inventory item not found")
+            quantity = _decimal(record['quantity'])
+            unit_price = _decimal(record.get('unit_price'))
+            normalized_quantity, normalized_unit = normalize(quantity, item_units[item_id])
+            return InventoryTransaction(
+                inventory_item_id=item_id,
+                transaction_type=record['transaction_type'],
+                quantity=quantity,
+                date=_date(record['date']),
+                unit_price=unit_price,
+                # Worked out in save(), which bulk inserts skip
+                total_price=quantity * unit_price if unit_price is not None else None,
+                normalized_quantity=normalized_quantity,
+                normalized_unit=normalized_unit,
+                notes=record.get('notes') or '',
+                performed_by=user
+            )
+        elif record.get('type') == 'item':
+            _require(record, 'name', 'item_type')
+            item = InventoryItem(
+                user=user,
+                name=record['name'],
+                item_type=record['item_type'],
+                description=record.get('description') or '',
+                quantity=_decimal(record.get('quantity'), 0),
+                unit=record.get('unit') or '',
+                status=record.get('status') or 'available',
+                storage_location=record.get('storage_location') or '',
+                acquisition_date=_date(record.get('acquisition_date'))
+            )
+            item.normalize_quantity()
+            return item
+        raise OfflineRecordError(f"Unknown inventory record type '{record.get('type')}'")
+
+    def apply_transactions(instances):
+        # Bulk inserts skip InventoryTransaction.save(), so stock moves here, one save per item
+        transactions = [instance for instance in instances if isinstance(instance, InventoryTransaction)]
+        if not transactions:
+            return
+        items = InventoryItem.objects.select_for_update().in_bulk(
+            {inventory_transaction.inventory_item_id for inventory_transaction in transactions}
+        )
+        for inventory_transaction in transactions:
+            inventory_transaction.apply_to_item(items[inventory_transaction.inventory_item_id])
+        for item in items.values():
+            item.save()
+
+    return _push_with_retry(user, records, build, apply_transactions)
+
+
+def prune_offline_submissions(now=None):
+    """Forget pushed offline ids once devices can no longer replay them"""
+    now = now or timezone.now()
+    return OfflineSubmission.objects.filter(
+        created_at__lt=now - timedelta(days=settings.OFFLINE_SUBMISSION_RETENTION_DAYS)
+    ).delete()[0]
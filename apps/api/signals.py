@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, pre_delete
+
+from .sync import SYNC_MODELS, queue_tombstone, record_tombstones
+
+
+def _account_deleted(origin):
+    # Deleting an account removes its devices' data along with it
+    return isinstance(origin, get_user_model())
+
+
+def synced_row_deleting(sender, instance, origin=None, **kwargs):
+    if not _account_deleted(origin):
+        queue_tombstone(instance, origin)
+
+
+def synced_row_deleted(sender, instance, origin=None, **kwargs):
+    if not _account_deleted(origin):
+        record_tombstones(instance, origin)
+
+
+for sync_model in SYNC_MODELS:
+    pre_delete.connect(synced_row_deleting, sender=sync_model.model, dispatch_uid=f'sync_tombstone_queue_{sync_model.key}')
+    post_delete.connect(synced_row_deleted, sender=sync_model.model, dispatch_uid=f'sync_tombstone_{sync_model.key}')
@@ -0,0 +1,266 @@
+import threading
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.activities.models import Activity
+from apps.farms.models import Crop, CropCalendar, CropCycle, Farm, FarmSection
+from apps.inventory.models import InventoryItem
+from .models import SyncTombstone
+
+
+CURSOR_SALT = 'api.sync_cursor'
+
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+
+
+class SyncModel:
+    """A model offline clients mirror, with the rows and fields a user receives"""
+
+    def __init__(self, key, model, owner_path, fields):
+        self.key = key
+        self.model = model
+        # Lookup from the model to the owning user, None for the shared catalogue
+        self.owner_path = owner_path
+        self.fields = fields
+
+    def queryset(self, user):
+        rows = self.model._default_manager.all()
+        if self.owner_path:
+            rows = rows.filter(**{self.owner_path: user})
+        return rows
+
+    def owner_id_of(self, instance, owners=None):
+        """
+        Owning user id of a row being deleted, following the owner path from
+        its foreign key. Pass an owners dict to share lookups between rows.
+        """
+        if not self.owner_path:
+            return None
+        head, _, rest = self.owner_path.partition('__')
+        if not rest:
+            return getattr(instance, f'{head}_id')
+        related_model = self.model._meta.get_field(head).related_model
+        key = (related_model, getattr(instance, f'{head}_id'))
+        if owners is None or key not in owners:
+            owner_id = related_model._default_manager.filter(pk=key[1]).values_list(f'{rest}_id', flat=True).first()
+            if owners is None:
+                return owner_id
+            owners[key] = owner_id
+        return owners[key]
+
+
+# Pulled in this order, parents before children
+SYNC_MODELS = [
+    SyncModel('crops', Crop, None, ['id', 'name', 'scientific_name', 'average_growing_period_days']),
+    SyncModel('farms', Farm, 'owner', ['id', 'name', 'farm_type', 'location', 'size', 'is_active']),
+    SyncModel('farm_sections', FarmSection, 'farm__owner', ['id', 'farm_id', 'name', 'size', 'crop_type', 'is_active']),
+    SyncModel('crop_cycles', CropCycle, 'field__farm__owner', [
+        'id', 'field_id', 'crop_id', 'planting_date', 'expected_harvest_date', 'actual_harvest_date',
+        'status', 'expected_yield_kg', 'actual_yield_kg',
+    ]),
+    SyncModel('activities', Activity, 'field__farm__owner', [
+        'id', 'field_id', 'crop_cycle_id', 'activity_type', 'title', 'planned_date', 'actual_date', 'status',
+    ]),
+    SyncModel('inventory_items', InventoryItem, 'user', [
+        'id', 'farm_id', 'name', 'item_type', 'quantity', 'unit', 'status', 'storage_location',
+    ]),
+    SyncModel('crop_calendar', CropCalendar, 'farm__owner', [
+        'id', 'farm_id', 'crop_cycle_id', 'event_type', 'title', 'start_date', 'end_date', 'status',
+        'priority', 'is_recurring', 'recurrence_pattern', 'recurrence_interval',
+    ]),
+]
+
+SYNC_MODELS_BY_MODEL = {sync_model.model: sync_model for sync_model in SYNC_MODELS}
+
+# Stage after the models that pulls tombstones
+TOMBSTONE_STAGE = len(SYNC_MODELS)
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _encode(user, since, until=None, stage=0, position=None):
+    # Without `until` the cursor starts a new session at the time it is used
+    return signing.dumps({
+        'u': user.id,
+        's': since.isoformat() if since else None,
+        'n': until.isoformat() if until else None,
+        'm': stage,
+        'p': [position[0].isoformat(), position[1]] if position else None,
+    }, salt=CURSOR_SALT, compress=True)
+
+
+def _decode(user, cursor):
+    try:
+        state = signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        raise InvalidCursor('Invalid sync cursor')
+    if state.get('u') != user.id:
+        raise InvalidCursor('Sync cursor belongs to another user')
+
+    since = datetime.fromisoformat(state['s']) if state['s'] else None
+    until = datetime.fromisoformat(state['n']) if state['n'] else None
+    position = (datetime.fromisoformat(state['p'][0]), state['p'][1]) if state['p'] else None
+    return since, until, state['m'], position
+
+
+def _after(queryset, time_field, since, position):
+    """Rows after the keyset position, or changed since the session's start"""
+    if position is not None:
+        timestamp, last_id = position
+        return queryset.filter(Q(**{f'{time_field}__gt': timestamp}) | Q(**{time_field: timestamp, 'id__gt': last_id}))
+    if since is not None:
+        return queryset.filter(**{f'{time_field}__gte': since})
+    return queryset
+
+
+# Tombstones of the deletes in progress on this thread, by id() of the delete's origin
+_deletes = threading.local()
+
+
+def _pending_deletes():
+    if not hasattr(_deletes, 'pending'):
+        _deletes.pending = {}
+    return _deletes.pending
+
+
+def queue_tombstone(instance, origin):
+    """
+    Queue the tombstone of a synced row about to be deleted.
+
+    Called from pre_delete, which Django sends for every row of a delete,
+    cascades included, before any row is removed, so owners can still be
+    looked up; each parent row is looked up once per delete.
+    """
+    sync_model = SYNC_MODELS_BY_MODEL.get(type(instance))
+    if sync_model is None:
+        return
+    delete = _pending_deletes().get(id(origin))
+    if delete is None or (sync_model.key, instance.pk) in delete['rows']:
+        # A new delete, or a retry of one that failed part way. The origin is
+        # kept so its id can't be reused while the delete is pending.
+        delete = _pending_deletes()[id(origin)] = {
+            'origin': origin, 'owners': {}, 'rows': set(), 'tombstones': [], 'deleted': 0
+        }
+    delete['rows'].add((sync_model.key, instance.pk))
+    delete['tombstones'].append(SyncTombstone(
+        model=sync_model.key,
+        object_id=instance.pk,
+        owner_id=sync_model.owner_id_of(instance, delete['owners'])
+    ))
+
+
+def record_tombstones(instance, origin):
+    """
+    Count a deleted synced row, from post_delete, and store the delete's
+    tombstones in one bulk insert once its last row is gone. This runs
+    inside the delete's transaction.
+    """
+    if type(instance) not in SYNC_MODELS_BY_MODEL:
+        return
+    delete = _pending_deletes().get(id(origin))
+    if delete is None:
+        return
+    delete['deleted'] += 1
+    if delete['deleted'] >= len(delete['tombstones']):
+        del _pending_deletes()[id(origin)]
+        SyncTombstone.objects.bulk_create(delete['tombstones'], batch_size=500)
+
+
+def prune_tombstones(now=None):
+    """Drop tombstones older than any cursor still accepted"""
+    now = now or timezone.now()
+    return SyncTombstone.objects.filter(
+        deleted_at__lt=now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    ).delete()[0]
+
+
+def sync_page(user, cursor=None, since=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Return one page of the changes a user's device is missing.
+
+    Without a cursor a session starts: everything changed since `since`, or
+    all rows for a first sync. Models are read in SYNC_MODELS order, each by
+    keyset on (updated_at, id), followed by the tombstones of deleted rows.
+    While has_more is set the returned cursor continues the session; once
+    it is done, the cursor starts the next session, reaching back
+    SYNC_CURSOR_LAG_SECONDS to pick up rows committed late by long
+    transactions. Re-sent rows are plain upserts for the client.
+    """
+    page_size = max(1, min(int(page_size or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    now = timezone.now()
+
+    if cursor:
+        since, until, stage, position = _decode(user, cursor)
+        until = until or now
+    else:
+        until, stage, position = now, 0, None
+
+    # Tombstones past retention are gone, so the device has to start over
+    reset = since is not None and since < now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    if reset:
+        since, stage, position = None, 0, None
+
+    changes = {}
+    deleted = {}
+    remaining = page_size
+    has_more = False
+
+    while stage <= TOMBSTONE_STAGE:
+        # A first sync has nothing to delete on the device
+        if stage == TOMBSTONE_STAGE and since is None:
+            stage += 1
+            break
+
+        if stage < TOMBSTONE_STAGE:
+            sync_model = SYNC_MODELS[stage]
+            rows = list(_after(sync_model.queryset(user), 'updated_at', since, position).order_by(
+                'updated_at', 'id'
+            ).values(*sync_model.fields, 'updated_at')[:remaining + 1])
+            time_field = 'updated_at'
+        else:
+            rows = list(_after(
+                SyncTombstone.objects.filter(Q(owner_id=user.id) | Q(owner_id__isnull=True)),
+                'deleted_at', since, position
+            ).order_by('deleted_at', 'id').values('id', 'model', 'object_id', 'deleted_at')[:remaining + 1])
+            time_field = 'deleted_at'
+
+        has_more = len(rows) > remaining
+        rows = rows[:remaining]
+
+        for row in rows:
+            if stage < TOMBSTONE_STAGE:
+                changes.setdefault(sync_model.key, []).append(
+                    {name: value for name, value in row.items() if name != 'updated_at'}
+                )
+            else:
+                deleted.setdefault(row['model'], []).append(row['object_id'])
+
+        remaining -= len(rows)
+        if has_more:
+            position = (rows[-1][time_field], rows[-1]['id'])
+            break
+        stage, position = stage + 1, None
+        if remaining == 0 and stage <= TOMBSTONE_STAGE:
+            has_more = True
+            break
+
+    if has_more:
+        next_cursor = _encode(user, since, until, stage, position)
+    else:
+        next_cursor = _encode(user, until - timedelta(seconds=settings.SYNC_CURSOR_LAG_SECONDS))
+
+    return {
+        'cursor': next_cursor,
+        'has_more': has_more,
+        'reset': reset,
+        'sync_timestamp': until.isoformat(),
+        'changes': changes,
+        'deleted': deleted,
+    }
@@ -0,0 +1,307 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from api.compression import brotli
+from apps.activities.models import Activity
+from apps.farms.models import Crop, CropCalendar, CropCycle, Farm, FarmSection
+from apps.inventory.models import InventoryItem, InventoryTransaction
+from .models import OfflineSubmission, SyncTombstone
+from .offline_push import push_activities, push_inventory
+from .sync import InvalidCursor, sync_page
+
+User = get_user_model()
+
+
+class OfflinePushTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='farmer', email='farmer@example.com', password='secret')
+        self.farm = Farm.objects.create(name='Test Farm', owner=self.user, farm_type='crop', location='Kaduna', size=Decimal('10'))
+        self.section = FarmSection.objects.create(farm=self.farm, name='North Field', size=Decimal('2.5'))
+        self.item = InventoryItem.objects.create(user=self.user, name='Urea', item_type='input', quantity=Decimal('10'), unit='kg')
+
+    def transaction(self, offline_id, transaction_type, quantity):
+        return {
+            'type': 'transaction',
+            'offline_id': offline_id,
+            'inventory_item_id': self.item.id,
+            'transaction_type': transaction_type,
+            'quantity': quantity,
+            'date': '2024-05-01'
+        }
+
+    def activity(self, offline_id):
+        return {
+            'offline_id': offline_id,
+            'farm_section_id': self.section.id,
+            'activity_type': 'planting',
+            'title': 'Plant maize',
+            'planned_date': '2024-05-01'
+        }
+
+
+class PushInventoryTest(OfflinePushTestCase):
+    def test_transactions_update_stock_in_order(self):
+        updated_at = self.item.updated_at
+
+        results = push_inventory(self.user, [
+            self.transaction('t1', 'purchase', '5'),
+            self.transaction('t2', 'usage', '3'),
+        ])
+
+        self.assertEqual([result['status'] for result in results], ['synced', 'synced'])
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, Decimal('12'))
+        # Delta sync picks the item up again
+        self.assertGreater(self.item.updated_at, updated_at)
+
+    def test_usage_depletes_item(self):
+        push_inventory(self.user, [self.transaction('t1', 'usage', '10')])
+
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, Decimal('0'))
+        self.assertEqual(self.item.status, 'depleted')
+
+    def test_adjustment_sets_total(self):
+        push_inventory(self.user, [
+            self.transaction('t1', 'purchase', '5'),
+            self.transaction('t2', 'adjustment', '4'),
+        ])
+
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, Decimal('4'))
+
+    def test_replay_does_not_move_stock_twice(self):
+        first = push_inventory(self.user, [self.transaction('t1', 'purchase', '5')])
+        replay = push_inventory(self.user, [self.transaction('t1', 'purchase', '5')])
+
+        self.assertEqual(replay[0]['id'], first[0]['id'])
+        self.assertTrue(replay[0]['duplicate'])
+        self.assertEqual(InventoryTransaction.objects.count(), 1)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, Decimal('15'))
+
+    def test_unknown_item_is_rejected(self):
+        other = User.objects.create_user(username='other', email='other@example.com', password='secret')
+        item = InventoryItem.objects.create(user=other, name='Seed', item_type='input', quantity=1, unit='kg')
+
+        results = push_inventory(self.user, [dict(self.transaction('t1', 'purchase', '5'), inventory_item_id=item.id)])
+
+        self.assertEqual(results[0]['status'], 'error')
+        self.assertFalse(InventoryTransaction.objects.exists())
+
+    def test_quantities_are_normalized(self):
+        results = push_inventory(self.user, [
+            {'type': 'item', 'offline_id': 'i1', 'name': 'Lime', 'item_type': 'input', 'quantity': '2', 'unit': 'tonnes'},
+        ])
+
+        item = InventoryItem.objects.get(id=results[0]['id'])
+        self.assertEqual(item.normalized_quantity, Decimal('2000'))
+        self.assertEqual(item.normalized_unit, 'kg')
+
+
+class PushActivitiesTest(OfflinePushTestCase):
+    def test_duplicates_in_one_upload_are_stored_once(self):
+        results = push_activities(self.user, [self.activity('a1'), self.activity('a1'), self.activity('a2')])
+
+        self.assertEqual(Activity.objects.count(), 2)
+        self.assertEqual(results[1]['id'], results[0]['id'])
+        self.assertTrue(results[1]['duplicate'])
+        self.assertEqual(OfflineSubmission.objects.filter(user=self.user).count(), 2)
+
+    def test_records_without_offline_id_get_ids(self):
+        results = push_activities(self.user, [dict(self.activity(None)), dict(self.activity(None))])
+
+        self.assertEqual(Activity.objects.count(), 2)
+        self.assertTrue(all(result['id'] for result in results))
+
+    def test_invalid_record_does_not_block_the_rest(self):
+        results = push_activities(self.user, [{'offline_id': 'bad'}, self.activity('a1')])
+
+        self.assertEqual([result['status'] for result in results], ['error', 'synced'])
+
+
+class PushWithoutBulkReturningTest(OfflinePushTestCase):
+    """MySQL returns no primary keys from bulk inserts"""
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(
+            type(connection.features), 'can_return_rows_from_bulk_insert',
+            new_callable=mock.PropertyMock, return_value=False
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_activities_get_ids(self):
+        results = push_activities(self.user, [self.activity('a1'), self.activity(None)])
+
+        self.assertEqual(
+            {result['id'] for result in results},
+            set(Activity.objects.values_list('id', flat=True))
+        )
+        self.assertEqual(
+            OfflineSubmission.objects.get(offline_id='a1').object_id,
+            results[0]['id']
+        )
+
+    def test_activities_are_inserted_in_one_statement(self):
+        saved = []
+        post_save.connect(lambda **kwargs: saved.append(kwargs['instance']), sender=Activity, weak=False, dispatch_uid='test_saved')
+        self.addCleanup(post_save.disconnect, sender=Activity, dispatch_uid='test_saved')
+
+        with CaptureQueriesContext(connection) as queries:
+            results = push_activities(self.user, [self.activity(f'a{index}') for index in range(50)])
+
+        inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "activities_activity"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(len({result['id'] for result in results}), 50)
+        # Same as where the database returns the keys: bulk inserts send no signals
+        self.assertEqual(saved, [])
+
+    def test_transactions_update_stock_once(self):
+        results = push_inventory(self.user, [self.transaction('t1', 'purchase', '5')])
+
+        self.assertEqual(results[0]['id'], InventoryTransaction.objects.get().id)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, Decimal('15'))
+
+
+class OfflineSyncViewTest(OfflinePushTestCase):
+    def test_push_and_replay(self):
+        self.client.force_login(self.user)
+        body = {'type': 'inventory', 'data': [self.transaction('t1', 'purchase', '5')]}
+
+        response = self.client.post(reverse('api:offline_sync'), body, content_type='application/json')
+        replay = self.client.post(reverse('api:offline_sync'), body, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(replay.json()['results'][0]['duplicate'])
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, Decimal('15'))
+
+
+class SyncPageTest(OfflinePushTestCase):
+    def setUp(self):
+        super().setUp()
+        self.crop = Crop.objects.create(name='Maize', average_growing_period_days=120)
+        self.cycle = CropCycle.objects.create(field=self.section, crop=self.crop, planting_date=date(2024, 4, 1))
+        push_activities(self.user, [self.activity('a1')])
+
+    def sync_all(self, cursor=None, page_size=200):
+        """Follow a session to its end, merging its pages"""
+        changes, deleted, pages = {}, {}, 0
+        while True:
+            page = sync_page(self.user, cursor=cursor, page_size=page_size)
+            pages += 1
+            for key, rows in page['changes'].items():
+                changes.setdefault(key, []).extend(row['id'] for row in rows)
+            for key, ids in page['deleted'].items():
+                deleted.setdefault(key, []).extend(ids)
+            cursor = page['cursor']
+            if not page['has_more']:
+                return changes, deleted, cursor, pages
+
+    def test_first_sync_returns_the_users_rows(self):
+        other = User.objects.create_user(username='other', email='other@example.com', password='secret')
+        Farm.objects.create(name='Other Farm', owner=other, farm_type='crop', location='Kano', size=Decimal('5'))
+
+        changes, deleted, _, _ = self.sync_all()
+
+        self.assertEqual(changes['farms'], [self.farm.id])
+        self.assertEqual(changes['crop_cycles'], [self.cycle.id])
+        self.assertEqual(changes['inventory_items'], [self.item.id])
+        self.assertEqual(deleted, {})
+
+    def test_pages_cover_every_row_once(self):
+        full, _, _, _ = self.sync_all()
+
+        paged, _, _, pages = self.sync_all(page_size=2)
+
+        self.assertGreater(pages, 1)
+        self.assertEqual(paged, full)
+
+    def test_delta_sync_returns_changes_and_deletions(self):
+        _, _, cursor, _ = self.sync_all()
+        self.section.name = 'Renamed'
+        self.section.save()
+        Activity.objects.all().delete()
+
+        changes, deleted, _, _ = self.sync_all(cursor)
+
+        self.assertIn(self.section.id, changes['farm_sections'])
+        self.assertEqual(len(deleted['activities']), 1)
+
+    def test_cascade_records_tombstones_in_one_insert(self):
+        activity_id = Activity.objects.get().id
+        farm_id = self.farm.id
+        calendar_ids = set(CropCalendar.objects.values_list('id', flat=True))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.farm.delete()
+
+        inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "api_synctombstone"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(set(SyncTombstone.objects.filter(model='crop_calendar').values_list('object_id', flat=True)), calendar_ids)
+        self.assertEqual(
+            set(SyncTombstone.objects.exclude(model='crop_calendar').values_list('model', 'object_id', 'owner_id')),
+            {
+                ('farms', farm_id, self.user.id),
+                ('farm_sections', self.section.id, self.user.id),
+                ('crop_cycles', self.cycle.id, self.user.id),
+                ('activities', activity_id, self.user.id),
+            }
+        )
+
+    def test_shared_catalogue_deletions_reach_everyone(self):
+        self.crop.delete()
+
+        self.assertEqual(SyncTombstone.objects.get(model='crops').owner_id, None)
+        self.assertEqual(SyncTombstone.objects.get(model='crop_cycles').owner_id, self.user.id)
+
+    def test_deleting_an_account_records_no_tombstones(self):
+        self.user.delete()
+
+        self.assertFalse(SyncTombstone.objects.exists())
+
+    def test_cursor_is_bound_to_its_user(self):
+        _, _, cursor, _ = self.sync_all()
+        other = User.objects.create_user(username='other', email='other@example.com', password='secret')
+
+        with self.assertRaises(InvalidCursor):
+            sync_page(other, cursor=cursor)
+
+    def test_invalid_cursor_is_a_client_error(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse('api:get_offline_data'), {'cursor': 'garbage'})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class SyncEncodingTest(OfflinePushTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        for index in range(20):
+            InventoryItem.objects.create(user=self.user, name=f'Item {index}', item_type='input', quantity=1, unit='kg')
+
+    def test_gzip_response(self):
+        response = self.client.get(reverse('api:get_offline_data'), HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_brotli_response(self):
+        if brotli is None:
+            self.skipTest('brotli is not installed')
+        response = self.client.get(reverse('api:get_offline_data'), HTTP_ACCEPT_ENCODING='gzip, br')
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertIn('inventory_items', brotli.decompress(response.content).decode())
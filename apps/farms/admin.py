@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import (
     Farm, FarmSection, Crop, CropVariety, CropCycle, SoilTest, WeatherRecord,
-    CropCalendar, SeasonalPlanning, PlannedCropAllocation, CropRotationPlan
+    CropCalendar, CalendarImportJob, CropYieldStatistics, SeasonalPlanning, PlannedCropAllocation, CropRotationPlan
 )
 
 # Register Farm models
@@ -60,6 +60,19 @@ class CropCalendarAdmin(admin.ModelAdmin):
     date_hierarchy = 'start_date'
     raw_id_fields = ('crop_cycle', 'assigned_to')
 
+@admin.register(CalendarImportJob)
+class CalendarImportJobAdmin(admin.ModelAdmin):
+    list_display = ('original_filename', 'user', 'status', 'total_rows', 'created_count', 'error_count', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('original_filename', 'user__username')
+    readonly_fields = ('task_id', 'created_at', 'started_at', 'finished_at')
+
+@admin.register(CropYieldStatistics)
+class CropYieldStatisticsAdmin(admin.ModelAdmin):
+    list_display = ('crop', 'user', 'harvest_count', 'mean_yield_kg', 'min_yield_kg', 'max_yield_kg', 'updated_at')
+    search_fields = ('crop__name', 'user__username')
+    readonly_fields = ('updated_at',)
+
 @admin.register(SeasonalPlanning)
 class SeasonalPlanningAdmin(admin.ModelAdmin):
     list_display = ('field', 'season', 'season_year', 'status', 'estimated_total_cost')
@@ -5,3 +5,6 @@ class FarmsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.farms'
     verbose_name = 'Farms'
+
+    def ready(self):
+        from . import signals  # noqa: F401 - registers the dashboard summary receivers
@@ -0,0 +1,145 @@
+from datetime import timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db.models import Count, F, Max
+
+from .calendar_recurrence import RECURRENCE_PATTERNS
+from .models import CropCalendar
+
+User = get_user_model()
+
+
+FEED_SALT = 'farms.crop_calendar_feed'
+
+FEED_CONTENT_TYPE = 'text/calendar; charset=utf-8'
+
+# Rows fetched per round trip while streaming the feed
+FEED_CHUNK_SIZE = 500
+
+ICS_PRIORITIES = {
+    'critical': 1,
+    'high': 3,
+    'medium': 5,
+    'low': 9,
+}
+
+
+def make_feed_token(user):
+    """Signed token identifying a user's calendar feed, usable without a session"""
+    return signing.dumps({'user': user.id, 'version': user.calendar_feed_version}, salt=FEED_SALT)
+
+
+def read_feed_token(token):
+    """
+    Return the user id of a feed token, raising signing.BadSignature if it
+    was tampered with or revoked by reset_feed_token
+    """
+    payload = signing.loads(token, salt=FEED_SALT)
+    # Links handed out before feeds were versioned count as version 0
+    if not User.objects.filter(id=payload['user'], calendar_feed_version=payload.get('version', 0)).exists():
+        raise signing.BadSignature("Calendar feed link was reset")
+    return payload['user']
+
+
+def reset_feed_token(user):
+    """Revoke the user's calendar feed links and return the new token"""
+    User.objects.filter(id=user.id).update(calendar_feed_version=F('calendar_feed_version') + 1)
+    user.refresh_from_db(fields=['calendar_feed_version'])
+    return make_feed_token(user)
+
+
+def feed_events(user_id, farm_id=None):
+    events = CropCalendar.objects.filter(farm__owner_id=user_id)
+    if farm_id:
+        events = events.filter(farm_id=farm_id)
+    return events
+
+
+def feed_state(events):
+    """
+    Return (last_modified, count) for a feed's events with one aggregate.
+
+    The count makes deletions change the ETag, since they leave the latest
+    updated_at untouched.
+    """
+    state = events.order_by().aggregate(last_modified=Max('updated_at'), count=Count('id'))
+    return state['last_modified'], state['count']
+
+
+def _escape(value):
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def _fold(line):
+    # RFC 5545 lines are at most 75 octets, continued with CRLF and a space
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+
+    parts = []
+    while encoded:
+        size = 75 if not parts else 74
+        # Don't split a multi-byte character
+        while size < len(encoded) and (encoded[size] & 0xC0) == 0x80:
+            size -= 1
+        parts.append(encoded[:size].decode('utf-8'))
+        encoded = encoded[size:]
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def event_lines(event, domain):
+    """The VEVENT lines of one CropCalendar event, as all-day dates"""
+    end_date = (event.end_date or event.start_date) + timedelta(days=1)  # DTEND is exclusive
+
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:crop-calendar-{event.pk}@{domain}',
+        f'DTSTAMP:{_utc(event.updated_at)}',
+        f'LAST-MODIFIED:{_utc(event.updated_at)}',
+        f'DTSTART;VALUE=DATE:{event.start_date:%Y%m%d}',
+        f'DTEND;VALUE=DATE:{end_date:%Y%m%d}',
+        f'SUMMARY:{_escape(event.title)}',
+        f'LOCATION:{_escape(event.farm.name)}',
+        f'CATEGORIES:{_escape(event.get_event_type_display())}',
+        f'PRIORITY:{ICS_PRIORITIES.get(event.priority, 0)}',
+        f"STATUS:{'CANCELLED' if event.status == 'cancelled' else 'CONFIRMED'}",
+    ]
+    if event.description:
+        lines.append(f'DESCRIPTION:{_escape(event.description)}')
+    if event.is_recurring and event.recurrence_pattern in RECURRENCE_PATTERNS:
+        lines.append(f'RRULE:FREQ={event.recurrence_pattern.upper()};INTERVAL={max(event.recurrence_interval, 1)}')
+    lines.append('END:VEVENT')
+
+    return lines
+
+
+def iter_calendar(events, domain, name='Gitako Crop Calendar'):
+    """
+    Stream an iCalendar document for a CropCalendar queryset.
+
+    Rows are read with .iterator() and written out one VEVENT at a time, so
+    memory does not grow with the number of events.
+    """
+    yield _fold('BEGIN:VCALENDAR')
+    yield _fold('VERSION:2.0')
+    yield _fold('PRODID:-//Gitako//Crop Calendar//EN')
+    yield _fold('CALSCALE:GREGORIAN')
+    yield _fold(f'X-WR-CALNAME:{_escape(name)}')
+
+    queryset = events.select_related('farm').order_by('start_date', 'id')
+    for event in queryset.iterator(chunk_size=FEED_CHUNK_SIZE):
+        yield ''.join(_fold(line) for line in event_lines(event, domain))
+
+    yield _fold('END:VCALENDAR')
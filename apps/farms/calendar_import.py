@@ -0,0 +1,282 @@
+import csv
+import io
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+import openpyxl
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .calendar_read import invalidate_crop_calendar
+from .calendar_recurrence import RECURRENCE_PATTERNS
+from .dashboard_summary import mark_dashboard_stale
+from .models import CropCalendar, Farm
+
+User = get_user_model()
+
+
+# Rows 1-3 of the template hold the headers and two example events
+FIRST_DATA_ROW = 4
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Position of the Assigned To Email column in the template
+ASSIGNED_TO_COLUMN = 12
+
+VALID_EVENT_TYPES = {choice for choice, _ in CropCalendar.EVENT_TYPES}
+VALID_PRIORITIES = {choice for choice, _ in CropCalendar.PRIORITY_CHOICES}
+VALID_STATUSES = {choice for choice, _ in CropCalendar.STATUS_CHOICES}
+
+# Checked by build_event() against the resolved ids instead, without a query per row
+RELATION_FIELDS = ['farm', 'crop_cycle', 'assigned_to', 'created_by']
+
+
+def open_calendar_sheet(source):
+    """Open the first sheet of a calendar workbook in streaming (read_only) mode"""
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    return workbook, workbook.active
+
+
+def count_calendar_rows(source, limit=None):
+    """
+    Count the event rows in a workbook.
+
+    The stored sheet dimensions are used when the workbook records them.
+    Otherwise the rows are streamed and counting stops once it passes limit.
+    """
+    workbook, worksheet = open_calendar_sheet(source)
+    try:
+        if worksheet.max_row is not None:
+            return max(worksheet.max_row - FIRST_DATA_ROW + 1, 0)
+
+        count = 0
+        for _ in worksheet.iter_rows(min_row=FIRST_DATA_ROW, max_col=1, values_only=True):
+            count += 1
+            if limit is not None and count > limit:
+                break
+        return count
+    finally:
+        workbook.close()
+
+
+def _cell(row, index, default=None):
+    return row[index] if len(row) > index and row[index] not in (None, '') else default
+
+
+def _parse_date(value, label):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(str(value).strip(), '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"{label} must be in YYYY-MM-DD format")
+
+
+def _parse_decimal(value, label):
+    if value is None:
+        return None
+    try:
+        value = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f"Invalid {label}: {value}")
+    if not value.is_finite():
+        raise ValueError(f"Invalid {label}: {value}")
+    return value
+
+
+def _parse_bool(value):
+    if isinstance(value, str):
+        return value.strip().upper() == 'TRUE'
+    return bool(value)
+
+
+class CalendarEventImporter:
+    """
+    Import calendar events for a user from the bulk upload template.
+
+    The sheet is streamed once in read_only mode, a chunk of rows at a time.
+    Farm names are resolved from a lookup table loaded with one query and
+    assignee emails from a table that each chunk extends with the emails it
+    has not seen yet. Valid events are written with chunked bulk_create inside
+    a single transaction; invalid rows are skipped and reported by row number.
+    """
+
+    def __init__(self, user, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.user = user
+        self.chunk_size = chunk_size
+        self.farms = {}
+        self.ambiguous_farms = set()
+        self.assignees = {}
+        self.total_rows = 0
+        self.created_count = 0
+        self.errors = []
+
+    def _load_farms(self):
+        for farm in Farm.objects.filter(owner=self.user).only('id', 'name', 'owner_id'):
+            if farm.name in self.farms:
+                self.ambiguous_farms.add(farm.name)
+            self.farms[farm.name] = farm
+
+    def _load_assignees(self, chunk):
+        # Only emails not seen in an earlier chunk are looked up, so the table
+        # fills with about one query for the handful of people a farm assigns to
+        emails = {
+            str(row[ASSIGNED_TO_COLUMN]).strip()
+            for _, row in chunk
+            if len(row) > ASSIGNED_TO_COLUMN and row[ASSIGNED_TO_COLUMN]
+        } - self.assignees.keys()
+        if emails:
+            found = dict(User.objects.filter(email__in=emails).values_list('email', 'id'))
+            self.assignees.update({email: found.get(email) for email in emails})
+
+    def _rows(self, worksheet):
+        """Yield (row_num, row) for every non-empty data row"""
+        for row_num, row in enumerate(worksheet.iter_rows(min_row=FIRST_DATA_ROW, values_only=True), FIRST_DATA_ROW):
+            if row and any(cell not in (None, '') for cell in row):
+                yield row_num, row
+
+    def build_event(self, row):
+        """Build an unsaved CropCalendar from one template row, raising ValueError if it is invalid"""
+        if len(row) < 6:  # Minimum required fields
+            raise ValueError("Missing required fields: Farm Name, Event Type, Title, or Start Date")
+
+        farm_name = _cell(row, 0)
+        event_type = _cell(row, 2)
+        title = _cell(row, 3)
+        start_date = _cell(row, 5)
+
+        # Validate required fields
+        if not all([farm_name, event_type, title, start_date]):
+            raise ValueError("Missing required fields: Farm Name, Event Type, Title, or Start Date")
+
+        farm_name = str(farm_name).strip()
+        if farm_name in self.ambiguous_farms:
+            raise ValueError(f"More than one farm is named '{farm_name}'")
+        farm = self.farms.get(farm_name)
+        if farm is None:
+            raise ValueError(f"Farm '{farm_name}' not found")
+
+        start_date = _parse_date(start_date, "Start date")
+        end_date = _cell(row, 6)
+        if end_date is not None:
+            end_date = _parse_date(end_date, "End date")
+
+        # Validate choices
+        if event_type not in VALID_EVENT_TYPES:
+            raise ValueError(f"Invalid event type: {event_type}")
+
+        priority = _cell(row, 7, 'medium')
+        if priority not in VALID_PRIORITIES:
+            raise ValueError(f"Invalid priority: {priority}")
+
+        status = _cell(row, 8, 'planned')
+        if status not in VALID_STATUSES:
+            raise ValueError(f"Invalid status: {status}")
+
+        # Find assigned user if email provided
+        assigned_to_id = None
+        assigned_to_email = _cell(row, ASSIGNED_TO_COLUMN)
+        if assigned_to_email:
+            assigned_to_email = str(assigned_to_email).strip()
+            assigned_to_id = self.assignees.get(assigned_to_email)
+            if assigned_to_id is None:
+                raise ValueError(f"User with email '{assigned_to_email}' not found")
+
+        try:
+            recurrence_interval = int(_cell(row, 11, 1))
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid recurrence interval: {row[11]}")
+
+        is_recurring = _parse_bool(_cell(row, 9, False))
+        recurrence_pattern = str(_cell(row, 10, '')).strip().lower()
+        if (is_recurring or recurrence_pattern) and recurrence_pattern not in RECURRENCE_PATTERNS:
+            raise ValueError(f"Invalid recurrence pattern: {_cell(row, 10, '')}")
+
+        event = CropCalendar(
+            farm=farm,
+            event_type=event_type,
+            title=str(title),
+            description=str(_cell(row, 4, '')),
+            start_date=start_date,
+            end_date=end_date,
+            priority=priority,
+            status=status,
+            is_recurring=is_recurring,
+            recurrence_pattern=recurrence_pattern,
+            recurrence_interval=recurrence_interval,
+            assigned_to_id=assigned_to_id,
+            weather_dependent=_parse_bool(_cell(row, 13, False)),
+            min_temperature=_parse_decimal(_cell(row, 14), 'minimum temperature'),
+            max_temperature=_parse_decimal(_cell(row, 15), 'maximum temperature'),
+            max_wind_speed=_parse_decimal(_cell(row, 16), 'maximum wind speed'),
+            no_rain_required=_parse_bool(_cell(row, 17, False)),
+            estimated_cost=_parse_decimal(_cell(row, 18), 'estimated cost'),
+            created_by=self.user
+        )
+
+        # Lengths, digits and ranges are checked here, so a bad cell is reported
+        # with its row instead of failing the whole import in the database
+        try:
+            event.clean_fields(exclude=RELATION_FIELDS)
+        except ValidationError as e:
+            raise ValueError('; '.join(
+                f"{CropCalendar._meta.get_field(name).verbose_name}: {' '.join(messages)}"
+                for name, messages in e.message_dict.items()
+            ))
+        return event
+
+    def run(self, source):
+        """
+        Import every row of a workbook (path or file object).
+
+        Returns {'total_rows', 'created_count', 'error_count'}; the per-row
+        errors are kept on self.errors as (row_num, message) pairs.
+        """
+        workbook, worksheet = open_calendar_sheet(source)
+        try:
+            self._load_farms()
+
+            rows = self._rows(worksheet)
+            with transaction.atomic():
+                while True:
+                    chunk = list(islice(rows, self.chunk_size))
+                    if not chunk:
+                        break
+
+                    self._load_assignees(chunk)
+
+                    events = []
+                    for row_num, row in chunk:
+                        self.total_rows += 1
+                        try:
+                            events.append(self.build_event(row))
+                        except ValueError as e:
+                            self.errors.append((row_num, str(e)))
+
+                    CropCalendar.objects.bulk_create(events)
+                    self.created_count += len(events)
+        finally:
+            workbook.close()
+
+        # bulk_create bypasses CropCalendar.save() and its signals, so refresh the user's views here
+        if self.created_count:
+            invalidate_crop_calendar(self.user.id)
+            mark_dashboard_stale(self.user.id, 'calendar')
+
+        return {
+            'total_rows': self.total_rows,
+            'created_count': self.created_count,
+            'error_count': len(self.errors),
+        }
+
+    def error_report(self):
+        """Render the per-row errors as CSV text"""
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(['Row', 'Error'])
+        writer.writerows(self.errors)
+        return output.getvalue()
@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+from .calendar_read import invalidate_crop_calendar
+from .dashboard_summary import mark_dashboard_stale
+from .models import Crop, CropCalendar, CropCycle, FarmSection
+
+
+def _attach_related(cycles):
+    """Load the field, farm and crop of every cycle with at most two queries"""
+    missing_fields = {
+        cycle.field_id for cycle in cycles
+        if not CropCycle.field.is_cached(cycle) or not FarmSection.farm.is_cached(cycle.field)
+    }
+    missing_crops = {cycle.crop_id for cycle in cycles if not CropCycle.crop.is_cached(cycle)}
+
+    fields = FarmSection.objects.select_related('farm').in_bulk(missing_fields) if missing_fields else {}
+    crops = Crop.objects.in_bulk(missing_crops) if missing_crops else {}
+
+    for cycle in cycles:
+        if cycle.field_id in fields:
+            cycle.field = fields[cycle.field_id]
+        if cycle.crop_id in crops:
+            cycle.crop = crops[cycle.crop_id]
+
+
+def plan_crop_cycle_events(cycle):
+    """Build the unsaved calendar events for one crop cycle"""
+    crop = cycle.crop
+    field = cycle.field
+    farm = field.farm
+    events = []
+
+    def event(event_type, title, description, start_date, priority):
+        events.append(CropCalendar(
+            farm=farm,
+            crop_cycle=cycle,
+            created_by_id=farm.owner_id,  # Assuming the farm owner creates these
+            event_type=event_type,
+            title=title,
+            description=description,
+            start_date=start_date,
+            priority=priority
+        ))
+
+    # Planting event
+    event('planting', f'Plant {crop.name}', f'Plant {crop.name} in {field.name}', cycle.planting_date, 'high')
+
+    # Calculate intermediate care events based on growing period
+    if crop.average_growing_period_days:
+        total_days = crop.average_growing_period_days
+
+        # Fertilization (early growth - 2-3 weeks after planting)
+        event(
+            'fertilizing', f'Fertilize {crop.name}', f'Apply fertilizer to {crop.name} in {field.name}',
+            cycle.planting_date + timedelta(days=min(21, total_days // 4)), 'medium'
+        )
+
+        # Weeding (mid growth)
+        if total_days > 30:
+            event(
+                'weeding', f'Weed {crop.name} field', f'Remove weeds from {crop.name} in {field.name}',
+                cycle.planting_date + timedelta(days=total_days // 2), 'medium'
+            )
+
+        # Pest inspection (3/4 through growth)
+        if total_days > 45:
+            event(
+                'pest_control', f'Inspect {crop.name} for pests', f'Check {crop.name} in {field.name} for pest damage',
+                cycle.planting_date + timedelta(days=(total_days * 3) // 4), 'medium'
+            )
+
+    # Harvest event
+    if cycle.expected_harvest_date:
+        event('harvesting', f'Harvest {crop.name}', f'Harvest {crop.name} from {field.name}',
+              cycle.expected_harvest_date, 'high')
+
+    return events
+
+
+def create_crop_cycle_events(cycles, batch_size=500):
+    """Create the automatic calendar events for many saved crop cycles with one bulk_create"""
+    cycles = list(cycles)
+    _attach_related(cycles)
+
+    events = []
+    for cycle in cycles:
+        events.extend(plan_crop_cycle_events(cycle))
+
+    created = CropCalendar.objects.bulk_create(events, batch_size=batch_size)
+
+    # bulk_create bypasses CropCalendar.save() and its signals, so refresh the owners' views here
+    for owner_id in {cycle.field.farm.owner_id for cycle in cycles}:
+        invalidate_crop_calendar(owner_id)
+        mark_dashboard_stale(owner_id, 'cycles', 'calendar')
+
+    return created
+
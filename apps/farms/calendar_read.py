@@ -0,0 +1,108 @@
+import calendar
+import uuid
+from datetime import date, timedelta
+
+from django.core.cache import cache
+
+from .calendar_recurrence import OPEN_STATUSES, expand_events, series_filter, window_filter
+from .models import CropCalendar
+
+
+CALENDAR_CACHE_TIMEOUT = 60 * 60
+
+UPCOMING_DAYS = 30
+
+# Number of upcoming and overdue events listed beside the month grid
+LIST_LIMIT = 10
+
+
+def _calendar_version(user_id):
+    # Bumped on every write, which retires all cached months of the user at once
+    return cache.get_or_set(f'crop_calendar_version:{user_id}', uuid.uuid4().hex, None)
+
+
+def calendar_cache_key(user_id, year, month, today):
+    return f'crop_calendar:{user_id}:{_calendar_version(user_id)}:{year}-{month}:{today.isoformat()}'
+
+
+def invalidate_crop_calendar(user_id):
+    """Drop every cached calendar month of a user after their events changed"""
+    cache.set(f'crop_calendar_version:{user_id}', uuid.uuid4().hex, None)
+
+
+def build_month_calendar(user, year, month, today):
+    """
+    Build everything the calendar page shows for one month.
+
+    One CropCalendar query covers the union of the month and the next
+    UPCOMING_DAYS days, and its rows are split per window in Python. Events
+    are bucketed into every day of the month they cover, Sunday first, with
+    a count per day. Overdue events have no lower bound, so they are counted
+    and the first LIST_LIMIT read by two more queries.
+    """
+    month_start = date(year, month, 1)
+    month_end = date(year, month, calendar.monthrange(year, month)[1])
+    upcoming_end = today + timedelta(days=UPCOMING_DAYS)
+
+    user_events = CropCalendar.objects.filter(farm__owner=user).select_related(
+        'farm', 'crop_cycle__crop', 'crop_cycle__field', 'assigned_to'
+    ).order_by('start_date', 'priority')
+    events = list(user_events.filter(window_filter(month_start, month_end) | window_filter(today, upcoming_end)))
+
+    # Month grid
+    occurrences = expand_events(events, month_start, month_end)
+    buckets = {}
+    for occurrence in occurrences:
+        day = max(occurrence.start_date, month_start)
+        last_day = min(occurrence.end_date or occurrence.start_date, month_end)
+        while day <= last_day:
+            buckets.setdefault(day, []).append(occurrence)
+            day += timedelta(days=1)
+
+    weeks = []
+    for week in calendar.Calendar(calendar.SUNDAY).monthdatescalendar(year, month):
+        weeks.append([
+            {
+                'date': day,
+                'day': day.day,
+                'events': buckets.get(day, []),
+                'count': len(buckets.get(day, [])),
+                'is_today': day == today,
+            } if day.month == month else None
+            for day in week
+        ])
+
+    month_events = list({occurrence.event.pk: occurrence.event for occurrence in occurrences}.values())
+    completed = sum(1 for occurrence in occurrences if occurrence.status == 'completed')
+
+    # Sidebar lists
+    upcoming_events = [
+        occurrence for occurrence in expand_events(events, today, upcoming_end)
+        if occurrence.start_date >= today
+    ]
+    # A recurring series' next occurrence shows as upcoming instead
+    overdue = user_events.filter(start_date__lt=today, status__in=OPEN_STATUSES).exclude(series_filter())
+
+    return {
+        'calendar_weeks': weeks,
+        'calendar_events': occurrences,
+        'month_events': month_events,
+        'month_event_count': len(occurrences),
+        'completion_rate': round(completed * 100 / len(occurrences)) if occurrences else 0,
+        'upcoming_events': upcoming_events[:LIST_LIMIT],
+        'upcoming_count': len(upcoming_events),
+        'overdue_events': list(overdue[:LIST_LIMIT]),
+        'overdue_count': overdue.count(),
+    }
+
+
+def get_month_calendar(user, year, month, today):
+    """Return the month's calendar read model, cached until the user's events change"""
+    key = calendar_cache_key(user.id, year, month, today)
+
+    month_calendar = cache.get(key)
+    if month_calendar is None:
+        month_calendar = build_month_calendar(user, year, month, today)
+        cache.set(key, month_calendar, CALENDAR_CACHE_TIMEOUT)
+
+    return month_calendar
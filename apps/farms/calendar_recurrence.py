@@ -0,0 +1,130 @@
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.db.models import Q
+from django.utils import timezone
+
+
+# Days between occurrences for fixed-length patterns, per unit of recurrence_interval
+FIXED_STEPS = {
+    'daily': 1,
+    'weekly': 7,
+}
+
+RECURRENCE_PATTERNS = ['daily', 'weekly', 'monthly']
+
+# Statuses of events still to be done; only series in one of them keep repeating
+OPEN_STATUSES = ['planned', 'in_progress']
+
+
+class Occurrence:
+    """
+    One dated instance of a CropCalendar event.
+
+    Attributes other than start_date and end_date are read from the event, so
+    templates can render an occurrence wherever they render an event.
+    """
+
+    def __init__(self, event, start_date, end_date=None):
+        self.event = event
+        self.start_date = start_date
+        self.end_date = end_date
+
+    def __getattr__(self, name):
+        # Guard against lookups before __init__ ran, e.g. while unpickling
+        if name == 'event':
+            raise AttributeError(name)
+        return getattr(self.event, name)
+
+    def __repr__(self):
+        return f"<Occurrence {self.event.pk} on {self.start_date}>"
+
+    @property
+    def is_overdue(self):
+        return self.status not in ['completed', 'cancelled'] and self.start_date < timezone.now().date()
+
+
+def recurs(event):
+    """
+    Whether an event repeats: an open series with a pattern the engine
+    understands. A completed or cancelled series is a single event again.
+    """
+    return (
+        event.is_recurring and event.recurrence_pattern in RECURRENCE_PATTERNS
+        and event.status in OPEN_STATUSES
+    )
+
+
+def series_filter():
+    """Q matching the events recurs() is true for"""
+    return Q(is_recurring=True, recurrence_pattern__in=RECURRENCE_PATTERNS, status__in=OPEN_STATUSES)
+
+
+def occurrence_dates(event, window_start, window_end):
+    """
+    Yield the start dates of an event's occurrences that overlap
+    [window_start, window_end].
+
+    Occurrences keep the event's duration. Earlier occurrences are skipped
+    arithmetically rather than walked, so the cost depends on the size of the
+    window and not on how long ago the series started.
+    """
+    duration = timedelta(days=(event.end_date - event.start_date).days) if event.end_date else timedelta(0)
+    # An occurrence starting this early still reaches into the window
+    earliest = window_start - duration
+
+    if not recurs(event):
+        if event.start_date <= window_end and event.start_date >= earliest:
+            yield event.start_date
+        return
+
+    interval = max(event.recurrence_interval, 1)
+
+    if event.recurrence_pattern in FIXED_STEPS:
+        step = FIXED_STEPS[event.recurrence_pattern] * interval
+        skip = max(0, -(-(earliest - event.start_date).days // step))
+        current = event.start_date + timedelta(days=skip * step)
+        while current <= window_end:
+            yield current
+            current += timedelta(days=step)
+        return
+
+    # Monthly: step from the series start so a 31st falls back to month end and recovers
+    months = (earliest.year - event.start_date.year) * 12 + earliest.month - event.start_date.month
+    n = max(0, months // interval - 1)
+    while True:
+        current = event.start_date + relativedelta(months=n * interval)
+        if current > window_end:
+            return
+        if current >= earliest:
+            yield current
+        n += 1
+
+
+def expand_events(events, window_start, window_end):
+    """
+    Expand events into the occurrences that overlap a date window, ordered
+    by date and then by the events' own order
+    """
+    occurrences = []
+    for event in events:
+        duration = timedelta(days=(event.end_date - event.start_date).days) if event.end_date else None
+        for start_date in occurrence_dates(event, window_start, window_end):
+            occurrences.append(Occurrence(event, start_date, start_date + duration if duration is not None else None))
+
+    # sort is stable, so events on the same day keep the queryset ordering
+    occurrences.sort(key=lambda occurrence: occurrence.start_date)
+    return occurrences
+
+
+def window_filter(window_start, window_end):
+    """
+    Q matching every event that can have an occurrence in a date window.
+
+    Single events must overlap the window; an open end_date means a one-day
+    event. Open recurring series only need to have started by the window's end.
+    """
+    single = Q(start_date__lte=window_end) & (
+        Q(end_date__gte=window_start) | Q(end_date__isnull=True, start_date__gte=window_start)
+    )
+    return (series_filter() & Q(start_date__lte=window_end)) | single
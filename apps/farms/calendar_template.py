@@ -0,0 +1,179 @@
+import io
+from itertools import zip_longest
+
+import openpyxl
+from django.core.cache import cache
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
+from openpyxl.utils import get_column_letter
+
+from .calendar_recurrence import RECURRENCE_PATTERNS
+from .models import CropCalendar, Farm
+
+
+TEMPLATE_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+TEMPLATE_CACHE_TIMEOUT = 60 * 60 * 24
+
+HEADERS = [
+    'Farm Name', 'Field Name', 'Event Type', 'Title', 'Description',
+    'Start Date', 'End Date', 'Priority', 'Status', 'Is Recurring',
+    'Recurrence Pattern', 'Recurrence Interval', 'Assigned To Email',
+    'Weather Dependent', 'Min Temperature', 'Max Temperature',
+    'Max Wind Speed', 'No Rain Required', 'Estimated Cost'
+]
+
+EXAMPLE_ROWS = [
+    [
+        'Main Farm', 'North Field', 'planting', 'Plant Maize',
+        'Plant maize seeds in north field', '2024-03-15', '2024-03-17',
+        'high', 'planned', 'FALSE', '', '1', 'farmer@example.com',
+        'TRUE', '15', '35', '20', 'TRUE', '500.00'
+    ],
+    [
+        'Main Farm', 'South Field', 'fertilizing', 'Apply NPK Fertilizer',
+        'Apply NPK fertilizer to boost crop growth', '2024-04-01', '',
+        'medium', 'planned', 'FALSE', '', '1', '',
+        'FALSE', '', '', '', 'FALSE', '200.00'
+    ]
+]
+
+INSTRUCTIONS = [
+    "CROP CALENDAR BULK UPLOAD INSTRUCTIONS",
+    "",
+    "1. REQUIRED FIELDS (must be filled):",
+    "   - Farm Name: Must match exactly with your existing farm names",
+    "   - Field Name: Must match exactly with your existing field names",
+    "   - Event Type: Choose from the dropdown list",
+    "   - Title: Brief description of the event",
+    "   - Start Date: Format as YYYY-MM-DD (e.g., 2024-03-15)",
+    "",
+    "2. OPTIONAL FIELDS:",
+    "   - Description: Detailed event description",
+    "   - End Date: For multi-day events (format YYYY-MM-DD)",
+    "   - Priority: low, medium, high, critical (default: medium)",
+    "   - Status: planned, in_progress, completed, cancelled (default: planned)",
+    "   - Is Recurring: TRUE/FALSE (default: FALSE)",
+    "   - Recurrence Pattern: daily, weekly, monthly (if recurring)",
+    "   - Recurrence Interval: Number (e.g., 1 for every week, 2 for every 2 weeks)",
+    "   - Assigned To Email: Email of person assigned to the task",
+    "   - Weather Dependent: TRUE/FALSE",
+    "   - Min/Max Temperature: Minimum and maximum temperature in Celsius",
+    "   - Max Wind Speed: Maximum wind speed in km/h",
+    "   - No Rain Required: TRUE/FALSE",
+    "   - Estimated Cost: Cost in currency units",
+    "",
+    "3. IMPORTANT NOTES:",
+    "   - Delete the example rows before uploading",
+    "   - Farm and Field names must exist in your account",
+    "   - Dates must be in YYYY-MM-DD format",
+    "   - Boolean fields use TRUE/FALSE",
+    "   - Email addresses must be valid registered users",
+    "   - Save the file as Excel (.xlsx) format",
+    "",
+    "4. UPLOAD PROCESS:",
+    "   - Go to Crop Calendar page",
+    "   - Click 'Bulk Upload' button",
+    "   - Select your completed Excel file",
+    "   - Review the upload summary",
+    "   - Confirm to create events",
+    "",
+    "5. VALIDATION:",
+    "   - Invalid data will be highlighted in red",
+    "   - You can fix errors and re-upload",
+    "   - Only valid rows will be processed"
+]
+
+
+def template_cache_key(user_id):
+    return f'calendar_template:{user_id}'
+
+
+def _styled(worksheet, value, **styles):
+    cell = WriteOnlyCell(worksheet, value=value)
+    for name, style in styles.items():
+        setattr(cell, name, style)
+    return cell
+
+
+def build_calendar_template(user):
+    """
+    Build the bulk upload workbook for a user and return it as bytes.
+
+    The workbook is written in write-only mode, row by row, and the user's
+    farms and fields are loaded with a single prefetch.
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+
+    # Style definitions
+    border_side = Side(style='thin')
+    border = Border(left=border_side, right=border_side, top=border_side, bottom=border_side)
+    header_styles = {
+        'font': Font(bold=True, color="FFFFFF"),
+        'fill': PatternFill(start_color="2E7D32", end_color="2E7D32", fill_type="solid"),
+        'border': border,
+        'alignment': Alignment(horizontal="center", vertical="center"),
+    }
+
+    # Column widths must be set before the first row in write-only mode
+    worksheet = workbook.create_sheet("Calendar Events Template")
+    for col in range(1, len(HEADERS) + 1):
+        worksheet.column_dimensions[get_column_letter(col)].width = 15
+
+    worksheet.append([_styled(worksheet, header, **header_styles) for header in HEADERS])
+    for row_data in EXAMPLE_ROWS:
+        worksheet.append([_styled(worksheet, value, border=border) for value in row_data])
+
+    # Reference data, one column per category
+    farms = Farm.objects.filter(owner=user).prefetch_related('sections')
+    farm_names = []
+    field_names = []
+    for farm in farms:
+        farm_names.append(farm.name)
+        field_names.extend(f"{farm.name} - {field.name}" for field in farm.sections.all())
+
+    validation_data = {
+        'Farm Names': farm_names,
+        'Field Names': field_names,
+        'Event Types': [choice for choice, _ in CropCalendar.EVENT_TYPES],
+        'Priorities': [choice for choice, _ in CropCalendar.PRIORITY_CHOICES],
+        'Statuses': [choice for choice, _ in CropCalendar.STATUS_CHOICES],
+        'Recurrence Patterns': RECURRENCE_PATTERNS,
+    }
+
+    validation_sheet = workbook.create_sheet("Reference Data")
+    bold = Font(bold=True)
+    validation_sheet.append([_styled(validation_sheet, category, font=bold) for category in validation_data])
+    for row in zip_longest(*validation_data.values()):
+        validation_sheet.append(row)
+
+    # Instructions
+    instructions_sheet = workbook.create_sheet("Instructions")
+    instructions_sheet.column_dimensions['A'].width = 80
+    for row, instruction in enumerate(INSTRUCTIONS, 1):
+        if row == 1:  # Title
+            instruction = _styled(instructions_sheet, instruction, font=Font(bold=True, size=14))
+        elif instruction.startswith(('1.', '2.', '3.', '4.', '5.')):  # Section headers
+            instruction = _styled(instructions_sheet, instruction, font=Font(bold=True, size=12))
+        instructions_sheet.append([instruction])
+
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+def get_calendar_template(user):
+    """Return the user's template workbook, cached until one of their farms or fields changes"""
+    key = template_cache_key(user.id)
+
+    content = cache.get(key)
+    if content is None:
+        content = build_calendar_template(user)
+        cache.set(key, content, TEMPLATE_CACHE_TIMEOUT)
+
+    return content
+
+
+def invalidate_calendar_template(user_id):
+    """Drop a user's cached template after their farms or fields changed"""
+    cache.delete(template_cache_key(user_id))
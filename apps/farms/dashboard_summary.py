@@ -0,0 +1,247 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.db.models import Count, Sum
+
+from apps.activities.models import Activity
+from apps.financials.models import Budget
+from .calendar_recurrence import OPEN_STATUSES, series_filter
+from .models import CropCalendar, CropCycle, CropDashboardSummary
+
+
+# Number of items kept in each list shown on the dashboard
+LIST_LIMIT = 5
+
+OPEN_CYCLE_STATUSES = ['planned', 'active']
+
+
+def _cycle_section(user, today):
+    cycles = CropCycle.objects.filter(field__farm__owner=user, status__in=OPEN_CYCLE_STATUSES)
+
+    totals = cycles.aggregate(expected_yield=Sum('expected_yield_kg'), total_area=Sum('field__size'))
+
+    crop_distribution = [
+        {'crop__name': row['crop__name'], 'total_area': row['total_area']}
+        for row in cycles.values('crop__name').annotate(total_area=Sum('field__size')).order_by('-total_area')[:4]
+    ]
+
+    # Overall growth stage from the planting dates of active cycles
+    planting_dates = list(CropCycle.objects.filter(
+        field__farm__owner=user, status='active', planting_date__lte=today
+    ).values_list('planting_date', flat=True))
+
+    growth_stage = 'No active crops'
+    if planting_dates:
+        early_stage = sum(1 for planted in planting_dates if planted >= today - timedelta(days=30))
+        mid_stage = sum(1 for planted in planting_dates if today - timedelta(days=60) <= planted < today - timedelta(days=30))
+        late_stage = sum(1 for planted in planting_dates if planted < today - timedelta(days=60))
+
+        if early_stage > mid_stage and early_stage > late_stage:
+            growth_stage = 'Early'
+        elif mid_stage > early_stage and mid_stage > late_stage:
+            growth_stage = 'Mid'
+        else:
+            growth_stage = 'Late'
+
+    upcoming_harvests = [
+        {
+            'id': cycle.id,
+            'crop': {'name': cycle.crop.name},
+            'field': {'name': cycle.field.name},
+            'expected_harvest_date': cycle.expected_harvest_date,
+            'expected_yield_kg': cycle.expected_yield_kg,
+            'status': cycle.status,
+        }
+        for cycle in CropCycle.objects.filter(
+            field__farm__owner=user,
+            status='active',
+            expected_harvest_date__gte=today,
+            expected_harvest_date__lte=today + timedelta(days=30)
+        ).select_related('crop', 'field')
+    ]
+
+    return {
+        'total_crops': cycles.values('crop').distinct().count(),
+        'crop_distribution': crop_distribution,
+        'expected_yield': totals['expected_yield'] or 0,
+        'total_area': totals['total_area'] or 0,
+        'growth_stage': growth_stage,
+        'upcoming_harvests': upcoming_harvests,
+    }
+
+
+def _budget_section(user, today):
+    budgets = Budget.objects.filter(user=user)
+    totals = budgets.aggregate(
+        count=Count('id'),
+        total_planned_income=Sum('total_planned_income'),
+        total_planned_expenses=Sum('total_planned_expenses')
+    )
+
+    recent_budgets = [
+        {
+            'id': budget.id,
+            'title': budget.title,
+            'farm': {'name': budget.farm.name} if budget.farm else None,
+            'start_date': budget.start_date,
+            'end_date': budget.end_date,
+            'total_planned_income': budget.total_planned_income,
+            'total_planned_expenses': budget.total_planned_expenses,
+        }
+        for budget in budgets.select_related('farm').order_by('-created_at')[:LIST_LIMIT]
+    ]
+
+    return {
+        'active_budgets_count': totals['count'] or 0,
+        'total_planned_income': totals['total_planned_income'] or 0,
+        'total_planned_expenses': totals['total_planned_expenses'] or 0,
+        'recent_budgets': recent_budgets,
+    }
+
+
+def _activity_section(user, today):
+    return {
+        'recent_activities': [
+            {
+                'id': activity.id,
+                'title': activity.title,
+                'field': str(activity.field),
+                'planned_date': activity.planned_date,
+                'actual_date': activity.actual_date,
+                'status': activity.status,
+                'get_status_display': activity.get_status_display(),
+            }
+            for activity in Activity.objects.filter(created_by=user).select_related(
+                'field__farm'
+            ).order_by('-created_at')[:LIST_LIMIT]
+        ],
+    }
+
+
+def _event_snapshot(event):
+    return {
+        'id': event.id,
+        'title': event.title,
+        'farm': {'name': event.farm.name},
+        'event_type': event.event_type,
+        'priority': event.priority,
+        'get_priority_display': event.get_priority_display(),
+        'start_date': event.start_date,
+    }
+
+
+def _calendar_section(user, today):
+    events = CropCalendar.objects.filter(
+        farm__owner=user, status__in=OPEN_STATUSES
+    ).select_related('farm')
+
+    return {
+        'upcoming_calendar_events': [
+            _event_snapshot(event)
+            for event in events.filter(
+                start_date__gte=today, start_date__lte=today + timedelta(days=7)
+            ).order_by('start_date', 'priority')[:LIST_LIMIT]
+        ],
+        # As on the calendar page, an open recurring series is never overdue
+        'overdue_calendar_events': [
+            _event_snapshot(event)
+            for event in events.filter(start_date__lt=today).exclude(series_filter()).order_by('start_date')[:LIST_LIMIT]
+        ],
+    }
+
+
+# Each section is rebuilt on its own when one of its sources changes
+SECTIONS = {
+    'cycles': _cycle_section,
+    'budgets': _budget_section,
+    'activities': _activity_section,
+    'calendar': _calendar_section,
+}
+
+# Sections whose figures depend on today's date and are rebuilt daily
+DATED_SECTIONS = ('cycles', 'calendar')
+
+# List item amounts, which the JSON encoder stores as strings
+DECIMAL_KEYS = {'total_area', 'expected_yield_kg', 'total_planned_income', 'total_planned_expenses'}
+
+
+def mark_dashboard_stale(user_id, *sections):
+    """Flag sections of a user's summary for rebuilding on the next dashboard load"""
+    CropDashboardSummary.objects.filter(user_id=user_id).update(
+        **{f'{section}_stale': True for section in sections or SECTIONS}
+    )
+
+
+def mark_all_dashboards_stale(*sections):
+    """Flag sections of every user's summary, for changes to shared data such as the Crop catalogue"""
+    CropDashboardSummary.objects.update(**{f'{section}_stale': True for section in sections or SECTIONS})
+
+
+def get_dashboard_summary(user, today):
+    """
+    Return the user's CropDashboardSummary, rebuilding only the stale sections.
+
+    Flags are cleared before the sections are recomputed, so a write that
+    lands during the rebuild marks its section stale again instead of being
+    lost.
+    """
+    summary, created = CropDashboardSummary.objects.get_or_create(user=user)
+
+    stale = [
+        section for section in SECTIONS
+        if created
+        or getattr(summary, f'{section}_stale')
+        or (section in DATED_SECTIONS and summary.computed_on != today)
+    ]
+    if not stale:
+        return summary
+
+    CropDashboardSummary.objects.filter(pk=summary.pk).update(**{f'{section}_stale': False for section in stale})
+
+    update_fields = []
+    for section in stale:
+        for name, value in SECTIONS[section](user, today).items():
+            setattr(summary, name, value)
+            update_fields.append(name)
+        setattr(summary, f'{section}_stale', False)
+
+    summary.computed_on = today
+    summary.save(update_fields=update_fields + ['computed_on', 'updated_at'])
+    return summary
+
+
+def _revive(item):
+    """
+    Turn a stored list item back into an object shaped like the model it was
+    taken from, restoring dates and amounts that were stored as JSON strings
+    """
+    values = {}
+    for name, value in item.items():
+        if isinstance(value, dict):
+            value = _revive(value)
+        elif isinstance(value, str) and name.endswith('_date'):
+            value = date.fromisoformat(value)
+        elif isinstance(value, str) and name in DECIMAL_KEYS:
+            value = Decimal(value)
+        values[name] = value
+    return SimpleNamespace(**values)
+
+
+def dashboard_context(summary):
+    """Template context for the crop dashboard from a summary row"""
+    return {
+        'total_crops': summary.total_crops,
+        'crop_distribution': [vars(_revive(item)) for item in summary.crop_distribution],
+        'expected_yield': summary.expected_yield,
+        'total_area': summary.total_area,
+        'growth_stage': summary.growth_stage,
+        'upcoming_harvests': [_revive(item) for item in summary.upcoming_harvests],
+        'active_budgets_count': summary.active_budgets_count,
+        'total_planned_income': summary.total_planned_income,
+        'total_planned_expenses': summary.total_planned_expenses,
+        'recent_budgets': [_revive(item) for item in summary.recent_budgets],
+        'recent_activities': [_revive(item) for item in summary.recent_activities],
+        'upcoming_calendar_events': [_revive(item) for item in summary.upcoming_calendar_events],
+        'overdue_calendar_events': [_revive(item) for item in summary.overdue_calendar_events],
+    }
@@ -0,0 +1,144 @@
+import calendar
+from datetime import date
+
+from django.db.models import Avg, Case, CharField, Count, Max, Min, Sum, Value, When
+from django.db.models.functions import ExtractMonth, TruncMonth, TruncYear
+
+from .models import CropCycle
+
+
+# Meteorological seasons by month
+SEASONS = {
+    'Winter': [12, 1, 2],
+    'Spring': [3, 4, 5],
+    'Summer': [6, 7, 8],
+    'Fall': [9, 10, 11],
+}
+
+PERIODS = ['month', 'month_of_year', 'season', 'year']
+
+DATE_FIELDS = ['actual_harvest_date', 'planting_date']
+
+
+def _period_expression(period, date_field):
+    if period == 'month':
+        return TruncMonth(date_field)
+    elif period == 'year':
+        return TruncYear(date_field)
+    elif period == 'month_of_year':
+        return ExtractMonth(date_field)
+    elif period == 'season':
+        return Case(
+            *[When(**{f'{date_field}__month__in': months}, then=Value(season)) for season, months in SEASONS.items()],
+            output_field=CharField()
+        )
+    raise ValueError(f"Unknown rollup period '{period}', expected one of {', '.join(PERIODS)}")
+
+
+def _label(period, value):
+    if period == 'month':
+        return value.strftime('%Y-%m')
+    elif period == 'year':
+        return str(value.year)
+    elif period == 'month_of_year':
+        return calendar.month_abbr[value]
+    return value
+
+
+def parse_rollup_query(params):
+    """
+    Read the rollup options of a query string: period, date_field, start,
+    end and by_crop. Raises ValueError for a value that can't be used.
+    """
+    period = params.get('period', 'month')
+    date_field = params.get('date_field', 'actual_harvest_date')
+    if period not in PERIODS or date_field not in DATE_FIELDS:
+        raise ValueError('Invalid period or date field')
+
+    try:
+        start_date = date.fromisoformat(params['start']) if params.get('start') else None
+        end_date = date.fromisoformat(params['end']) if params.get('end') else None
+    except ValueError:
+        raise ValueError('Dates must be YYYY-MM-DD')
+
+    return {
+        'period': period,
+        'date_field': date_field,
+        'start_date': start_date,
+        'end_date': end_date,
+        'by_crop': params.get('by_crop', '1') != '0',
+    }
+
+
+def harvested_cycles(user, crop=None, farm=None, start_date=None, end_date=None):
+    """A user's harvested cycles with a recorded yield, optionally narrowed down"""
+    cycles = CropCycle.objects.filter(
+        field__farm__owner=user,
+        status='harvested',
+        actual_yield_kg__isnull=False
+    )
+    if crop is not None:
+        cycles = cycles.filter(crop=crop)
+    if farm is not None:
+        cycles = cycles.filter(field__farm=farm)
+    if start_date:
+        cycles = cycles.filter(actual_harvest_date__gte=start_date)
+    if end_date:
+        cycles = cycles.filter(actual_harvest_date__lte=end_date)
+    return cycles
+
+
+def harvest_rollup(cycles, period='month', by_crop=True, date_field='actual_harvest_date'):
+    """
+    Aggregate harvested cycles into time buckets with one GROUP BY query.
+
+    period is one of PERIODS and date_field the date the buckets are taken
+    from. Returns a list of JSON-ready rows ordered by bucket, each with its
+    period, a display label, the crop when by_crop is set, and the harvest
+    count, total, mean, min and max yield and total area.
+    """
+    if date_field not in DATE_FIELDS:
+        raise ValueError(f"Unknown rollup date field '{date_field}'")
+
+    group_by = ['period', 'crop_id', 'crop__name'] if by_crop else ['period']
+    rows = cycles.filter(**{f'{date_field}__isnull': False}).annotate(
+        period=_period_expression(period, date_field)
+    ).values(*group_by).annotate(
+        harvest_count=Count('id'),
+        total_yield_kg=Sum('actual_yield_kg'),
+        avg_yield_kg=Avg('actual_yield_kg'),
+        min_yield_kg=Min('actual_yield_kg'),
+        max_yield_kg=Max('actual_yield_kg'),
+        total_area=Sum('field__size'),
+    ).order_by(*group_by)
+
+    rollup = []
+    for row in rows:
+        item = {
+            'period': row['period'].isoformat() if hasattr(row['period'], 'isoformat') else row['period'],
+            'label': _label(period, row['period']),
+        }
+        if by_crop:
+            item['crop_id'] = row['crop_id']
+            item['crop'] = row['crop__name']
+        item.update({
+            'harvest_count': row['harvest_count'],
+            'total_yield_kg': float(row['total_yield_kg']),
+            'avg_yield_kg': round(float(row['avg_yield_kg']), 2),
+            'min_yield_kg': float(row['min_yield_kg']),
+            'max_yield_kg': float(row['max_yield_kg']),
+            'total_area': float(row['total_area'] or 0),
+        })
+        rollup.append(item)
+
+    if period == 'season':
+        rollup.sort(key=lambda item: list(SEASONS).index(item['period']))
+    return rollup
+
+
+def rollup_series(rollup, value='avg_yield_kg'):
+    """Pivot a per-crop rollup into {crop: {label: value}} for charts"""
+    series = {}
+    for row in rollup:
+        series.setdefault(row['crop'], {})[row['label']] = row[value]
+    return series
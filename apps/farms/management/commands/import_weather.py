@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.farms.weather_ingest import DEFAULT_CHUNK_SIZE, get_weather_provider, ingest_weather
+
+
+class Command(BaseCommand):
+    help = 'Bulk import weather observations into WeatherRecord, upserting on (farm, date)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', nargs='?', help='Path to a CSV or JSON Lines file, or a provider source')
+        parser.add_argument('--format', dest='file_format', choices=['csv', 'json', 'jsonl', 'ndjson'],
+                            help='File format, defaults to the file extension')
+        parser.add_argument('--provider', help='Dotted path to a WeatherProvider class')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--data-source', default='api', help='data_source for rows that do not set one')
+        parser.add_argument('--background', action='store_true', help='Queue the import as a Celery task')
+
+    def handle(self, *args, **options):
+        if not options['source'] and not options['provider']:
+            raise CommandError('Provide a source file or --provider')
+
+        if options['background']:
+            from tasks.weather import ingest_weather_file
+
+            result = ingest_weather_file.delay(
+                options['source'],
+                file_format=options['file_format'],
+                provider=options['provider'],
+                chunk_size=options['chunk_size'],
+                data_source=options['data_source']
+            )
+            self.stdout.write(self.style.SUCCESS(f"Queued weather import as task {result.id}"))
+            return
+
+        try:
+            provider = get_weather_provider(options['source'], options['file_format'], options['provider'])
+        except (ValueError, ImportError) as e:
+            raise CommandError(str(e))
+
+        stats = ingest_weather(provider, chunk_size=options['chunk_size'], data_source=options['data_source'])
+
+        for error in stats['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['error']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['rows_written']} weather records for {stats['farms']} farms "
+            f"({stats['rows_read']} read, {stats['rows_skipped']} skipped) in {stats['elapsed_seconds']}s "
+            f"- {stats['rows_per_second']} rows/sec"
+        ))
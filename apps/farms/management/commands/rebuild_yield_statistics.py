@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.farms.yield_statistics import rebuild_yield_statistics
+
+
+class Command(BaseCommand):
+    help = 'Recompute CropYieldStatistics from harvested crop cycles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, dest='user_id', help='Only rebuild the statistics of this user id')
+
+    def handle(self, *args, **options):
+        count = rebuild_yield_statistics(options['user_id'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} crop yield statistics rows"))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-18 12:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_latest_soil_tests(apps, schema_editor):
+    SoilTest = apps.get_model('farms', 'SoilTest')
+    LatestSoilTest = apps.get_model('farms', 'LatestSoilTest')
+    
+    latest_by_field = {}
+    for soil_test in SoilTest.objects.order_by('field_id', '-test_date', '-id').only('id', 'field_id', 'test_date'):
+        latest_by_field.setdefault(soil_test.field_id, soil_test)
+    
+    LatestSoilTest.objects.bulk_create([
+        LatestSoilTest(field_id=field_id, soil_test=soil_test, test_date=soil_test.test_date)
+        for field_id, soil_test in latest_by_field.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farms', '0002_cropcalendar_croprotationplan_plannedcropallocation_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LatestSoilTest',
+            fields=[
+                ('field', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='latest_soil_test', serialize=False, to='farms.farmsection')),
+                ('test_date', models.DateField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('soil_test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farms.soiltest')),
+            ],
+        ),
+        migrations.RunPython(populate_latest_soil_tests, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 12:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farms', '0004_calendarimportjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cropcalendar',
+            index=models.Index(fields=['farm', 'start_date', 'status'], name='farms_cropc_farm_id_5a21a0_idx'),
+        ),
+    ]
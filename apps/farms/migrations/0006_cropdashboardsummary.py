@@ -0,0 +1,45 @@
+# Generated by Django 5.2 on 2026-10-18 12:50
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('farms', '0005_cropcalendar_farms_cropc_farm_id_5a21a0_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CropDashboardSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='crop_dashboard_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('computed_on', models.DateField(blank=True, null=True)),
+                ('total_crops', models.PositiveIntegerField(default=0)),
+                ('crop_distribution', models.JSONField(blank=True, default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('expected_yield', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_area', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('growth_stage', models.CharField(default='No active crops', max_length=20)),
+                ('upcoming_harvests', models.JSONField(blank=True, default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('active_budgets_count', models.PositiveIntegerField(default=0)),
+                ('total_planned_income', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_planned_expenses', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('recent_budgets', models.JSONField(blank=True, default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('recent_activities', models.JSONField(blank=True, default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('upcoming_calendar_events', models.JSONField(blank=True, default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('overdue_calendar_events', models.JSONField(blank=True, default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('cycles_stale', models.BooleanField(default=True)),
+                ('budgets_stale', models.BooleanField(default=True)),
+                ('activities_stale', models.BooleanField(default=True)),
+                ('calendar_stale', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Crop dashboard summaries',
+            },
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2 on 2026-10-18 12:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Avg, Count, F, Max, Min, Q, Sum
+
+
+def populate_crop_yield_statistics(apps, schema_editor):
+    CropCycle = apps.get_model('farms', 'CropCycle')
+    CropYieldStatistics = apps.get_model('farms', 'CropYieldStatistics')
+    
+    rows = CropCycle.objects.filter(status='harvested', actual_yield_kg__isnull=False).values(
+        'field__farm__owner_id', 'crop_id'
+    ).annotate(
+        harvest_count=Count('id'),
+        mean_yield_kg=Avg('actual_yield_kg'),
+        sum_of_squares=Sum(F('actual_yield_kg') * F('actual_yield_kg')),
+        min_yield_kg=Min('actual_yield_kg'),
+        max_yield_kg=Max('actual_yield_kg'),
+        total_yield_kg=Sum('actual_yield_kg'),
+        area_yield_kg=Sum('actual_yield_kg', filter=Q(field__size__gt=0)),
+        total_area=Sum('field__size', filter=Q(field__size__gt=0)),
+    ).order_by()
+    
+    CropYieldStatistics.objects.bulk_create([
+        CropYieldStatistics(
+            user_id=row['field__farm__owner_id'],
+            crop_id=row['crop_id'],
+            harvest_count=row['harvest_count'],
+            mean_yield_kg=float(row['mean_yield_kg']),
+            sum_squared_deviations=max(
+                float(row['sum_of_squares']) - row['harvest_count'] * float(row['mean_yield_kg']) ** 2, 0
+            ),
+            min_yield_kg=float(row['min_yield_kg']),
+            max_yield_kg=float(row['max_yield_kg']),
+            total_yield_kg=float(row['total_yield_kg']),
+            area_yield_kg=float(row['area_yield_kg'] or 0),
+            total_area=float(row['total_area'] or 0),
+        )
+        for row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farms', '0006_cropdashboardsummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CropYieldStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('harvest_count', models.PositiveIntegerField(default=0)),
+                ('mean_yield_kg', models.FloatField(default=0)),
+                ('sum_squared_deviations', models.FloatField(default=0)),
+                ('min_yield_kg', models.FloatField(blank=True, null=True)),
+                ('max_yield_kg', models.FloatField(blank=True, null=True)),
+                ('total_yield_kg', models.FloatField(default=0)),
+                ('area_yield_kg', models.FloatField(default=0)),
+                ('total_area', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('crop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='yield_statistics', to='farms.crop')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='crop_yield_statistics', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Crop yield statistics',
+                'unique_together': {('user', 'crop')},
+            },
+        ),
+        migrations.RunPython(populate_crop_yield_statistics, migrations.RunPython.noop),
+    ]
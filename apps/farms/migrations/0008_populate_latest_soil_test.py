@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-18 13:24
+
+from django.db import migrations
+
+
+def populate_latest_soil_test(apps, schema_editor):
+    SoilTest = apps.get_model('farms', 'SoilTest')
+    LatestSoilTest = apps.get_model('farms', 'LatestSoilTest')
+    
+    # Same as LatestSoilTest.rebuild(), for soil tests recorded before the index existed
+    latest_by_field = {}
+    for soil_test in SoilTest.objects.order_by('field_id', '-test_date', '-id').only('id', 'field_id', 'test_date'):
+        latest_by_field.setdefault(soil_test.field_id, soil_test)
+    
+    LatestSoilTest.objects.all().delete()
+    LatestSoilTest.objects.bulk_create([
+        LatestSoilTest(field_id=field_id, soil_test=soil_test, test_date=soil_test.test_date)
+        for field_id, soil_test in latest_by_field.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farms', '0007_cropyieldstatistics'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_latest_soil_test, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-18 13:25
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_created_at(apps, schema_editor):
+    WeatherRecord = apps.get_model('farms', 'WeatherRecord')
+    
+    # Existing observations haven't changed since they were recorded
+    WeatherRecord.objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farms', '0008_populate_latest_soil_test'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weatherrecord',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from core.utils import get_file_path, generate_unique_slug
 
 
@@ -38,6 +39,22 @@ class Farm(models.Model):
         if not self.slug:
             self.slug = generate_unique_slug(self, 'name')
         super().save(*args, **kwargs)
+        
+        # The owner's bulk upload template and calendar show farm names
+        from .calendar_read import invalidate_crop_calendar
+        from .calendar_template import invalidate_calendar_template
+        invalidate_calendar_template(self.owner_id)
+        invalidate_crop_calendar(self.owner_id)
+    
+    def delete(self, *args, **kwargs):
+        owner_id = self.owner_id
+        result = super().delete(*args, **kwargs)
+        
+        from .calendar_read import invalidate_crop_calendar
+        from .calendar_template import invalidate_calendar_template
+        invalidate_calendar_template(owner_id)
+        invalidate_crop_calendar(owner_id)
+        return result
 
 
 class FarmSection(models.Model):
@@ -55,6 +72,21 @@ class FarmSection(models.Model):
     
     def __str__(self):
         return f"{self.farm.name} - {self.name}"
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        
+        # The owner's bulk upload template lists field names
+        from .calendar_template import invalidate_calendar_template
+        invalidate_calendar_template(self.farm.owner_id)
+    
+    def delete(self, *args, **kwargs):
+        owner_id = self.farm.owner_id
+        result = super().delete(*args, **kwargs)
+        
+        from .calendar_template import invalidate_calendar_template
+        invalidate_calendar_template(owner_id)
+        return result
 
 
 class FarmEmployee(models.Model):
@@ -158,6 +190,20 @@ class CropCycle(models.Model):
     def __str__(self):
         return f"{self.crop.name} at {self.field.name} ({self.planting_date})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The harvest as loaded, which the yield statistics take back when it changes
+        if all(name in instance.__dict__ for name in ('status', 'actual_yield_kg', 'crop_id', 'field_id')):
+            instance._loaded_harvest = instance.harvest_observation()
+        return instance
+    
+    def harvest_observation(self):
+        """(crop_id, field_id, yield) when the cycle counts towards yield statistics, else None"""
+        if self.status != 'harvested' or self.actual_yield_kg is None:
+            return None
+        return (self.crop_id, self.field_id, float(self.actual_yield_kg))
+    
     def save(self, *args, **kwargs):
         # Calculate expected harvest date if not provided
         if not self.expected_harvest_date and self.planting_date and self.crop.average_growing_period_days:
@@ -174,73 +220,8 @@ class CropCycle(models.Model):
     
     def create_automatic_calendar_events(self):
         """Create automatic calendar events based on crop cycle"""
-        from datetime import timedelta
-        
-        events_to_create = []
-        
-        # Planting event
-        events_to_create.append({
-            'event_type': 'planting',
-            'title': f'Plant {self.crop.name}',
-            'description': f'Plant {self.crop.name} in {self.field.name}',
-            'start_date': self.planting_date,
-            'priority': 'high'
-        })
-        
-        # Calculate intermediate care events based on growing period
-        if self.crop.average_growing_period_days:
-            total_days = self.crop.average_growing_period_days
-            
-            # Fertilization (early growth - 2-3 weeks after planting)
-            fertilizer_date = self.planting_date + timedelta(days=min(21, total_days // 4))
-            events_to_create.append({
-                'event_type': 'fertilizing',
-                'title': f'Fertilize {self.crop.name}',
-                'description': f'Apply fertilizer to {self.crop.name} in {self.field.name}',
-                'start_date': fertilizer_date,
-                'priority': 'medium'
-            })
-            
-            # Weeding (mid growth)
-            if total_days > 30:
-                weeding_date = self.planting_date + timedelta(days=total_days // 2)
-                events_to_create.append({
-                    'event_type': 'weeding',
-                    'title': f'Weed {self.crop.name} field',
-                    'description': f'Remove weeds from {self.crop.name} in {self.field.name}',
-                    'start_date': weeding_date,
-                    'priority': 'medium'
-                })
-            
-            # Pest inspection (3/4 through growth)
-            if total_days > 45:
-                pest_date = self.planting_date + timedelta(days=(total_days * 3) // 4)
-                events_to_create.append({
-                    'event_type': 'pest_control',
-                    'title': f'Inspect {self.crop.name} for pests',
-                    'description': f'Check {self.crop.name} in {self.field.name} for pest damage',
-                    'start_date': pest_date,
-                    'priority': 'medium'
-                })
-        
-        # Harvest event
-        if self.expected_harvest_date:
-            events_to_create.append({
-                'event_type': 'harvesting',
-                'title': f'Harvest {self.crop.name}',
-                'description': f'Harvest {self.crop.name} from {self.field.name}',
-                'start_date': self.expected_harvest_date,
-                'priority': 'high'
-            })
-        
-        # Create the events
-        for event_data in events_to_create:
-            CropCalendar.objects.create(
-                farm=self.field.farm,
-                crop_cycle=self,
-                created_by_id=self.field.farm.owner_id,  # Assuming the farm owner creates these
-                **event_data
-            )
+        from .calendar_planner import create_crop_cycle_events
+        return create_crop_cycle_events([self])
 
 class SoilTest(models.Model):
     """Model for soil test results"""
@@ -280,9 +261,59 @@ class SoilTest(models.Model):
     def __str__(self):
         return f"Soil Test for {self.field.name} on {self.test_date}"
     
+    def save(self, *args, **kwargs):
+        previous_field_id = None
+        if self.pk:
+            previous_field_id = SoilTest.objects.filter(pk=self.pk).values_list('field_id', flat=True).first()
+        
+        super().save(*args, **kwargs)
+        
+        # Keep the latest soil test index in sync
+        LatestSoilTest.refresh_for_field(self.field_id)
+        if previous_field_id and previous_field_id != self.field_id:
+            LatestSoilTest.refresh_for_field(previous_field_id)
+    
     class Meta:
         ordering = ['-test_date']
 
+class LatestSoilTest(models.Model):
+    """Materialized index of the most recent soil test for each field"""
+    field = models.OneToOneField(FarmSection, on_delete=models.CASCADE, primary_key=True, related_name='latest_soil_test')
+    soil_test = models.ForeignKey(SoilTest, on_delete=models.CASCADE, related_name='+')
+    test_date = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Latest Soil Test for {self.field.name} ({self.test_date})"
+    
+    @classmethod
+    def refresh_for_field(cls, field_id):
+        """Point the index at the field's most recent soil test, or drop it if none are left"""
+        latest = SoilTest.objects.filter(field_id=field_id).order_by('-test_date', '-id').first()
+        
+        if latest is None:
+            cls.objects.filter(field_id=field_id).delete()
+            return None
+        
+        entry, _ = cls.objects.update_or_create(
+            field_id=field_id,
+            defaults={'soil_test': latest, 'test_date': latest.test_date}
+        )
+        return entry
+    
+    @classmethod
+    def rebuild(cls):
+        """Rebuild the whole index from SoilTest"""
+        latest_by_field = {}
+        for soil_test in SoilTest.objects.order_by('field_id', '-test_date', '-id').only('id', 'field_id', 'test_date'):
+            latest_by_field.setdefault(soil_test.field_id, soil_test)
+        
+        cls.objects.all().delete()
+        cls.objects.bulk_create([
+            cls(field_id=field_id, soil_test=soil_test, test_date=soil_test.test_date)
+            for field_id, soil_test in latest_by_field.items()
+        ], batch_size=500)
+
 class WeatherRecord(models.Model):
     """Model for weather data records"""
     farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='weather_records')
@@ -311,10 +342,26 @@ class WeatherRecord(models.Model):
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"Weather for {self.farm.name} on {self.date}"
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        
+        # Cached climate statistics for the farm are now out of date
+        from apps.recommendations.climate import invalidate_climate_summary
+        invalidate_climate_summary(self.farm_id)
+    
+    def delete(self, *args, **kwargs):
+        farm_id = self.farm_id
+        result = super().delete(*args, **kwargs)
+        
+        from apps.recommendations.climate import invalidate_climate_summary
+        invalidate_climate_summary(farm_id)
+        return result
+    
     class Meta:
         ordering = ['-date']
         unique_together = ['farm', 'date']
@@ -393,8 +440,26 @@ class CropCalendar(models.Model):
     def __str__(self):
         return f"{self.title} - {self.start_date}"
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        
+        from .calendar_read import invalidate_crop_calendar
+        invalidate_crop_calendar(self.farm.owner_id)
+    
+    def delete(self, *args, **kwargs):
+        owner_id = self.farm.owner_id
+        result = super().delete(*args, **kwargs)
+        
+        from .calendar_read import invalidate_crop_calendar
+        invalidate_crop_calendar(owner_id)
+        return result
+    
     class Meta:
         ordering = ['start_date', 'priority']
+        indexes = [
+            # Month, upcoming and overdue lookups are all range scans on a farm's start dates
+            models.Index(fields=['farm', 'start_date', 'status']),
+        ]
     
     @property
     def is_overdue(self):
@@ -409,6 +474,164 @@ class CropCalendar(models.Model):
             return (self.end_date - self.start_date).days + 1
         return 1
 
+class CalendarImportJob(models.Model):
+    """Background import of a bulk calendar upload"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='calendar_import_jobs')
+    source_file = models.FileField(upload_to='calendar_imports/', blank=True)
+    original_filename = models.CharField(max_length=255)
+    task_id = models.CharField(max_length=255, blank=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    total_rows = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+
+    # CSV with one line per rejected row
+    error_report = models.FileField(upload_to='calendar_imports/reports/', blank=True)
+    error_message = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Calendar import #{self.id} of {self.original_filename} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+
+class CropDashboardSummary(models.Model):
+    """
+    Precomputed figures for a user's crop dashboard.
+    
+    Signals flag a section stale when its source data changes, and the
+    dashboard rebuilds just the stale sections on its next load.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='crop_dashboard_summary')
+    computed_on = models.DateField(null=True, blank=True)
+    
+    # Crop cycles
+    total_crops = models.PositiveIntegerField(default=0)
+    crop_distribution = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
+    expected_yield = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_area = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    growth_stage = models.CharField(max_length=20, default='No active crops')
+    upcoming_harvests = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
+    
+    # Budgets
+    active_budgets_count = models.PositiveIntegerField(default=0)
+    total_planned_income = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_planned_expenses = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    recent_budgets = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
+    
+    # Activities and calendar
+    recent_activities = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
+    upcoming_calendar_events = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
+    overdue_calendar_events = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
+    
+    # Sections to rebuild on the next dashboard load
+    cycles_stale = models.BooleanField(default=True)
+    budgets_stale = models.BooleanField(default=True)
+    activities_stale = models.BooleanField(default=True)
+    calendar_stale = models.BooleanField(default=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = "Crop dashboard summaries"
+    
+    def __str__(self):
+        return f"Crop dashboard summary for {self.user}"
+
+class CropYieldStatistics(models.Model):
+    """
+    Running yield statistics of a user's harvested cycles of one crop.
+    
+    Kept up to date one harvest at a time as cycles are harvested, edited or
+    deleted, so yield analytics reads them instead of aggregating history.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='crop_yield_statistics')
+    crop = models.ForeignKey(Crop, on_delete=models.CASCADE, related_name='yield_statistics')
+    
+    harvest_count = models.PositiveIntegerField(default=0)
+    mean_yield_kg = models.FloatField(default=0)
+    # Sum of squared deviations from the mean, updated with Welford's method
+    sum_squared_deviations = models.FloatField(default=0)
+    min_yield_kg = models.FloatField(null=True, blank=True)
+    max_yield_kg = models.FloatField(null=True, blank=True)
+    total_yield_kg = models.FloatField(default=0)
+    
+    # Harvests from fields with a size, for the per-area mean
+    area_yield_kg = models.FloatField(default=0)
+    total_area = models.FloatField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ('user', 'crop')
+        verbose_name_plural = "Crop yield statistics"
+    
+    def __str__(self):
+        return f"{self.crop.name} yields of {self.user} ({self.harvest_count} harvests)"
+    
+    @property
+    def variance(self):
+        """Sample variance of the harvest yields"""
+        if self.harvest_count < 2:
+            return 0
+        return self.sum_squared_deviations / (self.harvest_count - 1)
+    
+    @property
+    def mean_yield_per_hectare(self):
+        return self.area_yield_kg / self.total_area if self.total_area > 0 else 0
+    
+    def add_harvest(self, yield_kg, area):
+        self.harvest_count += 1
+        delta = yield_kg - self.mean_yield_kg
+        self.mean_yield_kg += delta / self.harvest_count
+        self.sum_squared_deviations += delta * (yield_kg - self.mean_yield_kg)
+        self.total_yield_kg += yield_kg
+        self.min_yield_kg = yield_kg if self.min_yield_kg is None else min(self.min_yield_kg, yield_kg)
+        self.max_yield_kg = yield_kg if self.max_yield_kg is None else max(self.max_yield_kg, yield_kg)
+        if area:
+            self.area_yield_kg += yield_kg
+            self.total_area += area
+    
+    def remove_harvest(self, yield_kg, area):
+        """
+        Take back a harvest added earlier. Returns False when the minimum or
+        maximum may have changed and the row has to be rebuilt.
+        """
+        if self.harvest_count <= 1:
+            self.harvest_count = 0
+            self.mean_yield_kg = self.sum_squared_deviations = self.total_yield_kg = 0
+            self.area_yield_kg = self.total_area = 0
+            self.min_yield_kg = self.max_yield_kg = None
+            return True
+        
+        old_mean = self.mean_yield_kg
+        self.harvest_count -= 1
+        self.mean_yield_kg = (old_mean * (self.harvest_count + 1) - yield_kg) / self.harvest_count
+        self.sum_squared_deviations = max(
+            self.sum_squared_deviations - (yield_kg - old_mean) * (yield_kg - self.mean_yield_kg), 0
+        )
+        self.total_yield_kg -= yield_kg
+        if area:
+            self.area_yield_kg -= yield_kg
+            self.total_area -= area
+        return yield_kg not in (self.min_yield_kg, self.max_yield_kg)
+
 class SeasonalPlanning(models.Model):
     """Model for seasonal crop planning and rotation"""
     farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='seasonal_plans')
@@ -0,0 +1,155 @@
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Crop, CropCycle
+
+
+# Harvests per field the rotation rules look back over
+HISTORY_LENGTH = 3
+
+# Botanical families by keywords of the crop or scientific name, longest match wins
+CROP_FAMILIES = {
+    'legume': ['bean', 'pea', 'soy', 'groundnut', 'peanut', 'cowpea', 'lentil', 'chickpea', 'clover',
+               'alfalfa', 'fabaceae', 'phaseolus', 'vigna', 'arachis', 'glycine'],
+    'grass': ['maize', 'corn', 'rice', 'wheat', 'millet', 'sorghum', 'barley', 'oat', 'rye', 'sugarcane',
+              'poaceae', 'zea', 'oryza', 'triticum'],
+    'nightshade': ['tomato', 'potato', 'pepper', 'eggplant', 'garden egg', 'solanum', 'capsicum'],
+    'brassica': ['cabbage', 'kale', 'broccoli', 'cauliflower', 'mustard', 'brassica'],
+    'allium': ['onion', 'garlic', 'leek', 'shallot', 'allium'],
+    'cucurbit': ['cucumber', 'melon', 'pumpkin', 'squash', 'gourd', 'cucurbit'],
+    'root': ['cassava', 'yam', 'sweet potato', 'carrot', 'cocoyam', 'taro', 'manihot', 'dioscorea', 'ipomoea'],
+}
+
+# Nutrient demand of each family: legumes fix nitrogen, heavy feeders deplete it
+FIXER = 'fixer'
+HEAVY = 'heavy'
+LIGHT = 'light'
+NUTRIENT_DEMAND = {
+    'legume': FIXER,
+    'grass': HEAVY,
+    'nightshade': HEAVY,
+    'brassica': HEAVY,
+    'cucurbit': HEAVY,
+    'allium': LIGHT,
+    'root': LIGHT,
+}
+
+# Score adjustments, from the most recent harvest back
+BASE_SCORE = 50
+SAME_CROP_PENALTY = (40, 25, 15)
+SAME_FAMILY_PENALTY = (30, 15, 10)
+AFTER_HEAVY = {FIXER: 25, LIGHT: 10, HEAVY: -15}
+AFTER_FIXER = {HEAVY: 20, LIGHT: 5, FIXER: -10}
+DEPLETED_SOIL_BONUS = 10
+NEW_FIELD_BONUS = {FIXER: 15}
+
+
+def crop_family(crop):
+    names = f'{crop.name} {crop.scientific_name}'.lower()
+    matches = [
+        (len(keyword), family)
+        for family, keywords in CROP_FAMILIES.items()
+        for keyword in keywords
+        if keyword in names
+    ]
+    return max(matches)[1] if matches else None
+
+
+def recent_harvests(fields, limit=HISTORY_LENGTH):
+    """
+    The last `limit` harvested cycles of every field, newest first, keyed by
+    field id, from one query ranking each field's harvests with ROW_NUMBER()
+    """
+    history = {}
+    cycles = CropCycle.objects.filter(field__in=fields, status='harvested').annotate(
+        harvest_rank=Window(
+            RowNumber(),
+            partition_by=F('field_id'),
+            order_by=[F('actual_harvest_date').desc(nulls_last=True), F('id').desc()]
+        )
+    ).filter(harvest_rank__lte=limit).select_related('crop').order_by('field_id', 'harvest_rank')
+
+    for cycle in cycles:
+        history.setdefault(cycle.field_id, []).append(cycle)
+    return history
+
+
+class RotationPlanner:
+    """Scores every crop of the catalogue as the next crop of a field's rotation"""
+
+    def __init__(self, crops=None):
+        self.crops = list(Crop.objects.order_by('name', 'id') if crops is None else crops)
+        # Family and nutrient demand are resolved once per catalogue load
+        self.families = {crop.id: crop_family(crop) for crop in self.crops}
+        self.demand = {crop_id: NUTRIENT_DEMAND.get(family) for crop_id, family in self.families.items()}
+
+    def _family_of(self, crop):
+        return self.families[crop.id] if crop.id in self.families else crop_family(crop)
+
+    def score(self, candidate, history):
+        """Score and reasons for planting a crop after a field's recent crops, newest first"""
+        family = self.families[candidate.id]
+        demand = self.demand[candidate.id]
+        score = BASE_SCORE
+        reasons = []
+
+        if not history:
+            score += NEW_FIELD_BONUS.get(demand, 0)
+            if demand == FIXER:
+                reasons.append("Nitrogen-fixing legumes build soil health on a new field")
+            return score, reasons
+
+        history_families = [self._family_of(crop) for crop in history]
+        history_demand = [NUTRIENT_DEMAND.get(history_family) for history_family in history_families]
+
+        for position, crop in enumerate(history):
+            if crop.id == candidate.id:
+                score -= SAME_CROP_PENALTY[position]
+                if position == 0:
+                    reasons.append(f"Replanting {crop.name} would carry over its pests and diseases")
+            elif family and history_families[position] == family:
+                score -= SAME_FAMILY_PENALTY[position]
+                if position == 0:
+                    reasons.append(f"Same plant family as {crop.name}, sharing its pests and diseases")
+
+        if history_demand[0] == HEAVY:
+            score += AFTER_HEAVY.get(demand, 0)
+            if demand == FIXER:
+                reasons.append(f"{history[0].name} is a heavy feeder; legumes will replenish nitrogen")
+            if demand == FIXER and len(history_demand) > 1 and history_demand[1] == HEAVY:
+                score += DEPLETED_SOIL_BONUS
+                reasons.append("Two heavy feeders in a row have depleted the soil")
+        elif history_demand[0] == FIXER:
+            score += AFTER_FIXER.get(demand, 0)
+            if demand == HEAVY:
+                reasons.append(f"{history[0].name} has enriched the soil with nitrogen for a heavy feeder")
+
+        if family and family not in history_families:
+            reasons.append("A new plant family breaks pest and disease cycles")
+
+        return score, reasons
+
+    def rank(self, history, limit=3):
+        """The best `limit` (crop, score, reasons) for a field's recent crops, best first"""
+        scored = [(crop, *self.score(crop, history)) for crop in self.crops]
+        scored.sort(key=lambda item: -item[1])
+        return scored[:limit]
+
+    def plan(self, fields, limit=3):
+        """Ranked suggestions for every field in a single pass over the fields"""
+        fields = list(fields)
+        harvests = recent_harvests(fields)
+
+        plans = []
+        for field in fields:
+            recent_cycles = harvests.get(field.id, [])
+            ranked = self.rank([cycle.crop for cycle in recent_cycles], limit)
+            reasons = ranked[0][2] if ranked else []
+            plans.append({
+                'field': field,
+                'recent_crops': recent_cycles,
+                'recommended_crops': [crop for crop, _, _ in ranked],
+                'scores': [score for _, score, _ in ranked],
+                'reasoning': "; ".join(reasons) or "Rotation will break pest and disease cycles",
+            })
+        return plans
@@ -0,0 +1,102 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.activities.models import Activity
+from apps.financials.models import Budget
+from .dashboard_summary import mark_all_dashboards_stale, mark_dashboard_stale
+from .models import Crop, CropCalendar, CropCycle, Farm, FarmSection, LatestSoilTest, SoilTest
+from .yield_statistics import rebuild_yield_statistics, record_harvest_change
+
+# A cycle saved without being loaded first, so its previous harvest is unknown
+UNKNOWN = object()
+
+
+def _field_owner_id(field_id):
+    return FarmSection.objects.filter(pk=field_id).values_list('farm__owner_id', flat=True).first()
+
+
+def _farm_owner_id(farm_id):
+    return Farm.objects.filter(pk=farm_id).values_list('owner_id', flat=True).first()
+
+
+# Crop dashboard summary: flag the section each write affects
+
+@receiver([post_save, post_delete], sender=CropCycle)
+def crop_cycle_changed(sender, instance, **kwargs):
+    mark_dashboard_stale(_field_owner_id(instance.field_id), 'cycles')
+
+
+@receiver([post_save, post_delete], sender=Budget)
+def budget_changed(sender, instance, **kwargs):
+    mark_dashboard_stale(instance.user_id, 'budgets')
+
+
+@receiver([post_save, post_delete], sender=Activity)
+def activity_changed(sender, instance, **kwargs):
+    mark_dashboard_stale(instance.created_by_id, 'activities')
+
+
+@receiver([post_save, post_delete], sender=CropCalendar)
+def crop_calendar_changed(sender, instance, **kwargs):
+    mark_dashboard_stale(_farm_owner_id(instance.farm_id), 'calendar')
+
+
+@receiver([post_save, post_delete], sender=FarmSection)
+def farm_section_changed(sender, instance, **kwargs):
+    # Field sizes and names feed the cycle figures and activity list
+    mark_dashboard_stale(_farm_owner_id(instance.farm_id), 'cycles', 'activities')
+
+
+@receiver([post_save, post_delete], sender=Farm)
+def farm_changed(sender, instance, **kwargs):
+    mark_dashboard_stale(instance.owner_id)
+
+
+@receiver(post_save, sender=Crop)
+def crop_changed(sender, instance, created, **kwargs):
+    # A new crop appears on no dashboard yet; a renamed one may appear on any
+    if not created:
+        mark_all_dashboards_stale('cycles')
+
+
+# Crop yield statistics: apply each harvest as it is recorded, changed or removed
+
+@receiver(post_save, sender=CropCycle)
+def crop_cycle_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else getattr(instance, '_loaded_harvest', UNKNOWN)
+    new = instance.harvest_observation()
+    if old is UNKNOWN:
+        rebuild_yield_statistics(_field_owner_id(instance.field_id), crop_ids=[instance.crop_id])
+    else:
+        record_harvest_change(old, new)
+    instance._loaded_harvest = new
+
+
+@receiver(post_delete, sender=CropCycle)
+def crop_cycle_deleted(sender, instance, **kwargs):
+    old = getattr(instance, '_loaded_harvest', UNKNOWN)
+    if old is UNKNOWN:
+        old = instance.harvest_observation()
+    record_harvest_change(old, None)
+
+
+@receiver(post_save, sender=FarmSection)
+def farm_section_saved(sender, instance, created, raw=False, **kwargs):
+    # The field's size may have changed under the harvests already counted
+    if created or raw:
+        return
+    crop_ids = list(CropCycle.objects.filter(
+        field=instance, status='harvested', actual_yield_kg__isnull=False
+    ).values_list('crop_id', flat=True).distinct())
+    if crop_ids:
+        rebuild_yield_statistics(instance.farm.owner_id, crop_ids=crop_ids)
+
+
+# Latest soil test index: saves are handled in SoilTest.save()
+
+@receiver(post_delete, sender=SoilTest)
+def soil_test_deleted(sender, instance, **kwargs):
+    # Also sent for queryset and cascade deletes, after the index row went with the test
+    LatestSoilTest.refresh_for_field(instance.field_id)
@@ -1,3 +1,901 @@
+import csv
+import io
+import json
+import os
+import statistics
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+import openpyxl
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Sum
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.activities.models import Activity
+from apps.financials.models import Budget
+
+from .calendar_feed import FEED_SALT, make_feed_token, read_feed_token
+from .calendar_import import CalendarEventImporter
+from .calendar_read import LIST_LIMIT, build_month_calendar, get_month_calendar
+from .calendar_recurrence import expand_events, occurrence_dates, window_filter
+from .calendar_template import get_calendar_template, template_cache_key
+from .dashboard_summary import SECTIONS, dashboard_context, get_dashboard_summary
+from .harvest_rollup import harvest_rollup, harvested_cycles, parse_rollup_query, rollup_series
+from .models import (
+    Crop, CropCalendar, CropCycle, CropYieldStatistics, Farm, FarmSection, LatestSoilTest, SoilTest, WeatherRecord
+)
+from .rotation_planner import RotationPlanner, crop_family, recent_harvests
+from .weather_ingest import JSONLinesWeatherProvider, ingest_weather
+from .yield_prediction import predict_cycle_yields, yield_model_cache_key
+from .yield_statistics import rebuild_yield_statistics
+
+User = get_user_model()
+
+
+class FarmTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='farmer', email='farmer@example.com', password='secret')
+        self.farm = Farm.objects.create(name='Test Farm', owner=self.user, farm_type='crop', location='Kaduna', size=Decimal('10'))
+        self.field = FarmSection.objects.create(farm=self.farm, name='North Field', size=Decimal('2.5'))
+
+
+class LatestSoilTestTest(FarmTestCase):
+    def soil_test(self, test_date):
+        return SoilTest.objects.create(field=self.field, test_date=test_date, ph=Decimal('6.5'))
+
+    def latest(self):
+        return LatestSoilTest.objects.filter(field=self.field).values_list('soil_test_id', flat=True).first()
+
+    def test_tracks_most_recent_test(self):
+        older = self.soil_test(date(2024, 1, 1))
+        newer = self.soil_test(date(2024, 6, 1))
+        self.assertEqual(self.latest(), newer.id)
+
+        newer.test_date = date(2023, 1, 1)
+        newer.save()
+        self.assertEqual(self.latest(), older.id)
+
+    def test_instance_delete_falls_back_to_previous_test(self):
+        older = self.soil_test(date(2024, 1, 1))
+        self.soil_test(date(2024, 6, 1)).delete()
+
+        self.assertEqual(self.latest(), older.id)
+
+    def test_queryset_delete_falls_back_to_previous_test(self):
+        older = self.soil_test(date(2024, 1, 1))
+        self.soil_test(date(2024, 6, 1))
+
+        SoilTest.objects.filter(test_date__gt=date(2024, 3, 1)).delete()
+
+        self.assertEqual(self.latest(), older.id)
+
+    def test_deleting_every_test_drops_the_entry(self):
+        self.soil_test(date(2024, 1, 1))
+
+        SoilTest.objects.all().delete()
+
+        self.assertIsNone(self.latest())
+
+    def test_deleting_the_field_drops_the_entry(self):
+        self.soil_test(date(2024, 1, 1))
+
+        self.field.delete()
+
+        self.assertFalse(LatestSoilTest.objects.exists())
+
+    def test_rebuild(self):
+        newer = self.soil_test(date(2024, 6, 1))
+        LatestSoilTest.objects.all().delete()
+
+        LatestSoilTest.rebuild()
+
+        self.assertEqual(self.latest(), newer.id)
+
+
+class WeatherIngestTest(FarmTestCase):
+    def observation(self, day, **values):
+        return dict({'farm_id': self.farm.id, 'date': f'2024-05-{day:02d}', 'rainfall_mm': '4.5'}, **values)
+
+    def feed(self, *lines):
+        handle = tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False)
+        with handle:
+            handle.write('\n'.join(line if isinstance(line, str) else json.dumps(line) for line in lines))
+        self.addCleanup(os.remove, handle.name)
+        return JSONLinesWeatherProvider(handle.name)
+
+    def test_upsert_inserts_then_updates(self):
+        ingest_weather([self.observation(1), self.observation(2)])
+        first = WeatherRecord.objects.get(farm=self.farm, date=date(2024, 5, 1))
+
+        stats = ingest_weather([self.observation(1, rainfall_mm='12')])
+
+        self.assertEqual(stats['rows_written'], 1)
+        self.assertEqual(WeatherRecord.objects.filter(farm=self.farm).count(), 2)
+        corrected = WeatherRecord.objects.get(farm=self.farm, date=date(2024, 5, 1))
+        self.assertEqual(corrected.id, first.id)
+        self.assertEqual(corrected.rainfall_mm, Decimal('12'))
+        self.assertGreater(corrected.updated_at, first.updated_at)
+
+    def test_last_duplicate_in_a_chunk_wins(self):
+        ingest_weather([self.observation(1, rainfall_mm='1'), self.observation(1, rainfall_mm='2')])
+
+        self.assertEqual(WeatherRecord.objects.get(farm=self.farm).rainfall_mm, Decimal('2'))
+
+    def test_malformed_lines_are_counted_and_skipped(self):
+        provider = self.feed(self.observation(1), '{"farm_id": 1, "date":', '[1, 2]', self.observation(2))
+
+        stats = ingest_weather(provider)
+
+        self.assertEqual(stats['rows_read'], 4)
+        self.assertEqual(stats['rows_written'], 2)
+        self.assertEqual(stats['rows_skipped'], 2)
+        self.assertEqual([error['row'] for error in stats['errors']], [2, 3])
+
+    def test_invalid_values_are_rejected(self):
+        stats = ingest_weather([
+            self.observation(1, humidity_percentage='140'),
+            self.observation(2, temperature_max='NaN'),
+            self.observation(3, rainfall_mm='heavy'),
+            self.observation(4, data_source='rumour'),
+            self.observation(5, farm_id=0),
+            self.observation(6, date='2024-02-30'),
+            self.observation(7),
+        ])
+
+        self.assertEqual(stats['rows_skipped'], 6)
+        self.assertEqual(list(WeatherRecord.objects.values_list('date', flat=True)), [date(2024, 5, 7)])
+
+    def test_unknown_farm_is_rejected(self):
+        stats = ingest_weather([self.observation(1, farm_id=self.farm.id + 100)])
+
+        self.assertEqual(stats['rows_skipped'], 1)
+        self.assertFalse(WeatherRecord.objects.exists())
+
+
+    def test_redelivered_feed_updates_in_place(self):
+        observations = [self.observation(day) for day in range(1, 6)]
+        ingest_weather(observations)
+        ids = set(WeatherRecord.objects.values_list('id', flat=True))
+
+        with CaptureQueriesContext(connection) as queries:
+            stats = ingest_weather([dict(observation, rainfall_mm='7') for observation in observations])
+
+        self.assertEqual(stats['rows_written'], 5)
+        self.assertEqual(set(WeatherRecord.objects.values_list('id', flat=True)), ids)
+        self.assertEqual(set(WeatherRecord.objects.values_list('rainfall_mm', flat=True)), {Decimal('7')})
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('INSERT')]), 1)
+
+    def test_mysql_upserts_on_its_unique_key(self):
+        """MySQL can't name the conflicting key, so its ON DUPLICATE KEY UPDATE gets none"""
+        features = type(connection.features)
+        with mock.patch.object(
+            features, 'supports_update_conflicts_with_target', new_callable=mock.PropertyMock, return_value=False
+        ), mock.patch.object(WeatherRecord.objects, 'bulk_create') as bulk_create:
+            ingest_weather([self.observation(1)])
+
+        self.assertEqual(bulk_create.call_args.kwargs['unique_fields'], None)
+        self.assertTrue(bulk_create.call_args.kwargs['update_conflicts'])
+
+
+class CalendarFeedTest(FarmTestCase):
+    def setUp(self):
+        super().setUp()
+        CropCalendar.objects.create(
+            farm=self.farm, event_type='planting', title='Plant maize',
+            start_date=date(2024, 5, 1), end_date=date(2024, 5, 1), created_by=self.user
+        )
+
+    def get_feed(self, token):
+        return self.client.get(reverse('farms:crop_calendar_feed', args=[token]))
+
+    def test_feed_serves_events(self):
+        response = self.get_feed(make_feed_token(self.user))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('SUMMARY:Plant maize', b''.join(response.streaming_content).decode())
+
+    def test_tampered_token_is_rejected(self):
+        self.assertEqual(self.get_feed(make_feed_token(self.user) + 'x').status_code, 404)
+
+    def test_reset_revokes_old_links(self):
+        old_token = make_feed_token(self.user)
+        self.client.force_login(self.user)
+
+        response = self.client.post(reverse('farms:crop_calendar_feed_reset'))
+
+        self.assertRedirects(response, reverse('farms:crop_calendar'), fetch_redirect_response=False)
+        self.assertEqual(self.get_feed(old_token).status_code, 404)
+        self.user.refresh_from_db()
+        self.assertEqual(self.get_feed(make_feed_token(self.user)).status_code, 200)
+
+    def test_unversioned_links_work_until_reset(self):
+        token = signing.dumps({'user': self.user.id}, salt=FEED_SALT)
+        self.assertEqual(read_feed_token(token), self.user.id)
+
+        self.user.calendar_feed_version = 1
+        self.user.save()
+        with self.assertRaises(signing.BadSignature):
+            read_feed_token(token)
+
+
+class RecurrenceTest(FarmTestCase):
+    def event(self, start_date, end_date=None, pattern='', interval=1, status='planned'):
+        return CropCalendar(
+            farm=self.farm, event_type='watering', title='Water', start_date=start_date, end_date=end_date,
+            is_recurring=bool(pattern), recurrence_pattern=pattern, recurrence_interval=interval, status=status,
+            created_by=self.user
+        )
+
+    def dates(self, event, window_start, window_end):
+        return list(occurrence_dates(event, window_start, window_end))
+
+    def test_single_event(self):
+        event = self.event(date(2024, 5, 10))
+
+        self.assertEqual(self.dates(event, date(2024, 5, 10), date(2024, 5, 10)), [date(2024, 5, 10)])
+        self.assertEqual(self.dates(event, date(2024, 5, 11), date(2024, 5, 31)), [])
+        self.assertEqual(self.dates(event, date(2024, 5, 1), date(2024, 5, 9)), [])
+
+    def test_daily_series_skips_to_the_window(self):
+        event = self.event(date(2020, 1, 1), pattern='daily', interval=3)
+
+        dates = self.dates(event, date(2024, 5, 1), date(2024, 5, 10))
+
+        self.assertEqual(dates, [date(2024, 5, 3), date(2024, 5, 6), date(2024, 5, 9)])
+
+    def test_weekly_series_includes_window_bounds(self):
+        event = self.event(date(2024, 1, 1), pattern='weekly')
+
+        self.assertEqual(
+            self.dates(event, date(2024, 1, 8), date(2024, 1, 22)),
+            [date(2024, 1, 8), date(2024, 1, 15), date(2024, 1, 22)]
+        )
+
+    def test_series_starting_after_the_window_has_no_occurrences(self):
+        event = self.event(date(2024, 6, 1), pattern='weekly')
+
+        self.assertEqual(self.dates(event, date(2024, 5, 1), date(2024, 5, 31)), [])
+
+    def test_monthly_series_falls_back_to_month_end_and_recovers(self):
+        event = self.event(date(2024, 1, 31), pattern='monthly')
+
+        self.assertEqual(
+            self.dates(event, date(2024, 1, 1), date(2024, 4, 30)),
+            [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)]
+        )
+        self.assertEqual(self.dates(event, date(2025, 2, 1), date(2025, 3, 31)), [date(2025, 2, 28), date(2025, 3, 31)])
+
+    def test_monthly_interval(self):
+        event = self.event(date(2023, 11, 15), pattern='monthly', interval=2)
+
+        self.assertEqual(
+            self.dates(event, date(2024, 1, 1), date(2024, 6, 30)),
+            [date(2024, 1, 15), date(2024, 3, 15), date(2024, 5, 15)]
+        )
+
+    def test_multi_day_occurrence_overlapping_window_start(self):
+        # Each occurrence lasts three days, so the one from May 30 reaches into June
+        event = self.event(date(2024, 5, 2), date(2024, 5, 4), pattern='weekly', interval=4)
+
+        occurrences = expand_events([event], date(2024, 6, 1), date(2024, 6, 30))
+
+        self.assertEqual(
+            [(occurrence.start_date, occurrence.end_date) for occurrence in occurrences],
+            [(date(2024, 5, 30), date(2024, 6, 1)), (date(2024, 6, 27), date(2024, 6, 29))]
+        )
+
+    def test_occurrences_are_ordered_by_date(self):
+        weekly = self.event(date(2024, 5, 3), pattern='weekly')
+        single = self.event(date(2024, 5, 1))
+
+        occurrences = expand_events([weekly, single], date(2024, 5, 1), date(2024, 5, 10))
+
+        self.assertEqual([occurrence.start_date for occurrence in occurrences], [date(2024, 5, 1), date(2024, 5, 3), date(2024, 5, 10)])
+
+    def test_window_filter(self):
+        events = {
+            'overlapping': self.event(date(2024, 4, 28), date(2024, 5, 2)),
+            'one_day': self.event(date(2024, 5, 31)),
+            'before': self.event(date(2024, 4, 1), date(2024, 4, 30)),
+            'after': self.event(date(2024, 6, 1)),
+            'open_series': self.event(date(2020, 1, 1), pattern='weekly'),
+            'closed_series': self.event(date(2020, 1, 1), pattern='weekly', status='completed'),
+            'future_series': self.event(date(2024, 6, 1), pattern='daily'),
+        }
+        for name, event in events.items():
+            event.title = name
+            event.save()
+
+        matched = CropCalendar.objects.filter(window_filter(date(2024, 5, 1), date(2024, 5, 31)))
+
+        self.assertEqual(set(matched.values_list('title', flat=True)), {'overlapping', 'one_day', 'open_series'})
+
+
+class MonthCalendarTest(FarmTestCase):
+    today = date(2024, 5, 15)
+
+    def event(self, start_date, status='planned', **fields):
+        return CropCalendar.objects.create(
+            farm=self.farm, event_type='weeding', title='Weed', start_date=start_date, end_date=start_date,
+            status=status, created_by=self.user, **fields
+        )
+
+    def build(self):
+        return build_month_calendar(self.user, 2024, 5, self.today)
+
+    def test_overdue_list_is_bounded_in_sql(self):
+        for day in range(1, LIST_LIMIT + 6):
+            self.event(date(2023, 1, day))
+        self.event(date(2023, 2, 1), status='completed')
+
+        with CaptureQueriesContext(connection) as queries:
+            month = self.build()
+
+        self.assertEqual(month['overdue_count'], LIST_LIMIT + 5)
+        self.assertEqual(len(month['overdue_events']), LIST_LIMIT)
+        self.assertEqual(month['overdue_events'][0].start_date, date(2023, 1, 1))
+        self.assertIn('LIMIT 10', queries[-2]['sql'] + queries[-1]['sql'])
+
+    def test_open_series_repeats_but_is_not_overdue(self):
+        self.event(date(2024, 4, 1), is_recurring=True, recurrence_pattern='weekly', recurrence_interval=1)
+
+        month = self.build()
+
+        self.assertEqual(month['overdue_count'], 0)
+        self.assertEqual(month['month_event_count'], 4)
+        self.assertEqual(month['upcoming_events'][0].start_date, date(2024, 5, 20))
+
+    def test_closed_series_stops_repeating(self):
+        for status in ('completed', 'cancelled'):
+            self.event(date(2024, 4, 1), status=status, is_recurring=True, recurrence_pattern='daily', recurrence_interval=1)
+
+        month = self.build()
+
+        self.assertEqual(month['month_event_count'], 0)
+        self.assertEqual(month['upcoming_count'], 0)
+
+
+class CalendarImportTest(FarmTestCase):
+    def setUp(self):
+        super().setUp()
+        self.worker = User.objects.create_user(username='worker', email='worker@example.com', password='secret')
+
+    def row(self, title='Weed north field', farm='Test Farm', **cells):
+        values = [farm, '', 'weeding', title, '', '2024-05-01', '2024-05-01', 'medium', 'planned']
+        row = values + [None] * 10
+        for index, value in cells.items():
+            row[int(index.lstrip('c'))] = value
+        return row
+
+    def workbook(self, *rows):
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        for _ in range(3):
+            sheet.append(['header'])
+        for row in rows:
+            sheet.append(row)
+        output = io.BytesIO()
+        workbook.save(output)
+        output.seek(0)
+        return output
+
+    def run_import(self, *rows, chunk_size=1000):
+        importer = CalendarEventImporter(self.user, chunk_size=chunk_size)
+        return importer, importer.run(self.workbook(*rows))
+
+    def test_rows_are_inserted_a_chunk_at_a_time(self):
+        with CaptureQueriesContext(connection) as queries:
+            _, stats = self.run_import(*[self.row(f'Event {index}') for index in range(5)], chunk_size=2)
+
+        self.assertEqual(stats, {'total_rows': 5, 'created_count': 5, 'error_count': 0})
+        inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "farms_cropcalendar"')]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(CropCalendar.objects.filter(farm=self.farm).count(), 5)
+
+    def test_farms_are_resolved_by_name(self):
+        Farm.objects.create(name='Twin', owner=self.user, farm_type='crop', location='Kano', size=Decimal('1'))
+        Farm.objects.create(name='Twin', owner=self.user, farm_type='crop', location='Jos', size=Decimal('1'))
+        other = User.objects.create_user(username='other', email='other@example.com', password='secret')
+        Farm.objects.create(name='Elsewhere', owner=other, farm_type='crop', location='Kano', size=Decimal('1'))
+
+        importer, stats = self.run_import(self.row(), self.row(farm='Twin'), self.row(farm='Elsewhere'))
+
+        self.assertEqual(stats['created_count'], 1)
+        self.assertEqual(importer.errors, [
+            (5, "More than one farm is named 'Twin'"),
+            (6, "Farm 'Elsewhere' not found"),
+        ])
+
+    def test_assignees_are_resolved_once_per_email(self):
+        rows = [self.row(c12='worker@example.com') for _ in range(3)] + [self.row(c12='nobody@example.com')]
+
+        with CaptureQueriesContext(connection) as queries:
+            importer, stats = self.run_import(*rows, chunk_size=2)
+
+        self.assertEqual(stats['created_count'], 3)
+        self.assertEqual(set(CropCalendar.objects.values_list('assigned_to', flat=True)), {self.worker.id})
+        self.assertEqual(importer.errors, [(7, "User with email 'nobody@example.com' not found")])
+        user_lookups = [query for query in queries if 'FROM "accounts_user"' in query['sql']]
+        self.assertEqual(len(user_lookups), 2)
+
+    def test_invalid_cells_are_reported_per_row(self):
+        importer, stats = self.run_import(
+            self.row(),
+            self.row(c14='NaN'),
+            self.row(c18='Infinity'),
+            self.row(c18='123456789012'),
+            self.row(title='x' * 300),
+            self.row(c9='TRUE', c10='fortnightly'),
+            self.row(c9='TRUE', c10='weekly', c11=-1),
+            self.row(c5='01/05/2024'),
+            self.row(c9='TRUE', c10='Weekly', c11=2),
+        )
+
+        self.assertEqual(stats['created_count'], 2)
+        self.assertEqual([row for row, _ in importer.errors], [5, 6, 7, 8, 9, 10, 11])
+        self.assertIn('at most 255 characters', importer.errors[3][1])
+        self.assertEqual(CropCalendar.objects.get(is_recurring=True).recurrence_pattern, 'weekly')
+
+    def test_error_report_lists_rows(self):
+        importer, _ = self.run_import(self.row(farm='Nowhere'))
+
+        self.assertEqual(
+            list(csv.reader(io.StringIO(importer.error_report()))),
+            [['Row', 'Error'], ['4', "Farm 'Nowhere' not found"]]
+        )
+
+    def test_import_invalidates_cached_month(self):
+        cache.clear()
+        self.assertEqual(get_month_calendar(self.user, 2024, 5, date(2024, 4, 1))['month_event_count'], 0)
+
+        self.run_import(self.row())
+
+        self.assertEqual(get_month_calendar(self.user, 2024, 5, date(2024, 4, 1))['month_event_count'], 1)
+
+
+class CalendarCacheTest(FarmTestCase):
+    today = date(2024, 5, 15)
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def month(self):
+        return get_month_calendar(self.user, 2024, 5, self.today)
+
+    def add_event(self):
+        return CropCalendar.objects.create(
+            farm=self.farm, event_type='weeding', title='Weed', start_date=date(2024, 5, 20),
+            end_date=date(2024, 5, 20), created_by=self.user
+        )
+
+    def test_month_is_cached(self):
+        self.month()
+        with self.assertNumQueries(0):
+            self.month()
+
+    def test_event_write_invalidates_month(self):
+        self.month()
+
+        event = self.add_event()
+        self.assertEqual(self.month()['month_event_count'], 1)
+
+        event.delete()
+        self.assertEqual(self.month()['month_event_count'], 0)
+
+    def test_field_write_invalidates_template(self):
+        get_calendar_template(self.user)
+        self.assertIsNotNone(cache.get(template_cache_key(self.user.id)))
+
+        FarmSection.objects.create(farm=self.farm, name='South Field', size=Decimal('1'))
+        self.assertIsNone(cache.get(template_cache_key(self.user.id)))
+
+        get_calendar_template(self.user)
+        self.farm.name = 'Renamed Farm'
+        self.farm.save()
+        self.assertIsNone(cache.get(template_cache_key(self.user.id)))
+
+
+class RotationPlannerTest(FarmTestCase):
+    def setUp(self):
+        super().setUp()
+        self.crops = {
+            name: Crop.objects.create(name=name, scientific_name=scientific_name, average_growing_period_days=100)
+            for name, scientific_name in [
+                ('Maize', 'Zea mays'), ('Sorghum', ''), ('Beans', ''), ('Sweet Potato', ''), ('Tomato', ''), ('Onion', ''),
+            ]
+        }
+        self.planner = RotationPlanner(self.crops.values())
+
+    def score(self, candidate, *history):
+        return self.planner.score(self.crops[candidate], [self.crops[name] for name in history])[0]
+
+    def harvest(self, crop, harvest_date, field=None, status='harvested'):
+        return CropCycle.objects.create(
+            field=field or self.field, crop=crop, planting_date=date(2020, 1, 1), status=status,
+            actual_harvest_date=harvest_date
+        )
+
+    def test_crop_family_prefers_the_longest_keyword(self):
+        self.assertEqual(crop_family(self.crops['Sweet Potato']), 'root')
+        self.assertEqual(crop_family(Crop(name='Irish Potato', scientific_name='')), 'nightshade')
+        self.assertEqual(crop_family(Crop(name='Local white', scientific_name='Zea mays')), 'grass')
+        self.assertIsNone(crop_family(Crop(name='Moringa', scientific_name='')))
+
+    def test_new_field_favours_legumes(self):
+        self.assertEqual(self.score('Beans'), 65)
+        self.assertEqual(self.score('Maize'), 50)
+
+    def test_same_crop_penalty_decays_with_age(self):
+        self.assertEqual(self.score('Maize', 'Maize'), 50 - 40 - 15)
+        self.assertEqual(self.score('Maize', 'Onion', 'Maize'), 50 - 25)
+        self.assertEqual(self.score('Maize', 'Onion', 'Onion', 'Maize'), 50 - 15)
+
+    def test_same_family_penalty(self):
+        self.assertEqual(self.score('Sorghum', 'Maize'), 50 - 30 - 15)
+
+    def test_legume_after_heavy_feeders(self):
+        self.assertEqual(self.score('Beans', 'Maize'), 50 + 25)
+        self.assertEqual(self.score('Beans', 'Maize', 'Tomato'), 50 + 25 + 10)
+
+    def test_heavy_feeder_after_legume(self):
+        score, reasons = self.planner.score(self.crops['Maize'], [self.crops['Beans']])
+
+        self.assertEqual(score, 50 + 20)
+        self.assertIn("Beans has enriched the soil with nitrogen for a heavy feeder", reasons)
+
+    def test_plan_ranks_legumes_after_maize(self):
+        self.harvest(self.crops['Maize'], date(2024, 8, 1))
+
+        [plan] = self.planner.plan([self.field], limit=2)
+
+        self.assertEqual(plan['recommended_crops'][0], self.crops['Beans'])
+        self.assertEqual(plan['scores'][0], 75)
+
+    def test_recent_harvests_keeps_the_newest_per_field(self):
+        other_field = FarmSection.objects.create(farm=self.farm, name='South Field', size=Decimal('1'))
+        undated = self.harvest(self.crops['Onion'], None)
+        oldest = self.harvest(self.crops['Maize'], date(2021, 8, 1))
+        newest = self.harvest(self.crops['Beans'], date(2023, 8, 1))
+        middle = self.harvest(self.crops['Tomato'], date(2022, 8, 1))
+        self.harvest(self.crops['Sorghum'], date(2024, 8, 1), status='active')
+        other = self.harvest(self.crops['Maize'], date(2020, 8, 1), field=other_field)
+
+        with self.assertNumQueries(1):
+            history = recent_harvests([self.field, other_field])
+
+        self.assertEqual(history[self.field.id], [newest, middle, oldest])
+        self.assertEqual(history[other_field.id], [other])
+        self.assertNotIn(undated, history[self.field.id])
+
+
+class HarvestRollupTest(FarmTestCase):
+    def setUp(self):
+        super().setUp()
+        self.maize = Crop.objects.create(name='Maize', average_growing_period_days=120)
+        self.beans = Crop.objects.create(name='Beans', average_growing_period_days=90)
+        for crop, planted, harvested, yield_kg in [
+            (self.maize, date(2023, 4, 1), date(2023, 8, 10), 4000),
+            (self.maize, date(2023, 4, 20), date(2023, 8, 25), 5000),
+            (self.maize, date(2023, 11, 1), date(2024, 2, 1), 3000),
+            (self.beans, date(2023, 6, 1), date(2023, 9, 1), 1200),
+        ]:
+            CropCycle.objects.create(
+                field=self.field, crop=crop, planting_date=planted, status='harvested',
+                actual_harvest_date=harvested, actual_yield_kg=Decimal(yield_kg)
+            )
+        # Neither counts: still growing, and harvested without a recorded yield
+        CropCycle.objects.create(field=self.field, crop=self.maize, planting_date=date(2024, 4, 1), status='active')
+        CropCycle.objects.create(
+            field=self.field, crop=self.beans, planting_date=date(2024, 4, 1), status='harvested',
+            actual_harvest_date=date(2024, 7, 1)
+        )
+        self.cycles = harvested_cycles(self.user)
+
+    def rows(self, **kwargs):
+        return [(row['label'], row.get('crop'), row['harvest_count'], row['total_yield_kg']) for row in harvest_rollup(self.cycles, **kwargs)]
+
+    def test_month_buckets_by_crop(self):
+        self.assertEqual(self.rows(period='month'), [
+            ('2023-08', 'Maize', 2, 9000.0),
+            ('2023-09', 'Beans', 1, 1200.0),
+            ('2024-02', 'Maize', 1, 3000.0),
+        ])
+
+    def test_month_row_statistics(self):
+        [august, _, _] = harvest_rollup(self.cycles, period='month')
+
+        self.assertEqual(august['period'], '2023-08-01')
+        self.assertEqual(august['crop_id'], self.maize.id)
+        self.assertEqual((august['avg_yield_kg'], august['min_yield_kg'], august['max_yield_kg']), (4500.0, 4000.0, 5000.0))
+        self.assertEqual(august['total_area'], 5.0)
+
+    def test_year_buckets_without_crops(self):
+        self.assertEqual(self.rows(period='year', by_crop=False), [('2023', None, 3, 10200.0), ('2024', None, 1, 3000.0)])
+
+    def test_month_of_year_series(self):
+        series = rollup_series(harvest_rollup(self.cycles, period='month_of_year'))
+
+        self.assertEqual(series, {'Maize': {'Feb': 3000.0, 'Aug': 4500.0}, 'Beans': {'Sep': 1200.0}})
+
+    def test_seasons_are_in_calendar_order(self):
+        self.assertEqual(self.rows(period='season', by_crop=False, date_field='planting_date'), [
+            ('Spring', None, 2, 9000.0),
+            ('Summer', None, 1, 1200.0),
+            ('Fall', None, 1, 3000.0),
+        ])
+
+    def test_cycles_are_narrowed_down(self):
+        cycles = harvested_cycles(self.user, crop=self.maize, start_date=date(2023, 8, 20), end_date=date(2024, 12, 31))
+
+        self.assertEqual(sorted(cycles.values_list('actual_yield_kg', flat=True)), [Decimal('3000'), Decimal('5000')])
+        other = User.objects.create_user(username='other', email='other@example.com', password='secret')
+        self.assertFalse(harvested_cycles(other).exists())
+
+    def test_unknown_period_or_date_field(self):
+        with self.assertRaises(ValueError):
+            harvest_rollup(self.cycles, period='week')
+        with self.assertRaises(ValueError):
+            harvest_rollup(self.cycles, date_field='created_at')
+
+    def test_query_options(self):
+        self.assertEqual(parse_rollup_query({}), {
+            'period': 'month', 'date_field': 'actual_harvest_date', 'start_date': None, 'end_date': None, 'by_crop': True,
+        })
+        self.assertEqual(
+            parse_rollup_query({'period': 'season', 'date_field': 'planting_date', 'start': '2023-01-01', 'by_crop': '0'}),
+            {'period': 'season', 'date_field': 'planting_date', 'start_date': date(2023, 1, 1), 'end_date': None, 'by_crop': False}
+        )
+
+    def test_invalid_query_options(self):
+        for params in ({'period': 'week'}, {'date_field': 'created_at'}, {'start': '01/02/2023'}, {'end': '2023-13-01'}):
+            with self.subTest(params=params), self.assertRaises(ValueError):
+                parse_rollup_query(params)
+
+    def test_yield_analytics_page(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse('farms:yield_analytics'))
+
+        self.assertEqual(response.status_code, 200)
+
+
+class DashboardSummaryTest(FarmTestCase):
+    today = date(2024, 5, 15)
+
+    def setUp(self):
+        super().setUp()
+        self.crop = Crop.objects.create(name='Maize', average_growing_period_days=120)
+        self.cycle(date(2024, 4, 1), 'active', expected_harvest_date=date(2024, 6, 1), expected_yield_kg=Decimal('900'))
+        self.cycle(date(2024, 5, 1), 'planned')
+        self.budget('Season budget', Decimal('5000'), Decimal('3000'))
+        self.activity('Weed')
+        self.event('Overdue weeding', date(2024, 5, 1))
+        self.event('Spraying', date(2024, 5, 18))
+        self.event('Weekly scouting', date(2024, 4, 1), is_recurring=True, recurrence_pattern='weekly')
+        self.built = []
+
+    def cycle(self, planting_date, status, **fields):
+        return CropCycle.objects.create(field=self.field, crop=self.crop, planting_date=planting_date, status=status, **fields)
+
+    def budget(self, title, income, expenses):
+        return Budget.objects.create(
+            user=self.user, farm=self.farm, title=title, start_date=date(2024, 1, 1), end_date=date(2024, 12, 31),
+            total_planned_income=income, total_planned_expenses=expenses
+        )
+
+    def activity(self, title):
+        return Activity.objects.create(
+            field=self.field, activity_type='weed_control', title=title, planned_date=self.today, created_by=self.user
+        )
+
+    def event(self, title, start_date, **fields):
+        return CropCalendar.objects.create(
+            farm=self.farm, event_type='weeding', title=title, start_date=start_date, created_by=self.user, **fields
+        )
+
+    def summary(self, today=None):
+        """The summary, recording which sections were rebuilt"""
+        spies = {
+            name: (lambda name, build: lambda user, today: self.built.append(name) or build(user, today))(name, build)
+            for name, build in SECTIONS.items()
+        }
+        self.built = []
+        with mock.patch.dict(SECTIONS, spies):
+            summary = get_dashboard_summary(self.user, today or self.today)
+        return dashboard_context(summary)
+
+    def test_first_load_builds_every_section(self):
+        self.summary()
+        self.assertEqual(sorted(self.built), sorted(SECTIONS))
+
+    def test_unchanged_summary_is_reused(self):
+        self.summary()
+        self.summary()
+        self.assertEqual(self.built, [])
+
+    def test_each_write_rebuilds_only_its_section(self):
+        self.summary()
+        # A new cycle also plans its calendar events
+        writes = {
+            ('calendar', 'cycles'): lambda: self.cycle(date(2024, 5, 10), 'planned'),
+            ('budgets',): lambda: self.budget('Extra', Decimal('1'), Decimal('1')),
+            ('activities',): lambda: self.activity('Irrigate'),
+            ('calendar',): lambda: self.event('Fencing', date(2024, 5, 20)),
+        }
+        for sections, write in writes.items():
+            with self.subTest(sections=sections):
+                write()
+                self.summary()
+                self.assertEqual(sorted(self.built), list(sections))
+
+    def test_dated_sections_are_rebuilt_the_next_day(self):
+        self.summary()
+        self.summary(self.today + timedelta(days=1))
+        self.assertEqual(sorted(self.built), ['calendar', 'cycles'])
+
+    def test_figures_match_the_direct_queries(self):
+        context = self.summary()
+
+        cycles = CropCycle.objects.filter(field__farm__owner=self.user, status__in=['planned', 'active'])
+        budgets = Budget.objects.filter(user=self.user)
+        self.assertEqual(context['total_crops'], cycles.values('crop').distinct().count())
+        self.assertEqual(context['expected_yield'], cycles.aggregate(total=Sum('expected_yield_kg'))['total'])
+        self.assertEqual(context['total_area'], cycles.aggregate(total=Sum('field__size'))['total'])
+        self.assertEqual(
+            [(row['crop__name'], row['total_area']) for row in context['crop_distribution']],
+            [(row['crop__name'], row['total_area']) for row in cycles.values('crop__name').annotate(total_area=Sum('field__size'))]
+        )
+        self.assertEqual([cycle.expected_harvest_date for cycle in context['upcoming_harvests']], [date(2024, 6, 1)])
+        self.assertEqual(context['active_budgets_count'], budgets.count())
+        self.assertEqual(context['total_planned_income'], Decimal('5000'))
+        self.assertEqual(context['total_planned_expenses'], Decimal('3000'))
+        self.assertEqual([budget.title for budget in context['recent_budgets']], ['Season budget'])
+        self.assertEqual([activity.title for activity in context['recent_activities']], ['Weed'])
+        self.assertEqual(
+            [event.id for event in context['upcoming_calendar_events']],
+            list(CropCalendar.objects.filter(
+                farm__owner=self.user, status__in=['planned', 'in_progress'],
+                start_date__gte=self.today, start_date__lte=self.today + timedelta(days=7)
+            ).order_by('start_date', 'priority').values_list('id', flat=True))
+        )
+
+    def test_overdue_events_match_the_calendar_page(self):
+        context = self.summary()
+        month = build_month_calendar(self.user, 2024, 5, self.today)
+
+        overdue = [event.title for event in context['overdue_calendar_events']]
+        self.assertIn('Overdue weeding', overdue)
+        self.assertNotIn('Weekly scouting', overdue)
+        self.assertEqual(
+            [event.title for event in context['overdue_calendar_events']],
+            [event.title for event in month['overdue_events']]
+        )
+
+
+class YieldStatisticsTest(FarmTestCase):
+    YIELDS = [4200.5, 3900, 5100.25, 4800, 3650.75]
+
+    def setUp(self):
+        super().setUp()
+        self.crop = Crop.objects.create(name='Maize', average_growing_period_days=120)
+        self.cycles = [self.harvest(yield_kg, year) for year, yield_kg in enumerate(self.YIELDS, 2019)]
+
+    def harvest(self, yield_kg, year):
+        return CropCycle.objects.create(
+            field=self.field, crop=self.crop, planting_date=date(year, 4, 1), status='harvested',
+            actual_harvest_date=date(year, 8, 1), actual_yield_kg=Decimal(str(yield_kg))
+        )
+
+    def stats(self):
+        return CropYieldStatistics.objects.get(user=self.user, crop=self.crop)
+
+    def assertMatchesYields(self, stats, yields):
+        self.assertEqual(stats.harvest_count, len(yields))
+        self.assertAlmostEqual(stats.mean_yield_kg, statistics.mean(yields))
+        self.assertAlmostEqual(stats.variance, statistics.variance(yields), places=6)
+        self.assertEqual((stats.min_yield_kg, stats.max_yield_kg), (min(yields), max(yields)))
+        self.assertAlmostEqual(stats.total_yield_kg, sum(yields))
+        self.assertAlmostEqual(stats.total_area, 2.5 * len(yields))
+
+    def assertMatchesRebuild(self):
+        incremental = self.stats()
+        rebuild_yield_statistics(self.user.id)
+        rebuilt = self.stats()
+        for name in ('harvest_count', 'min_yield_kg', 'max_yield_kg'):
+            self.assertEqual(getattr(incremental, name), getattr(rebuilt, name))
+        for name in ('mean_yield_kg', 'sum_squared_deviations', 'total_yield_kg', 'area_yield_kg', 'total_area'):
+            self.assertAlmostEqual(getattr(incremental, name), getattr(rebuilt, name), places=6)
+
+    def test_harvests_accumulate(self):
+        self.assertMatchesYields(self.stats(), self.YIELDS)
+        self.assertMatchesRebuild()
+
+    def test_corrected_yield_is_replaced(self):
+        cycle = self.cycles[1]
+        cycle.actual_yield_kg = Decimal('4400')
+        cycle.save()
+
+        self.assertMatchesYields(self.stats(), [4200.5, 4400, 5100.25, 4800, 3650.75])
+        self.assertMatchesRebuild()
+
+    def test_deleted_harvest_is_taken_back(self):
+        self.cycles[0].delete()
+
+        self.assertMatchesYields(self.stats(), self.YIELDS[1:])
+        self.assertMatchesRebuild()
+
+    def test_removing_the_maximum_rebuilds_the_range(self):
+        self.cycles[2].delete()
+
+        self.assertEqual(self.stats().max_yield_kg, 4800)
+        self.assertMatchesRebuild()
+
+    def test_cycle_leaving_harvested_status_is_removed(self):
+        for cycle in self.cycles[1:]:
+            cycle.delete()
+        self.cycles[0].status = 'active'
+        self.cycles[0].save()
+
+        stats = self.stats()
+        self.assertEqual(stats.harvest_count, 0)
+        self.assertEqual(stats.variance, 0)
+        self.assertIsNone(stats.max_yield_kg)
+
+    def test_add_then_remove_restores_statistics(self):
+        stats = CropYieldStatistics(user=self.user, crop=self.crop)
+        for yield_kg in self.YIELDS:
+            stats.add_harvest(yield_kg, 2.5)
+        stats.add_harvest(4500, 2.5)
+
+        self.assertTrue(stats.remove_harvest(4500, 2.5))
+
+        self.assertMatchesYields(stats, self.YIELDS)
+
+
+class YieldPredictionTest(FarmTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.crop = Crop.objects.create(name='Maize', average_growing_period_days=120)
+        for year in range(2014, 2024):
+            CropCycle.objects.create(
+                field=self.field, crop=self.crop, planting_date=date(year, 4, 1), status='harvested',
+                actual_harvest_date=date(year, 8, 1), actual_yield_kg=Decimal(5000 + year)
+            )
+
+        self.other = User.objects.create_user(username='neighbour', email='neighbour@example.com', password='secret')
+        farm = Farm.objects.create(name='Other Farm', owner=self.other, farm_type='crop', location='Kano', size=Decimal('5'))
+        self.other_field = FarmSection.objects.create(farm=farm, name='South Field', size=Decimal('2.5'))
+
+    def growing_cycle(self, field):
+        return CropCycle.objects.create(field=field, crop=self.crop, planting_date=date(2024, 4, 1), status='active')
+
+    def test_predictions_use_own_harvests(self):
+        [prediction] = predict_cycle_yields(self.user, [self.growing_cycle(self.field)])
+
+        self.assertGreater(prediction['predicted_yield_kg'], 0)
+        self.assertNotEqual(prediction['confidence'], 'Very Low')
+
+    def test_other_users_harvests_are_not_used(self):
+        [prediction] = predict_cycle_yields(self.other, [self.growing_cycle(self.other_field)])
+
+        self.assertEqual(prediction['predicted_yield_kg'], 0)
+        self.assertEqual(prediction['confidence'], 'Very Low')
+
+    def test_harvest_change_drops_the_owners_cached_model(self):
+        predict_cycle_yields(self.user, [self.growing_cycle(self.field)])
+        self.assertIsNotNone(cache.get(yield_model_cache_key(self.user.id, self.crop.id)))
+
+        cycle = CropCycle.objects.filter(status='harvested').first()
+        cycle.actual_yield_kg = Decimal('100')
+        cycle.save()
 
-# Create your tests here.
+        self.assertIsNone(cache.get(yield_model_cache_key(self.user.id, self.crop.id)))
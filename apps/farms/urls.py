@@ -37,6 +37,9 @@ urlpatterns = [
     # Excel Template and Bulk Upload URLs
     path('calendar/download-template/', views.crop_calendar_download_template, name='crop_calendar_download_template'),
     path('calendar/bulk-upload/', views.crop_calendar_bulk_upload, name='crop_calendar_bulk_upload'),
+    path('calendar/imports/<int:job_id>/report/', views.crop_calendar_import_report, name='crop_calendar_import_report'),
+    path('calendar/feed/<str:token>.ics', views.crop_calendar_feed, name='crop_calendar_feed'),
+    path('calendar/feed/reset/', views.crop_calendar_feed_reset, name='crop_calendar_feed_reset'),
     
     # Seasonal Planning URLs
     path('planning/', views.seasonal_planning_list, name='seasonal_planning_list'),
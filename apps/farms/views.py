@@ -1,18 +1,30 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Count, Sum, Q, F
-from django.http import JsonResponse, HttpResponse
-from django.contrib.auth.models import User
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
-from openpyxl.utils import get_column_letter
+from django.db.models import Avg, Count, Max, Min, Sum, Q, F
+from django.http import JsonResponse, HttpResponse, FileResponse, StreamingHttpResponse, Http404
+from django.core import signing
+from django.urls import reverse
+from django.views.decorators.http import condition
+from django.conf import settings
 from datetime import datetime
 import io
 from .models import (
     Farm, FarmSection, Crop, CropVariety, CropCycle,
-    CropCalendar, SeasonalPlanning, PlannedCropAllocation, CropRotationPlan
+    CropCalendar, CalendarImportJob, SeasonalPlanning, PlannedCropAllocation, CropRotationPlan
 )
+from .calendar_import import CalendarEventImporter, count_calendar_rows
+from .calendar_feed import (
+    FEED_CONTENT_TYPE, feed_events, feed_state, iter_calendar, make_feed_token, read_feed_token, reset_feed_token
+)
+from .calendar_read import get_month_calendar
+from .dashboard_summary import dashboard_context, get_dashboard_summary
+from .calendar_template import TEMPLATE_CONTENT_TYPE, get_calendar_template
+from .yield_statistics import overall_yield_per_hectare, yield_statistics_by_crop
+from .yield_prediction import predict_cycle_yields
+from .harvest_rollup import harvest_rollup, rollup_series
+from .rotation_planner import RotationPlanner
+from tasks.calendar import import_calendar_events
 from django.utils import timezone
 from datetime import timedelta
 
@@ -262,122 +274,11 @@ def crop_dashboard(request, crop_cycle_id=None):
         return render(request, 'farms/crop_dashboard.html', context)
     
     else:
-        # Get user's farms
-        farms = Farm.objects.filter(owner=request.user)
-        
-        # Count total crops planted
-        total_crops = CropCycle.objects.filter(
-            field__farm__owner=request.user,
-            status__in=['planned', 'active']
-        ).values('crop').distinct().count()
-        
-        # Get crop distribution
-        crop_distribution = CropCycle.objects.filter(
-            field__farm__owner=request.user,
-            status__in=['planned', 'active']
-        ).values('crop__name').annotate(
-            total_area=Sum('field__size')
-        ).order_by('-total_area')[:4]  # Top 4 crops by area
-        
-        # Calculate expected yields
-        expected_yield = CropCycle.objects.filter(
-            field__farm__owner=request.user,
-            status__in=['planned', 'active']
-        ).aggregate(total=Sum('expected_yield_kg'))['total'] or 0
-        
-        # Calculate total area under cultivation
-        total_area = CropCycle.objects.filter(
-            field__farm__owner=request.user,
-            status__in=['planned', 'active']
-        ).aggregate(total=Sum('field__size'))['total'] or 0
-        
-        # Determine overall growth stage (simplified)
-        now = timezone.now().date()
-        active_cycles = CropCycle.objects.filter(
-            field__farm__owner=request.user,
-            status='active',
-            planting_date__lte=now
-        )
-        
-        growth_stage = 'No active crops'
-        if active_cycles.exists():
-            # Simple logic to determine average growth stage
-            early_stage = active_cycles.filter(planting_date__gte=now-timedelta(days=30)).count()
-            mid_stage = active_cycles.filter(planting_date__lt=now-timedelta(days=30), 
-                                           planting_date__gte=now-timedelta(days=60)).count()
-            late_stage = active_cycles.filter(planting_date__lt=now-timedelta(days=60)).count()
-            
-            if early_stage > mid_stage and early_stage > late_stage:
-                growth_stage = 'Early'
-            elif mid_stage > early_stage and mid_stage > late_stage:
-                growth_stage = 'Mid'
-            else:
-                growth_stage = 'Late'
-        
-        # Get upcoming harvests
-        upcoming_harvests = CropCycle.objects.filter(
-            field__farm__owner=request.user,
-            status='active',
-            expected_harvest_date__gte=now,
-            expected_harvest_date__lte=now+timedelta(days=30)
-        ).select_related('crop', 'field')
-        
-        # Get active budgets (current date falls between start_date and end_date)
-        active_budgets = Budget.objects.filter(
-            user=request.user,
-            # start_date__lte=now,
-            # end_date__gte=now
-        )
-        active_budgets_count = active_budgets.count()
-        
-        # Get recent activities for this crop cycle
-        recent_activities = Activity.objects.filter(created_by=request.user).order_by('-created_at')[:5]
-        
-        # Get upcoming calendar events (next 7 days)
-        upcoming_calendar_events = CropCalendar.objects.filter(
-            farm__owner=request.user,
-            start_date__gte=now,
-            start_date__lte=now + timedelta(days=7),
-            status__in=['planned', 'in_progress']
-        ).select_related('farm', 'crop_cycle').order_by('start_date', 'priority')[:5]
+        # Figures come from the user's precomputed summary, rebuilt only where stale
+        summary = get_dashboard_summary(request.user, timezone.now().date())
         
-        # Get overdue calendar events
-        overdue_calendar_events = CropCalendar.objects.filter(
-            farm__owner=request.user,
-            start_date__lt=now,
-            status__in=['planned', 'in_progress']
-        ).select_related('farm', 'crop_cycle').order_by('start_date')[:5]
-        
-        # Get recent budgets
-        recent_budgets = Budget.objects.filter(user=request.user).order_by('-created_at')[:5]
-        
-        # Calculate total planned income and expenses
-        budget_totals = Budget.objects.filter(user=request.user).aggregate(
-            total_planned_income=Sum('total_planned_income'),
-            total_planned_expenses=Sum('total_planned_expenses')
-        )
-        
-        total_planned_income = budget_totals['total_planned_income'] or 0
-        total_planned_expenses = budget_totals['total_planned_expenses'] or 0
-        
-        context = {
-            'farms': farms,
-            'total_crops': total_crops,
-            'crop_distribution': crop_distribution,
-            'expected_yield': expected_yield,
-            'growth_stage': growth_stage,
-            'upcoming_harvests': upcoming_harvests,
-            'active_page': 'crops',
-            # Budget data
-            'active_budgets_count': active_budgets_count,
-            'recent_activities': recent_activities,
-            'recent_budgets': recent_budgets,
-            'total_planned_income': total_planned_income,
-            'total_planned_expenses': total_planned_expenses,
-            # Calendar data
-            'upcoming_calendar_events': upcoming_calendar_events,
-            'overdue_calendar_events': overdue_calendar_events,
-        }
+        context = dashboard_context(summary)
+        context['active_page'] = 'crops'
         
         return render(request, 'farms/crop_dashboard.html', context)
 
@@ -660,75 +561,35 @@ def get_farm_fields(request):
 def crop_calendar_view(request):
     """View to display the crop calendar"""
     # Get current month/year or from query params
-    from django.utils import timezone
     import calendar
-    from datetime import datetime, date
     
     today = timezone.now().date()
     current_month = int(request.GET.get('month', today.month))
     current_year = int(request.GET.get('year', today.year))
     
-    # Get calendar events for the current month
-    start_date = date(current_year, current_month, 1)
-    # Get last day of month
-    last_day = calendar.monthrange(current_year, current_month)[1]
-    end_date = date(current_year, current_month, last_day)
-    
-    # Get user's calendar events
-    calendar_events = CropCalendar.objects.filter(
-        farm__owner=request.user,
-        start_date__lte=end_date,
-        end_date__gte=start_date
-    ).select_related('farm', 'crop_cycle', 'assigned_to').order_by('start_date', 'priority')
-    
-    # Get upcoming events (next 30 days)
-    upcoming_events = CropCalendar.objects.filter(
-        farm__owner=request.user,
-        start_date__gte=today,
-        start_date__lte=today + timedelta(days=30)
-    ).select_related('farm', 'crop_cycle').order_by('start_date')[:10]
-    
-    # Get overdue events
-    overdue_events = CropCalendar.objects.filter(
-        farm__owner=request.user,
-        start_date__lt=today,
-        status__in=['planned', 'in_progress']
-    ).select_related('farm', 'crop_cycle').order_by('start_date')[:10]
-    
     # Calendar navigation
     prev_month = current_month - 1 if current_month > 1 else 12
     prev_year = current_year if current_month > 1 else current_year - 1
     next_month = current_month + 1 if current_month < 12 else 1
     next_year = current_year if current_month < 12 else current_year + 1
     
-    # Generate calendar data
-    cal = calendar.monthcalendar(current_year, current_month)
-    month_name = calendar.month_name[current_month]
-    
-    # Group events by date for calendar display
-    events_by_date = {}
-    for event in calendar_events:
-        event_date = event.start_date
-        if event_date not in events_by_date:
-            events_by_date[event_date] = []
-        events_by_date[event_date].append(event)
-    
     context = {
-        'calendar_events': calendar_events,
-        'upcoming_events': upcoming_events,
-        'overdue_events': overdue_events,
-        'events_by_date': events_by_date,
-        'calendar_data': cal,
         'current_month': current_month,
         'current_year': current_year,
-        'month_name': month_name,
+        'month_name': calendar.month_name[current_month],
         'prev_month': prev_month,
         'prev_year': prev_year,
         'next_month': next_month,
         'next_year': next_year,
         'today': today,
+        'import_jobs': CalendarImportJob.objects.filter(user=request.user)[:5],
+        'calendar_feed_url': request.build_absolute_uri(
+            reverse('farms:crop_calendar_feed', args=[make_feed_token(request.user)])
+        ),
         'active_page': 'calendar'
     }
+    # Month grid, upcoming and overdue events, built with one query and cached per month
+    context.update(get_month_calendar(request.user, current_year, current_month, today))
     
     return render(request, 'farms/crop_calendar.html', context)
 
@@ -816,6 +677,47 @@ def crop_calendar_complete(request, event_id):
     
     return JsonResponse({'success': False, 'message': 'Invalid request method.'})
 
+def _calendar_feed_state(request, token):
+    """Resolve a feed request once and memoize it for the conditional GET callbacks"""
+    if not hasattr(request, '_calendar_feed'):
+        try:
+            user_id = read_feed_token(token)
+        except signing.BadSignature:
+            raise Http404("Calendar feed not found")
+        
+        farm_id = request.GET.get('farm')
+        events = feed_events(user_id, int(farm_id) if farm_id and farm_id.isdigit() else None)
+        last_modified, count = feed_state(events)
+        request._calendar_feed = {
+            'events': events,
+            'last_modified': last_modified,
+            'etag': f"{last_modified.timestamp() if last_modified else 0}-{count}",
+        }
+    return request._calendar_feed
+
+@condition(
+    etag_func=lambda request, token: _calendar_feed_state(request, token)['etag'],
+    last_modified_func=lambda request, token: _calendar_feed_state(request, token)['last_modified']
+)
+def crop_calendar_feed(request, token):
+    """iCalendar feed of a user's calendar events, optionally for one farm (?farm=<id>)"""
+    feed = _calendar_feed_state(request, token)
+    
+    response = StreamingHttpResponse(
+        iter_calendar(feed['events'], request.get_host()),
+        content_type=FEED_CONTENT_TYPE
+    )
+    response['Content-Disposition'] = 'inline; filename="crop_calendar.ics"'
+    return response
+
+@login_required
+def crop_calendar_feed_reset(request):
+    """Revoke the user's calendar feed link, for when it was shared by mistake"""
+    if request.method == 'POST':
+        reset_feed_token(request.user)
+        messages.success(request, 'Your calendar feed link was reset. Subscribe again with the new link.')
+    return redirect('farms:crop_calendar')
+
 # Seasonal Planning Views
 @login_required
 def seasonal_planning_list(request):
@@ -920,33 +822,8 @@ def crop_rotation_recommendations(request):
         rotation_plans__is_active=True
     ).select_related('farm')
     
-    # Get recent crop history for each field
-    field_history = {}
-    for field in fields_without_rotation:
-        recent_cycles = CropCycle.objects.filter(
-            field=field,
-            status='harvested'
-        ).select_related('crop').order_by('-actual_harvest_date')[:3]
-        field_history[field.id] = recent_cycles
-    
-    # Simple rotation recommendations (can be enhanced with AI later)
-    recommendations = []
-    for field in fields_without_rotation:
-        recent_crops = field_history.get(field.id, [])
-        if recent_crops:
-            last_crop = recent_crops[0].crop
-            # Simple logic: recommend different crop families
-            recommended_crops = Crop.objects.exclude(id=last_crop.id)[:3]
-        else:
-            # Default recommendations for new fields
-            recommended_crops = Crop.objects.all()[:3]
-        
-        recommendations.append({
-            'field': field,
-            'recent_crops': recent_crops,
-            'recommended_crops': recommended_crops,
-            'reasoning': generate_rotation_reasoning(recent_crops, recommended_crops)
-        })
+    # Score the whole catalogue against every field's last harvests in one pass
+    recommendations = RotationPlanner().plan(fields_without_rotation)
     
     context = {
         'recommendations': recommendations,
@@ -955,27 +832,6 @@ def crop_rotation_recommendations(request):
     }
     return render(request, 'farms/crop_rotation_recommendations.html', context)
 
-def generate_rotation_reasoning(recent_crops, recommended_crops):
-    """Generate simple reasoning for crop rotation recommendations"""
-    if not recent_crops:
-        return "This field is new, so we recommend starting with nitrogen-fixing legumes to improve soil health."
-    
-    last_crop = recent_crops[0].crop
-    reasons = []
-    
-    # Simple logic - can be enhanced
-    if 'nitrogen' in last_crop.name.lower() or 'bean' in last_crop.name.lower() or 'pea' in last_crop.name.lower():
-        reasons.append("Previous legume crop has enriched soil with nitrogen")
-        reasons.append("Good time to plant heavy feeders like corn or leafy greens")
-    elif 'corn' in last_crop.name.lower() or 'maize' in last_crop.name.lower():
-        reasons.append("Corn is a heavy feeder, soil needs restoration")
-        reasons.append("Legumes will replenish nitrogen levels")
-    else:
-        reasons.append("Rotation will break pest and disease cycles")
-        reasons.append("Different root depths will improve soil structure")
-    
-    return "; ".join(reasons)
-
 # Yield Analytics Views
 @login_required
 def yield_analytics(request):
@@ -995,7 +851,7 @@ def yield_analytics(request):
     
     # Yield trends by crop
     crop_yield_trends = historical_cycles.values(
-        'crop__name'
+        'crop_id', 'crop__name'
     ).annotate(
         avg_yield=Avg('actual_yield_kg'),
         total_cycles=Count('id'),
@@ -1004,17 +860,8 @@ def yield_analytics(request):
         total_area=Sum('field__size')
     ).order_by('-avg_yield')
     
-    # Monthly yield patterns
-    monthly_yields = {}
-    for cycle in historical_cycles:
-        if cycle.actual_harvest_date:
-            month = cycle.actual_harvest_date.strftime('%B')
-            crop = cycle.crop.name
-            if month not in monthly_yields:
-                monthly_yields[month] = {}
-            if crop not in monthly_yields[month]:
-                monthly_yields[month][crop] = []
-            monthly_yields[month][crop].append(float(cycle.actual_yield_kg))
+    # Monthly yield patterns: average yield per crop and calendar month
+    monthly_yields = rollup_series(harvest_rollup(historical_cycles, period='month_of_year'))
     
     # Field performance comparison
     field_performance = historical_cycles.values(
@@ -1032,21 +879,19 @@ def yield_analytics(request):
         expected_harvest_date__isnull=False
     ).select_related('crop', 'field')
     
+    # Running statistics per crop, maintained as cycles are harvested
+    yield_statistics = yield_statistics_by_crop(request.user)
+    
+    # Per-crop regression models score all active cycles in one batch
+    active_cycles = list(active_cycles)
     yield_predictions = []
-    for cycle in active_cycles:
-        # Simple prediction based on historical averages
-        historical_avg = historical_cycles.filter(
-            crop=cycle.crop
-        ).aggregate(avg_yield=Avg('actual_yield_kg'))['avg_yield'] or 0
-        
-        # Factor in field size for total prediction
-        predicted_total = float(historical_avg) * float(cycle.field.size)
-        
+    for cycle, prediction in zip(active_cycles, predict_cycle_yields(request.user, active_cycles)):
+        stats = yield_statistics.get(cycle.crop_id)
         yield_predictions.append({
             'cycle': cycle,
-            'predicted_yield_kg': predicted_total,
-            'historical_avg': historical_avg,
-            'confidence': calculate_prediction_confidence(cycle, historical_cycles)
+            'predicted_yield_kg': prediction['predicted_yield_kg'],
+            'historical_avg': stats.mean_yield_kg if stats else 0,
+            'confidence': prediction['confidence']
         })
     
     # Performance insights
@@ -1060,37 +905,12 @@ def yield_analytics(request):
         'yield_predictions': yield_predictions,
         'insights': insights,
         'total_harvested': historical_cycles.aggregate(Sum('actual_yield_kg'))['actual_yield_kg__sum'] or 0,
-        'avg_yield_per_hectare': calculate_avg_yield_per_hectare(historical_cycles),
+        'avg_yield_per_hectare': overall_yield_per_hectare(yield_statistics.values()),
         'active_page': 'analytics'
     }
     
     return render(request, 'farms/yield_analytics.html', context)
 
-def calculate_prediction_confidence(cycle, historical_cycles):
-    """Calculate confidence level for yield prediction"""
-    similar_cycles = historical_cycles.filter(crop=cycle.crop).count()
-    
-    if similar_cycles >= 10:
-        return 'High'
-    elif similar_cycles >= 5:
-        return 'Medium'
-    elif similar_cycles >= 2:
-        return 'Low'
-    else:
-        return 'Very Low'
-
-def calculate_avg_yield_per_hectare(historical_cycles):
-    """Calculate average yield per hectare across all crops"""
-    total_yield = 0
-    total_area = 0
-    
-    for cycle in historical_cycles:
-        if cycle.actual_yield_kg and cycle.field.size:
-            total_yield += float(cycle.actual_yield_kg)
-            total_area += float(cycle.field.size)
-    
-    return round(total_yield / total_area, 2) if total_area > 0 else 0
-
 def generate_yield_insights(historical_cycles, crop_yield_trends):
     """Generate insights from yield data"""
     insights = []
@@ -1144,7 +964,6 @@ def generate_yield_insights(historical_cycles, crop_yield_trends):
 @login_required
 def crop_performance_detail(request, crop_id):
     """Detailed performance view for a specific crop"""
-    from django.db.models import Avg, Count, Sum
     import json
     
     crop = get_object_or_404(Crop, id=crop_id)
@@ -1178,28 +997,17 @@ def crop_performance_detail(request, crop_id):
         cycle_count=Count('id')
     ).order_by('-avg_yield')
     
-    # Yield over time (for chart)
-    yield_timeline = []
-    for cycle in crop_cycles:
-        yield_timeline.append({
-            'date': cycle.actual_harvest_date.strftime('%Y-%m-%d'),
-            'yield': float(cycle.actual_yield_kg),
-            'field': cycle.field.name
-        })
-    
-    # Growing season analysis
-    season_performance = {}
-    for cycle in crop_cycles:
-        season = get_season_from_date(cycle.planting_date)
-        if season not in season_performance:
-            season_performance[season] = {'yields': [], 'count': 0}
-        season_performance[season]['yields'].append(float(cycle.actual_yield_kg))
-        season_performance[season]['count'] += 1
+    # Yield over time (for chart), per harvest month
+    yield_timeline = [
+        {'date': row['period'], 'yield': row['avg_yield_kg'], 'harvests': row['harvest_count']}
+        for row in harvest_rollup(crop_cycles, period='month', by_crop=False)
+    ]
     
-    # Calculate averages for seasons
-    for season in season_performance:
-        yields = season_performance[season]['yields']
-        season_performance[season]['avg'] = sum(yields) / len(yields)
+    # Growing season analysis, by planting season
+    season_performance = {
+        row['period']: {'avg': row['avg_yield_kg'], 'count': row['harvest_count']}
+        for row in harvest_rollup(crop_cycles, period='season', by_crop=False, date_field='planting_date')
+    }
     
     context = {
         'crop': crop,
@@ -1213,191 +1021,17 @@ def crop_performance_detail(request, crop_id):
     
     return render(request, 'farms/crop_performance_detail.html', context)
 
-def get_season_from_date(date):
-    """Determine season from planting date"""
-    month = date.month
-    if month in [12, 1, 2]:
-        return 'Winter'
-    elif month in [3, 4, 5]:
-        return 'Spring'
-    elif month in [6, 7, 8]:
-        return 'Summer'
-    else:
-        return 'Fall'
-
 # Excel Template and Bulk Upload Views
 
 @login_required
 def crop_calendar_download_template(request):
     """Generate and download Excel template for bulk calendar events upload"""
-    # Create a new workbook and worksheet
-    workbook = openpyxl.Workbook()
-    worksheet = workbook.active
-    worksheet.title = "Calendar Events Template"
-    
-    # Define headers
-    headers = [
-        'Farm Name', 'Field Name', 'Event Type', 'Title', 'Description',
-        'Start Date', 'End Date', 'Priority', 'Status', 'Is Recurring',
-        'Recurrence Pattern', 'Recurrence Interval', 'Assigned To Email',
-        'Weather Dependent', 'Min Temperature', 'Max Temperature', 
-        'Max Wind Speed', 'No Rain Required', 'Estimated Cost'
-    ]
-    
-    # Style definitions
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="2E7D32", end_color="2E7D32", fill_type="solid")
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    # Write headers with styling
-    for col, header in enumerate(headers, 1):
-        cell = worksheet.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.border = border
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-    
-    # Auto-adjust column widths
-    for col in range(1, len(headers) + 1):
-        column_letter = get_column_letter(col)
-        worksheet.column_dimensions[column_letter].width = 15
-    
-    # Add data validation sheet
-    validation_sheet = workbook.create_sheet("Reference Data")
-    
-    # Get user's farms and fields
-    user_farms = Farm.objects.filter(owner=request.user)
-    farm_names = [farm.name for farm in user_farms]
-    field_names = []
-    for farm in user_farms:
-        for field in farm.sections.all():
-            field_names.append(f"{farm.name} - {field.name}")
-    
-    # Event types
-    event_types = ['planting', 'fertilizing', 'weeding', 'watering', 'pest_control', 
-                   'pruning', 'harvesting', 'soil_preparation', 'maintenance', 'other']
-    
-    # Priority levels
-    priorities = ['low', 'medium', 'high', 'critical']
-    
-    # Status options
-    statuses = ['planned', 'in_progress', 'completed', 'cancelled', 'overdue']
-    
-    # Recurrence patterns
-    recurrence_patterns = ['daily', 'weekly', 'monthly']
-    
-    # Add reference data to validation sheet
-    validation_data = {
-        'Farm Names': farm_names,
-        'Field Names': field_names,
-        'Event Types': event_types,
-        'Priorities': priorities,
-        'Statuses': statuses,
-        'Recurrence Patterns': recurrence_patterns
-    }
-    
-    col = 1
-    for category, items in validation_data.items():
-        validation_sheet.cell(row=1, column=col, value=category).font = Font(bold=True)
-        for row, item in enumerate(items, 2):
-            validation_sheet.cell(row=row, column=col, value=item)
-        col += 1
-    
-    # Add example rows to main sheet
-    example_data = [
-        [
-            'Main Farm', 'North Field', 'planting', 'Plant Maize', 
-            'Plant maize seeds in north field', '2024-03-15', '2024-03-17',
-            'high', 'planned', 'FALSE', '', '1', 'farmer@example.com',
-            'TRUE', '15', '35', '20', 'TRUE', '500.00'
-        ],
-        [
-            'Main Farm', 'South Field', 'fertilizing', 'Apply NPK Fertilizer',
-            'Apply NPK fertilizer to boost crop growth', '2024-04-01', '',
-            'medium', 'planned', 'FALSE', '', '1', '',
-            'FALSE', '', '', '', 'FALSE', '200.00'
-        ]
-    ]
-    
-    for row_num, row_data in enumerate(example_data, 2):
-        for col_num, value in enumerate(row_data, 1):
-            cell = worksheet.cell(row=row_num, column=col_num, value=value)
-            cell.border = border
-    
-    # Add instructions sheet
-    instructions_sheet = workbook.create_sheet("Instructions")
-    instructions = [
-        "CROP CALENDAR BULK UPLOAD INSTRUCTIONS",
-        "",
-        "1. REQUIRED FIELDS (must be filled):",
-        "   - Farm Name: Must match exactly with your existing farm names",
-        "   - Field Name: Must match exactly with your existing field names", 
-        "   - Event Type: Choose from the dropdown list",
-        "   - Title: Brief description of the event",
-        "   - Start Date: Format as YYYY-MM-DD (e.g., 2024-03-15)",
-        "",
-        "2. OPTIONAL FIELDS:",
-        "   - Description: Detailed event description",
-        "   - End Date: For multi-day events (format YYYY-MM-DD)",
-        "   - Priority: low, medium, high, critical (default: medium)",
-        "   - Status: planned, in_progress, completed, cancelled (default: planned)",
-        "   - Is Recurring: TRUE/FALSE (default: FALSE)",
-        "   - Recurrence Pattern: daily, weekly, monthly (if recurring)",
-        "   - Recurrence Interval: Number (e.g., 1 for every week, 2 for every 2 weeks)",
-        "   - Assigned To Email: Email of person assigned to the task",
-        "   - Weather Dependent: TRUE/FALSE",
-        "   - Min/Max Temperature: Minimum and maximum temperature in Celsius",
-        "   - Max Wind Speed: Maximum wind speed in km/h",
-        "   - No Rain Required: TRUE/FALSE",
-        "   - Estimated Cost: Cost in currency units",
-        "",
-        "3. IMPORTANT NOTES:",
-        "   - Delete the example rows before uploading",
-        "   - Farm and Field names must exist in your account",
-        "   - Dates must be in YYYY-MM-DD format",
-        "   - Boolean fields use TRUE/FALSE",
-        "   - Email addresses must be valid registered users",
-        "   - Save the file as Excel (.xlsx) format",
-        "",
-        "4. UPLOAD PROCESS:",
-        "   - Go to Crop Calendar page",
-        "   - Click 'Bulk Upload' button",
-        "   - Select your completed Excel file",
-        "   - Review the upload summary",
-        "   - Confirm to create events",
-        "",
-        "5. VALIDATION:",
-        "   - Invalid data will be highlighted in red",
-        "   - You can fix errors and re-upload",
-        "   - Only valid rows will be processed"
-    ]
-    
-    for row, instruction in enumerate(instructions, 1):
-        cell = instructions_sheet.cell(row=row, column=1, value=instruction)
-        if row == 1:  # Title
-            cell.font = Font(bold=True, size=14)
-        elif instruction.startswith(('1.', '2.', '3.', '4.', '5.')):  # Section headers
-            cell.font = Font(bold=True, size=12)
-    
-    instructions_sheet.column_dimensions['A'].width = 80
-    
-    # Prepare response
-    output = io.BytesIO()
-    workbook.save(output)
-    output.seek(0)
-    
-    response = HttpResponse(
-        output.getvalue(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    return FileResponse(
+        io.BytesIO(get_calendar_template(request.user)),
+        as_attachment=True,
+        filename='crop_calendar_template.xlsx',
+        content_type=TEMPLATE_CONTENT_TYPE
     )
-    response['Content-Disposition'] = 'attachment; filename="crop_calendar_template.xlsx"'
-    
-    return response
 
 @login_required
 def crop_calendar_bulk_upload(request):
@@ -1414,160 +1048,59 @@ def crop_calendar_bulk_upload(request):
             return redirect('farms:crop_calendar')
         
         try:
-            # Read the Excel file
-            workbook = openpyxl.load_workbook(file)
-            worksheet = workbook.active
-            
-            # Skip header row and example rows
-            data_rows = list(worksheet.iter_rows(min_row=4, values_only=True))
-            
-            # Filter out empty rows
-            data_rows = [row for row in data_rows if any(cell for cell in row)]
+            background_rows = settings.CALENDAR_IMPORT_BACKGROUND_ROWS
+            row_count = count_calendar_rows(file, limit=background_rows)
+            file.seek(0)
             
-            if not data_rows:
-                messages.warning(request, 'No data found in the Excel file. Please add events to upload.')
+            # Large uploads are imported in the background with a downloadable error report
+            if row_count > background_rows:
+                job = CalendarImportJob.objects.create(
+                    user=request.user,
+                    source_file=file,
+                    original_filename=file.name
+                )
+                import_calendar_events.delay(job.id)
+                messages.info(
+                    request,
+                    f'{file.name} is being imported in the background. '
+                    'Check Recent Imports on this page for the result and error report.'
+                )
                 return redirect('farms:crop_calendar')
             
-            # Validate and process data
-            valid_events = []
-            errors = []
+            importer = CalendarEventImporter(request.user)
+            stats = importer.run(file)
+            errors = [f"Row {row_num}: {error}" for row_num, error in importer.errors[:5]]
             
-            for row_num, row in enumerate(data_rows, 4):  # Start from row 4 (after headers and examples)
-                try:
-                    event_data = process_calendar_row(row, request.user, row_num)
-                    if event_data:
-                        valid_events.append(event_data)
-                except Exception as e:
-                    errors.append(f"Row {row_num}: {str(e)}")
-            
-            # Create events if validation passes
-            if valid_events and not errors:
-                created_count = 0
-                for event_data in valid_events:
-                    CropCalendar.objects.create(**event_data)
-                    created_count += 1
-                
-                messages.success(request, f'Successfully created {created_count} calendar events.')
-                
-            elif valid_events and errors:
+            if not stats['total_rows']:
+                messages.warning(request, 'No data found in the Excel file. Please add events to upload.')
+            elif not errors:
+                messages.success(request, f'Successfully created {stats["created_count"]} calendar events.')
+            elif stats['created_count']:
                 # Partial success
-                created_count = 0
-                for event_data in valid_events:
-                    CropCalendar.objects.create(**event_data)
-                    created_count += 1
-                
                 messages.warning(
                     request, 
-                    f'Created {created_count} events successfully. {len(errors)} rows had errors: {"; ".join(errors[:3])}'
+                    f'Created {stats["created_count"]} events successfully. {stats["error_count"]} rows had errors: {"; ".join(errors[:3])}'
                 )
             else:
-                messages.error(request, f'Upload failed. Errors found: {"; ".join(errors[:5])}')
+                messages.error(request, f'Upload failed. Errors found: {"; ".join(errors)}')
                 
         except Exception as e:
             messages.error(request, f'Error processing file: {str(e)}')
     
     return redirect('farms:crop_calendar')
 
-def process_calendar_row(row, user, row_num):
-    """Process a single row from Excel file and return validated event data"""
-    if not row or len(row) < 6:  # Minimum required fields
-        return None
-    
-    # Map row data to fields
-    farm_name = row[0]
-    field_name = row[1] 
-    event_type = row[2]
-    title = row[3]
-    description = row[4] or ''
-    start_date = row[5]
-    end_date = row[6] if len(row) > 6 and row[6] else None
-    priority = row[7] if len(row) > 7 and row[7] else 'medium'
-    status = row[8] if len(row) > 8 and row[8] else 'planned'
-    is_recurring = row[9] if len(row) > 9 else False
-    recurrence_pattern = row[10] if len(row) > 10 and row[10] else None
-    recurrence_interval = row[11] if len(row) > 11 and row[11] else 1
-    assigned_to_email = row[12] if len(row) > 12 and row[12] else None
-    weather_dependent = row[13] if len(row) > 13 else False
-    min_temperature = row[14] if len(row) > 14 and row[14] else None
-    max_temperature = row[15] if len(row) > 15 and row[15] else None
-    max_wind_speed = row[16] if len(row) > 16 and row[16] else None
-    no_rain_required = row[17] if len(row) > 17 else False
-    estimated_cost = row[18] if len(row) > 18 and row[18] else None
-    
-    # Validate required fields
-    if not all([farm_name, event_type, title, start_date]):
-        raise ValueError("Missing required fields: Farm Name, Event Type, Title, or Start Date")
-    
-    # Find farm
-    try:
-        farm = Farm.objects.get(name=farm_name, owner=user)
-    except Farm.DoesNotExist:
-        raise ValueError(f"Farm '{farm_name}' not found")
-    
-    # Parse date
-    if isinstance(start_date, str):
-        try:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-        except ValueError:
-            raise ValueError("Start date must be in YYYY-MM-DD format")
+@login_required
+def crop_calendar_import_report(request, job_id):
+    """Download the per-row error report of a background calendar import"""
+    job = get_object_or_404(CalendarImportJob, id=job_id, user=request.user)
     
-    if end_date and isinstance(end_date, str):
-        try:
-            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-        except ValueError:
-            raise ValueError("End date must be in YYYY-MM-DD format")
-    
-    # Validate choices
-    valid_event_types = ['planting', 'fertilizing', 'weeding', 'watering', 'pest_control', 
-                        'pruning', 'harvesting', 'soil_preparation', 'maintenance', 'other']
-    if event_type not in valid_event_types:
-        raise ValueError(f"Invalid event type: {event_type}")
-    
-    valid_priorities = ['low', 'medium', 'high', 'critical']
-    if priority not in valid_priorities:
-        raise ValueError(f"Invalid priority: {priority}")
-    
-    valid_statuses = ['planned', 'in_progress', 'completed', 'cancelled', 'overdue']
-    if status not in valid_statuses:
-        raise ValueError(f"Invalid status: {status}")
-    
-    # Find assigned user if email provided
-    assigned_to = None
-    if assigned_to_email:
-        try:
-            assigned_to = User.objects.get(email=assigned_to_email)
-        except User.DoesNotExist:
-            raise ValueError(f"User with email '{assigned_to_email}' not found")
-    
-    # Convert boolean fields
-    if isinstance(is_recurring, str):
-        is_recurring = is_recurring.upper() == 'TRUE'
-    if isinstance(weather_dependent, str):
-        weather_dependent = weather_dependent.upper() == 'TRUE'  
-    if isinstance(no_rain_required, str):
-        no_rain_required = no_rain_required.upper() == 'TRUE'
-    
-    # Build event data
-    event_data = {
-        'farm': farm,
-        'event_type': event_type,
-        'title': title,
-        'description': description,
-        'start_date': start_date,
-        'end_date': end_date,
-        'priority': priority,
-        'status': status,
-        'is_recurring': bool(is_recurring),
-        'recurrence_pattern': recurrence_pattern,
-        'recurrence_interval': int(recurrence_interval) if recurrence_interval else 1,
-        'assigned_to': assigned_to,
-        'weather_dependent': bool(weather_dependent),
-        'min_temperature': float(min_temperature) if min_temperature else None,
-        'max_temperature': float(max_temperature) if max_temperature else None,
-        'max_wind_speed': float(max_wind_speed) if max_wind_speed else None,
-        'no_rain_required': bool(no_rain_required),
-        'estimated_cost': float(estimated_cost) if estimated_cost else None,
-        'created_by': user
-    }
+    if not job.error_report:
+        messages.info(request, 'This import has no errors to report.')
+        return redirect('farms:crop_calendar')
     
-    return event_data
+    return FileResponse(
+        job.error_report.open('rb'),
+        as_attachment=True,
+        filename=f'calendar_import_{job.id}_errors.csv',
+        content_type='text/csv'
+    )
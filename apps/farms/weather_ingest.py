@@ -0,0 +1,234 @@
+import csv
+import json
+import os
+import time
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import connections, router, transaction
+from django.utils.module_loading import import_string
+
+from .models import Farm, WeatherRecord
+
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# Cap on the per-row errors kept in the report so memory stays bounded
+MAX_REPORTED_ERRORS = 100
+
+DECIMAL_FIELDS = [
+    'temperature_max', 'temperature_min', 'temperature_avg',
+    'rainfall_mm', 'humidity_percentage', 'wind_speed_kmh',
+]
+
+# Plausible range of each measurement; values outside it are feed or unit errors
+VALUE_RANGES = {
+    'temperature_max': (-90, 60),
+    'temperature_min': (-90, 60),
+    'temperature_avg': (-90, 60),
+    'rainfall_mm': (0, 2000),
+    'humidity_percentage': (0, 100),
+    'wind_speed_kmh': (0, 500),
+}
+
+DATA_SOURCES = {source for source, _ in WeatherRecord.SOURCE_CHOICES}
+
+# updated_at tells fingerprints and staleness checks that an observation was corrected
+UPDATE_FIELDS = DECIMAL_FIELDS + ['wind_direction', 'data_source', 'updated_at']
+
+
+class InvalidObservation(ValueError):
+    """Yielded by a provider in place of a row it couldn't parse, so ingestion counts it and goes on"""
+
+
+class WeatherProvider:
+    """
+    Source of weather observations.
+
+    Iterating a provider yields one dict per observation with a farm_id (or
+    farm), an ISO date and any of the WeatherRecord measurement fields.
+    Subclasses should stream observations rather than load them all at once,
+    and yield an InvalidObservation for a row they can't parse.
+    """
+
+    def __init__(self, source=None):
+        self.source = source
+
+    def __iter__(self):
+        raise NotImplementedError
+
+
+class CSVWeatherProvider(WeatherProvider):
+    """Observations from a CSV file with a header row"""
+
+    def __iter__(self):
+        with open(self.source, newline='', encoding='utf-8') as handle:
+            yield from csv.DictReader(handle)
+
+
+class JSONLinesWeatherProvider(WeatherProvider):
+    """Observations from a JSON Lines file, one JSON object per line"""
+
+    def __iter__(self):
+        with open(self.source, encoding='utf-8') as handle:
+            for number, line in enumerate(handle, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    yield InvalidObservation(f"Line {number} is not valid JSON: {e}")
+
+
+FILE_PROVIDERS = {
+    'csv': CSVWeatherProvider,
+    'json': JSONLinesWeatherProvider,
+    'jsonl': JSONLinesWeatherProvider,
+    'ndjson': JSONLinesWeatherProvider,
+}
+
+
+def get_weather_provider(source=None, file_format=None, provider=None):
+    """
+    Resolve the provider for a source.
+
+    provider is a dotted path to a WeatherProvider subclass; otherwise the
+    file format (or the source's extension) picks a file provider.
+    """
+    if provider:
+        return import_string(provider)(source)
+
+    file_format = (file_format or os.path.splitext(source or '')[1].lstrip('.')).lower()
+    if file_format not in FILE_PROVIDERS:
+        raise ValueError(f"Unsupported weather file format: '{file_format}'")
+
+    return FILE_PROVIDERS[file_format](source)
+
+
+def _parse_decimal(observation, field):
+    value = observation.get(field)
+    if value is None or value == '':
+        return None
+    try:
+        value = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f"Invalid {field}: {observation[field]!r}")
+
+    low, high = VALUE_RANGES[field]
+    if not value.is_finite() or not low <= value <= high:
+        raise ValueError(f"{field} {observation[field]!r} is outside {low} to {high}")
+    return value
+
+
+def build_weather_record(observation, data_source):
+    """Build an unsaved WeatherRecord from one observation, raising ValueError if it is invalid"""
+    if isinstance(observation, InvalidObservation):
+        raise observation
+    if not isinstance(observation, dict):
+        raise ValueError("Observation is not an object")
+
+    farm_id = observation.get('farm_id') or observation.get('farm')
+    if not farm_id:
+        raise ValueError("Missing farm_id")
+
+    source = observation.get('data_source') or data_source
+    if source not in DATA_SOURCES:
+        raise ValueError(f"Unknown data_source '{source}'")
+
+    wind_direction = str(observation.get('wind_direction') or '')
+    if len(wind_direction) > WeatherRecord._meta.get_field('wind_direction').max_length:
+        raise ValueError("wind_direction is too long")
+
+    try:
+        record = WeatherRecord(
+            farm_id=int(farm_id),
+            date=date.fromisoformat(str(observation.get('date', '')).strip()),
+            wind_direction=wind_direction,
+            data_source=source,
+            **{field: _parse_decimal(observation, field) for field in DECIMAL_FIELDS}
+        )
+    except TypeError as e:
+        raise ValueError(f"Invalid value: {e}")
+
+    return record
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def upsert_weather_records(records):
+    """Insert or update WeatherRecords on (farm, date), one statement per batch"""
+    # The same (farm, date) twice in one statement is rejected by some databases, last one wins
+    unique = {(record.farm_id, record.date): record for record in records}
+
+    # MySQL can't name the conflicting key; its ON DUPLICATE KEY UPDATE uses the (farm, date) one
+    features = connections[router.db_for_write(WeatherRecord)].features
+    unique_fields = ['farm', 'date'] if features.supports_update_conflicts_with_target else None
+
+    WeatherRecord.objects.bulk_create(
+        list(unique.values()),
+        batch_size=DEFAULT_CHUNK_SIZE,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=UPDATE_FIELDS
+    )
+    return len(unique)
+
+
+def ingest_weather(provider, chunk_size=DEFAULT_CHUNK_SIZE, data_source='api'):
+    """
+    Stream observations from a provider into WeatherRecord in chunks.
+
+    Each chunk is validated, upserted on (farm, date) in its own transaction
+    and then dropped, so memory use depends on the chunk size and not on the
+    size of the feed. Returns ingestion stats including rows_per_second.
+    """
+    started = time.perf_counter()
+    farm_ids = set(Farm.objects.values_list('id', flat=True))
+    touched_farm_ids = set()
+    stats = {'rows_read': 0, 'rows_written': 0, 'rows_skipped': 0, 'chunks': 0, 'errors': []}
+
+    for chunk in _chunks(provider, chunk_size):
+        records = []
+
+        for observation in chunk:
+            stats['rows_read'] += 1
+            try:
+                record = build_weather_record(observation, data_source)
+                if record.farm_id not in farm_ids:
+                    raise ValueError(f"Unknown farm {record.farm_id}")
+            except ValueError as e:
+                stats['rows_skipped'] += 1
+                if len(stats['errors']) < MAX_REPORTED_ERRORS:
+                    stats['errors'].append({'row': stats['rows_read'], 'error': str(e)})
+                continue
+
+            records.append(record)
+            touched_farm_ids.add(record.farm_id)
+
+        if records:
+            with transaction.atomic():
+                stats['rows_written'] += upsert_weather_records(records)
+        stats['chunks'] += 1
+
+    # bulk_create bypasses WeatherRecord.save(), so clear cached climate statistics here
+    from apps.recommendations.climate import invalidate_climate_summary
+    for farm_id in touched_farm_ids:
+        invalidate_climate_summary(farm_id)
+
+    elapsed = time.perf_counter() - started
+    stats.update({
+        'farms': len(touched_farm_ids),
+        'elapsed_seconds': round(elapsed, 3),
+        'rows_per_second': round(stats['rows_read'] / elapsed, 2) if elapsed else 0,
+    })
+
+    return stats
@@ -0,0 +1,316 @@
+import bisect
+from datetime import timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import CropCycle, SoilTest, WeatherRecord
+
+
+YIELD_MODEL_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Column layout of the feature matrix
+FEATURES = [
+    'planting_month_sin', 'planting_month_cos', 'field_size',
+    'ph', 'nitrogen_ppm', 'phosphorus_ppm', 'potassium_ppm', 'organic_matter_percentage',
+    'rainfall_mm', 'temperature_avg',
+]
+SOIL_FEATURES = ['ph', 'nitrogen_ppm', 'phosphorus_ppm', 'potassium_ppm', 'organic_matter_percentage']
+
+# Weather is summarised over this many days from planting; shorter records are
+# scaled up from the days observed so far
+WEATHER_WINDOW_DAYS = 60
+
+# Below this many harvests a crop's model is its mean yield per acre
+MIN_TRAINING_CYCLES = 8
+
+# Ridge penalty on the standardized coefficients, keeping small samples stable
+RIDGE_PENALTY = 1.0
+
+
+class YieldModel:
+    """Ridge regression of one crop's yield per acre on standardized features"""
+
+    def __init__(self, crop_id, n_samples, impute, mean, scale, coefficients, intercept, loo_rmse):
+        self.crop_id = crop_id
+        self.n_samples = n_samples
+        self.impute = impute
+        self.mean = mean
+        self.scale = scale
+        self.coefficients = coefficients
+        self.intercept = intercept
+        # Leave-one-out error, in kg per acre
+        self.loo_rmse = loo_rmse
+
+    @classmethod
+    def empty(cls, crop_id):
+        zeros = np.zeros(len(FEATURES))
+        return cls(crop_id, 0, zeros, zeros, np.ones(len(FEATURES)), zeros, 0.0, np.nan)
+
+    @property
+    def relative_error(self):
+        if self.n_samples < 2 or self.intercept <= 0:
+            return np.inf
+        return self.loo_rmse / self.intercept
+
+
+def fit_yield_model(crop_id, features, targets):
+    """Fit a YieldModel to a feature matrix and yields per acre"""
+    n_samples = len(targets)
+    if n_samples == 0:
+        return YieldModel.empty(crop_id)
+
+    # Missing soil or weather values take the crop's mean, or 0 when none are known
+    known = ~np.isnan(features)
+    impute = np.nansum(features, axis=0) / np.maximum(known.sum(axis=0), 1)
+    X = np.where(np.isnan(features), impute, features)
+    mean = X.mean(axis=0)
+    scale = X.std(axis=0)
+    scale[scale == 0] = 1.0
+    X = (X - mean) / scale
+
+    intercept = float(targets.mean())
+    residual_targets = targets - intercept
+
+    if n_samples < MIN_TRAINING_CYCLES:
+        coefficients = np.zeros(len(FEATURES))
+        leverage = np.full(n_samples, 1.0 / n_samples)
+    else:
+        inverse = np.linalg.inv(X.T @ X + RIDGE_PENALTY * np.eye(len(FEATURES)))
+        coefficients = inverse @ X.T @ residual_targets
+        leverage = np.einsum('ij,jk,ik->i', X, inverse, X) + 1.0 / n_samples
+
+    residuals = residual_targets - X @ coefficients
+    if n_samples > 1:
+        loo_residuals = residuals / np.clip(1.0 - leverage, 1e-6, None)
+        loo_rmse = float(np.sqrt(np.mean(loo_residuals ** 2)))
+    else:
+        loo_rmse = np.nan
+
+    return YieldModel(crop_id, n_samples, impute, mean, scale, coefficients, intercept, loo_rmse)
+
+
+def _soil_values(cycles):
+    # Each cycle uses the field's most recent soil test on or before planting
+    field_ids = {cycle['field_id'] for cycle in cycles}
+    tests = {}
+    for row in SoilTest.objects.filter(field_id__in=field_ids).order_by('field_id', 'test_date', 'id').values_list(
+        'field_id', 'test_date', *SOIL_FEATURES
+    ):
+        dates, values = tests.setdefault(row[0], ([], []))
+        dates.append(row[1])
+        values.append([np.nan if value is None else float(value) for value in row[2:]])
+
+    soil = np.full((len(cycles), len(SOIL_FEATURES)), np.nan)
+    for index, cycle in enumerate(cycles):
+        dates, values = tests.get(cycle['field_id'], ((), ()))
+        position = bisect.bisect_right(dates, cycle['planting_date']) - 1
+        if position >= 0:
+            soil[index] = values[position]
+    return soil
+
+
+def _weather_values(cycles, today):
+    """Cumulative rainfall and mean temperature over each cycle's weather window"""
+    weather = np.full((len(cycles), 2), np.nan)
+    if not cycles:
+        return weather
+
+    window = timedelta(days=WEATHER_WINDOW_DAYS)
+    ends = [min(cycle['planting_date'] + window, cycle['window_end'] or today, today) for cycle in cycles]
+    records = {}
+    for farm_id, day, rainfall, temperature in WeatherRecord.objects.filter(
+        farm_id__in={cycle['farm_id'] for cycle in cycles},
+        date__gte=min(cycle['planting_date'] for cycle in cycles),
+        date__lte=max(ends)
+    ).order_by('farm_id', 'date').values_list('farm_id', 'date', 'rainfall_mm', 'temperature_avg'):
+        records.setdefault(farm_id, []).append((
+            day.toordinal(),
+            np.nan if rainfall is None else float(rainfall),
+            np.nan if temperature is None else float(temperature),
+        ))
+
+    rows_by_farm = {}
+    for index, cycle in enumerate(cycles):
+        rows_by_farm.setdefault(cycle['farm_id'], []).append(index)
+
+    for farm_id, rows in rows_by_farm.items():
+        if farm_id not in records:
+            continue
+        days, rainfall, temperature = (np.array(column) for column in zip(*records[farm_id]))
+
+        # Prefix sums give every cycle's window totals with two lookups
+        rain_days = np.concatenate([[0], np.cumsum(~np.isnan(rainfall))])
+        rain_total = np.concatenate([[0.0], np.cumsum(np.nan_to_num(rainfall))])
+        temperature_days = np.concatenate([[0], np.cumsum(~np.isnan(temperature))])
+        temperature_total = np.concatenate([[0.0], np.cumsum(np.nan_to_num(temperature))])
+
+        rows = np.array(rows)
+        starts = np.array([cycles[row]['planting_date'].toordinal() for row in rows])
+        stops = np.array([ends[row].toordinal() for row in rows])
+        low = np.searchsorted(days, starts, side='left')
+        high = np.searchsorted(days, stops, side='right')
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            observed = rain_days[high] - rain_days[low]
+            weather[rows, 0] = np.where(
+                observed > 0, (rain_total[high] - rain_total[low]) / observed * WEATHER_WINDOW_DAYS, np.nan
+            )
+            observed = temperature_days[high] - temperature_days[low]
+            weather[rows, 1] = np.where(
+                observed > 0, (temperature_total[high] - temperature_total[low]) / observed, np.nan
+            )
+
+    return weather
+
+
+def build_features(cycles, today):
+    """
+    Feature matrix for cycle rows with planting_date, field_id, farm_id,
+    field_size and window_end (the harvest date, or None while growing)
+    """
+    features = np.full((len(cycles), len(FEATURES)), np.nan)
+    if not cycles:
+        return features
+
+    months = np.array([cycle['planting_date'].month for cycle in cycles])
+    features[:, 0] = np.sin(2 * np.pi * (months - 1) / 12)
+    features[:, 1] = np.cos(2 * np.pi * (months - 1) / 12)
+    features[:, 2] = [float(cycle['field_size'] or 0) for cycle in cycles]
+    features[:, 3:8] = _soil_values(cycles)
+    features[:, 8:10] = _weather_values(cycles, today)
+    return features
+
+
+def train_yield_models(user_id, crop_ids, today=None):
+    """
+    Fit a user's models of several crops in one batch. Only the user's own
+    harvested cycles are used, so one farmer's yields never shape the
+    predictions shown to another.
+    """
+    today = today or timezone.now().date()
+    cycles = [
+        {
+            'crop_id': row[0],
+            'planting_date': row[1],
+            'window_end': row[2],
+            'field_id': row[3],
+            'farm_id': row[4],
+            'field_size': row[5],
+            'target': float(row[6]) / float(row[5]),
+        }
+        for row in CropCycle.objects.filter(
+            field__farm__owner_id=user_id,
+            crop_id__in=crop_ids,
+            status='harvested',
+            actual_yield_kg__isnull=False,
+            field__size__gt=0
+        ).values_list(
+            'crop_id', 'planting_date', 'actual_harvest_date', 'field_id', 'field__farm_id',
+            'field__size', 'actual_yield_kg'
+        ).order_by('crop_id', 'id')
+    ]
+    features = build_features(cycles, today)
+
+    rows_by_crop = {crop_id: [] for crop_id in crop_ids}
+    for index, cycle in enumerate(cycles):
+        rows_by_crop[cycle['crop_id']].append(index)
+
+    return {
+        crop_id: fit_yield_model(
+            crop_id, features[rows].reshape(-1, len(FEATURES)), np.array([cycles[row]['target'] for row in rows])
+        )
+        for crop_id, rows in rows_by_crop.items()
+    }
+
+
+def yield_model_cache_key(user_id, crop_id):
+    return f'yield_model:{user_id}:{crop_id}'
+
+
+def get_yield_models(user_id, crop_ids):
+    """Return a user's {crop_id: YieldModel}, training only the crops missing from the cache"""
+    crop_ids = set(crop_ids)
+    cached = cache.get_many([yield_model_cache_key(user_id, crop_id) for crop_id in crop_ids])
+    models = {model.crop_id: model for model in cached.values()}
+
+    missing = crop_ids - models.keys()
+    if missing:
+        trained = train_yield_models(user_id, missing)
+        cache.set_many(
+            {yield_model_cache_key(user_id, crop_id): model for crop_id, model in trained.items()},
+            YIELD_MODEL_CACHE_TIMEOUT
+        )
+        models.update(trained)
+
+    return models
+
+
+def invalidate_yield_models(user_id, *crop_ids):
+    """Drop a user's cached models after harvests of their crops changed"""
+    cache.delete_many([yield_model_cache_key(user_id, crop_id) for crop_id in crop_ids])
+
+
+def prediction_confidence(model):
+    """Confidence label from the number of harvests and the model's leave-one-out error"""
+    relative_error = model.relative_error
+    if model.n_samples >= 10 and relative_error <= 0.15:
+        return 'High'
+    elif model.n_samples >= 5 and relative_error <= 0.30:
+        return 'Medium'
+    elif model.n_samples >= 2:
+        return 'Low'
+    else:
+        return 'Very Low'
+
+
+def predict_cycle_yields(user, cycles, today=None):
+    """
+    Predict the total yield of a user's growing CropCycles, in the order given.
+
+    The cycles' features are built in one batch and every row is scored
+    against its crop's coefficients in a single vectorized pass. Returns a
+    list of dicts with predicted_yield_kg, predicted_yield_per_acre and
+    confidence.
+    """
+    cycles = list(cycles)
+    if not cycles:
+        return []
+
+    today = today or timezone.now().date()
+    models = get_yield_models(user.id, {cycle.crop_id for cycle in cycles})
+    crop_ids = list(models)
+    crop_index = {crop_id: index for index, crop_id in enumerate(crop_ids)}
+
+    features = build_features([
+        {
+            'planting_date': cycle.planting_date,
+            'window_end': None,
+            'field_id': cycle.field_id,
+            'farm_id': cycle.field.farm_id,
+            'field_size': cycle.field.size,
+        }
+        for cycle in cycles
+    ], today)
+
+    # Per-crop parameters stacked and gathered per row
+    rows = np.array([crop_index[cycle.crop_id] for cycle in cycles])
+    impute = np.stack([models[crop_id].impute for crop_id in crop_ids])[rows]
+    mean = np.stack([models[crop_id].mean for crop_id in crop_ids])[rows]
+    scale = np.stack([models[crop_id].scale for crop_id in crop_ids])[rows]
+    coefficients = np.stack([models[crop_id].coefficients for crop_id in crop_ids])[rows]
+    intercepts = np.array([models[crop_id].intercept for crop_id in crop_ids])[rows]
+
+    X = (np.where(np.isnan(features), impute, features) - mean) / scale
+    per_acre = np.clip(np.einsum('ij,ij->i', X, coefficients) + intercepts, 0, None)
+    totals = per_acre * features[:, 2]
+
+    return [
+        {
+            'predicted_yield_kg': float(total),
+            'predicted_yield_per_acre': float(rate),
+            'confidence': prediction_confidence(models[cycle.crop_id]),
+        }
+        for cycle, total, rate in zip(cycles, totals, per_acre)
+    ]
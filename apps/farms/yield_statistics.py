@@ -0,0 +1,109 @@
+from django.db import transaction
+
+from .models import CropCycle, CropYieldStatistics, FarmSection
+from .yield_prediction import invalidate_yield_models
+
+
+def _field_owner_and_area(field_id):
+    row = FarmSection.objects.filter(pk=field_id).values_list('farm__owner_id', 'size').first()
+    if row is None:
+        return None, 0
+    return row[0], float(row[1] or 0)
+
+
+def _add(crop_id, field_id, yield_kg):
+    owner_id, area = _field_owner_and_area(field_id)
+    if owner_id is None:
+        return None
+
+    stats, _ = CropYieldStatistics.objects.select_for_update().get_or_create(user_id=owner_id, crop_id=crop_id)
+    stats.add_harvest(yield_kg, area)
+    stats.save()
+    return owner_id
+
+
+def _remove(crop_id, field_id, yield_kg):
+    owner_id, area = _field_owner_and_area(field_id)
+    if owner_id is None:
+        return None
+
+    stats = CropYieldStatistics.objects.select_for_update().filter(user_id=owner_id, crop_id=crop_id).first()
+    if stats is None:
+        return owner_id
+    if stats.remove_harvest(yield_kg, area):
+        stats.save()
+    else:
+        rebuild_yield_statistics(owner_id, crop_ids=[crop_id])
+    return owner_id
+
+
+def record_harvest_change(old, new):
+    """
+    Apply one cycle's change to the yield statistics: take back its old
+    harvest observation and add the new one. Observations are the
+    (crop_id, field_id, yield) tuples of CropCycle.harvest_observation().
+    """
+    if old == new:
+        return
+
+    changed = set()
+    with transaction.atomic():
+        if old is not None:
+            changed.add((_remove(*old), old[0]))
+        if new is not None:
+            changed.add((_add(*new), new[0]))
+
+    # The owners' prediction models for the crops are refitted on next use
+    for owner_id, crop_id in changed:
+        if owner_id is not None:
+            invalidate_yield_models(owner_id, crop_id)
+
+
+def rebuild_yield_statistics(user_id=None, crop_ids=None):
+    """
+    Recompute yield statistics from the harvested cycles, for one user and
+    optionally some of their crops, or for everyone when user_id is None.
+    """
+    cycles = CropCycle.objects.filter(status='harvested', actual_yield_kg__isnull=False)
+    existing = CropYieldStatistics.objects.all()
+    if user_id is not None:
+        cycles = cycles.filter(field__farm__owner_id=user_id)
+        existing = existing.filter(user_id=user_id)
+    if crop_ids is not None:
+        cycles = cycles.filter(crop_id__in=crop_ids)
+        existing = existing.filter(crop_id__in=crop_ids)
+
+    rows = {}
+    for owner_id, crop_id, yield_kg, area in cycles.values_list(
+        'field__farm__owner_id', 'crop_id', 'actual_yield_kg', 'field__size'
+    ).order_by('id').iterator(chunk_size=2000):
+        stats = rows.get((owner_id, crop_id))
+        if stats is None:
+            stats = rows[(owner_id, crop_id)] = CropYieldStatistics(user_id=owner_id, crop_id=crop_id)
+        stats.add_harvest(float(yield_kg), float(area or 0))
+
+    # Models of crops that lost all their harvests are dropped too
+    changed = set(rows) | set(existing.values_list('user_id', 'crop_id'))
+    with transaction.atomic():
+        existing.delete()
+        CropYieldStatistics.objects.bulk_create(rows.values(), batch_size=500)
+
+    crops_by_owner = {}
+    for owner_id, crop_id in changed:
+        crops_by_owner.setdefault(owner_id, set()).add(crop_id)
+    for owner_id, owner_crop_ids in crops_by_owner.items():
+        invalidate_yield_models(owner_id, *owner_crop_ids)
+
+    return len(rows)
+
+
+def yield_statistics_by_crop(user):
+    """The user's yield statistics keyed by crop id, with one query"""
+    return {stats.crop_id: stats for stats in CropYieldStatistics.objects.filter(user=user)}
+
+
+def overall_yield_per_hectare(statistics):
+    """Yield per unit of area across all crops of a user's statistics rows"""
+    total_area = sum(stats.total_area for stats in statistics)
+    total_yield = sum(stats.area_yield_kg for stats in statistics)
+    return round(total_yield / total_area, 2) if total_area > 0 else 0
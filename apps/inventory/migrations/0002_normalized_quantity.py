@@ -0,0 +1,56 @@
+# Generated by Django 5.2 on 2026-10-18 13:10
+
+from django.db import migrations, models
+
+from core.units import normalize
+
+
+def populate_normalized_quantities(apps, schema_editor):
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    InventoryTransaction = apps.get_model('inventory', 'InventoryTransaction')
+    
+    items = list(InventoryItem.objects.only('pk', 'quantity', 'unit'))
+    for item in items:
+        item.normalized_quantity, item.normalized_unit = normalize(item.quantity, item.unit)
+    InventoryItem.objects.bulk_update(items, ['normalized_quantity', 'normalized_unit'], batch_size=500)
+    
+    # Transactions count in their item's unit
+    transactions = list(InventoryTransaction.objects.select_related('inventory_item').only(
+        'pk', 'quantity', 'inventory_item__unit'
+    ))
+    for transaction in transactions:
+        transaction.normalized_quantity, transaction.normalized_unit = normalize(
+            transaction.quantity, transaction.inventory_item.unit
+        )
+    InventoryTransaction.objects.bulk_update(transactions, ['normalized_quantity', 'normalized_unit'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='normalized_quantity',
+            field=models.DecimalField(blank=True, decimal_places=4, editable=False, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='normalized_unit',
+            field=models.CharField(blank=True, editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='inventorytransaction',
+            name='normalized_quantity',
+            field=models.DecimalField(blank=True, decimal_places=4, editable=False, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='inventorytransaction',
+            name='normalized_unit',
+            field=models.CharField(blank=True, editable=False, max_length=10),
+        ),
+        migrations.RunPython(populate_normalized_quantities, migrations.RunPython.noop),
+    ]
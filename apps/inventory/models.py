@@ -1,8 +1,10 @@
 from django.db import models
 from django.conf import settings
 from apps.farms.models import Farm
+from core.bulk import BulkInsertKey
+from core.units import NormalizedQuantityMixin
 
-class InventoryItem(models.Model):
+class InventoryItem(NormalizedQuantityMixin, BulkInsertKey):
     """Base model for all inventory items"""
     
     class ItemType(models.TextChoices):
@@ -24,6 +26,9 @@ class InventoryItem(models.Model):
     # Quantity and unit
     quantity = models.DecimalField(max_digits=10, decimal_places=2, default=1)
     unit = models.CharField(max_length=50, blank=True)  # kg, liter, piece, etc.
+    # Quantity in the base unit of core.units, kept up to date on save
+    normalized_quantity = models.DecimalField(max_digits=14, decimal_places=4, null=True, blank=True, editable=False)
+    normalized_unit = models.CharField(max_length=10, blank=True, editable=False)
     
     # Status
     STATUS_CHOICES = [
@@ -48,6 +53,26 @@ class InventoryItem(models.Model):
     
     class Meta:
         ordering = ['name']
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The unit as loaded, to re-normalize the transactions when it changes
+        if 'unit' in instance.__dict__:
+            instance._loaded_unit = instance.unit
+        return instance
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        
+        # Transactions are counted in the item's unit
+        if getattr(self, '_loaded_unit', self.unit) != self.unit:
+            transactions = list(self.transactions.only('id', 'quantity'))
+            for transaction in transactions:
+                transaction.inventory_item = self
+                transaction.normalize_quantity()
+            InventoryTransaction.objects.bulk_update(transactions, ['normalized_quantity', 'normalized_unit'])
+        self._loaded_unit = self.unit
 
 class Equipment(models.Model):
     """Extended details for equipment inventory items"""
@@ -109,7 +134,7 @@ class FarmInput(models.Model):
             return self.expiry_date < timezone.now().date()
         return False
 
-class InventoryTransaction(models.Model):
+class InventoryTransaction(NormalizedQuantityMixin, BulkInsertKey):
     """Model for tracking inventory movements"""
     
     class TransactionType(models.TextChoices):
@@ -125,6 +150,9 @@ class InventoryTransaction(models.Model):
     # Transaction details
     quantity = models.DecimalField(max_digits=10, decimal_places=2)
     date = models.DateField()
+    # Quantity converted from the item's unit to the base unit of core.units, kept up to date on save
+    normalized_quantity = models.DecimalField(max_digits=14, decimal_places=4, null=True, blank=True, editable=False)
+    normalized_unit = models.CharField(max_length=10, blank=True, editable=False)
     
     # Related information
     related_activity = models.ForeignKey('activities.Activity', on_delete=models.SET_NULL, null=True, blank=True, related_name='inventory_transactions')
@@ -149,6 +177,9 @@ class InventoryTransaction(models.Model):
     class Meta:
         ordering = ['-date', '-created_at']
     
+    def quantity_unit(self):
+        return self.inventory_item.unit
+    
     def save(self, *args, **kwargs):
         # Calculate total price if unit price is provided
         if self.unit_price is not None:
@@ -156,8 +187,12 @@ class InventoryTransaction(models.Model):
         
         super().save(*args, **kwargs)
         
-        # Update inventory item quantity
         item = self.inventory_item
+        self.apply_to_item(item)
+        item.save()
+    
+    def apply_to_item(self, item):
+        """Update an item's quantity and status for this transaction, without saving it"""
         if self.transaction_type == 'purchase':
             item.quantity += self.quantity
         elif self.transaction_type in ['usage', 'disposal']:
@@ -168,8 +203,6 @@ class InventoryTransaction(models.Model):
         elif self.transaction_type == 'adjustment':
             # For adjustments, the quantity represents the new total
             item.quantity = self.quantity
-        
-        item.save()
 
 class MaintenanceRecord(models.Model):
     """Model for equipment maintenance records"""
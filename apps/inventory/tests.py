@@ -1,3 +1,80 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-# Create your tests here.
+from core.units import canonical_unit, convert, normalize
+from .models import InventoryItem, InventoryTransaction
+
+User = get_user_model()
+
+
+class UnitRegistryTest(TestCase):
+    def test_spellings_map_to_canonical_units(self):
+        self.assertEqual(canonical_unit('Kgs.'), 'kg')
+        self.assertEqual(canonical_unit(' Metric  Tonnes '), 'tonne')
+        self.assertEqual(canonical_unit('Ltr'), 'litre')
+        self.assertIsNone(canonical_unit('bag'))
+        self.assertIsNone(canonical_unit(''))
+
+    def test_normalize_to_base_unit(self):
+        self.assertEqual(normalize('2.5', 'tons'), (Decimal('2500.0000'), 'kg'))
+        self.assertEqual(normalize(500, 'ml'), (Decimal('0.5000'), 'litre'))
+        self.assertEqual(normalize(1, 'acre'), (Decimal('0.4047'), 'hectare'))
+        self.assertEqual(normalize(3, 'bags'), (None, ''))
+        self.assertEqual(normalize(None, 'kg'), (None, ''))
+
+    def test_convert_within_a_dimension(self):
+        self.assertEqual(convert(2, 'tonne', 'kg'), Decimal('2000'))
+        with self.assertRaises(ValueError):
+            convert(1, 'kg', 'litre')
+        with self.assertRaises(ValueError):
+            convert(1, 'bag', 'kg')
+
+
+class NormalizedInventoryTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='farmer', email='farmer@example.com', password='secret')
+        self.item = InventoryItem.objects.create(
+            user=self.user, name='Urea', item_type='input', quantity=Decimal('2'), unit='tonnes'
+        )
+
+    def record(self, transaction_type, quantity):
+        return InventoryTransaction.objects.create(
+            inventory_item=self.item, transaction_type=transaction_type, quantity=Decimal(quantity),
+            date='2024-05-01', performed_by=self.user
+        )
+
+    def test_item_is_normalized_on_save(self):
+        self.assertEqual((self.item.normalized_quantity, self.item.normalized_unit), (Decimal('2000'), 'kg'))
+
+        self.item.unit = 'bags'
+        self.item.save()
+
+        self.assertEqual((self.item.normalized_quantity, self.item.normalized_unit), (None, ''))
+
+    def test_transactions_count_in_the_items_unit(self):
+        transaction = self.record('usage', '0.5')
+
+        self.assertEqual((transaction.normalized_quantity, transaction.normalized_unit), (Decimal('500'), 'kg'))
+
+    def test_unit_change_renormalizes_transactions(self):
+        transaction = self.record('purchase', '3')
+
+        item = InventoryItem.objects.get(id=self.item.id)
+        item.unit = 'kg'
+        item.save()
+
+        transaction.refresh_from_db()
+        self.assertEqual((transaction.normalized_quantity, transaction.normalized_unit), (Decimal('3'), 'kg'))
+
+    def test_unchanged_unit_leaves_transactions_alone(self):
+        transaction = self.record('purchase', '3')
+        InventoryTransaction.objects.filter(id=transaction.id).update(normalized_quantity=None)
+
+        item = InventoryItem.objects.get(id=self.item.id)
+        item.name = 'Urea 46%'
+        item.save()
+
+        transaction.refresh_from_db()
+        self.assertIsNone(transaction.normalized_quantity)
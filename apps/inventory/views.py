@@ -1,7 +1,8 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Count, Sum, Avg, Q, F
+from django.db.models import Count, Sum, Avg, Q, F, Value
+from django.db.models.functions import Coalesce, NullIf
 from django.http import JsonResponse
 from django.utils import timezone
 from datetime import datetime, timedelta
@@ -356,15 +357,19 @@ def inventory_reports(request):
         days_since_last_maintenance=timezone.now().date() - F('last_maintenance_date')
     )
     
-    # Input consumption patterns
+    # Input consumption patterns, summed in base units; inputs counted in
+    # units without a conversion, such as bags, are totalled in their own unit
     input_consumption = InventoryTransaction.objects.filter(
         inventory_item__user=request.user,
         transaction_type='usage',
         inventory_item__item_type='input'
+    ).annotate(
+        consumed_unit=Coalesce(NullIf('normalized_unit', Value('')), 'inventory_item__unit'),
+        consumed_quantity=Coalesce('normalized_quantity', 'quantity')
     ).values(
-        'inventory_item__farminput__input_category'
+        'inventory_item__farminput__input_category', 'consumed_unit'
     ).annotate(
-        total_consumed=Sum('quantity'),
+        total_consumed=Sum('consumed_quantity'),
         total_cost=Sum('total_price')
     ).order_by('-total_consumed')
     
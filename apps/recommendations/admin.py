@@ -2,7 +2,7 @@ from django.contrib import admin
 from .models import (
     RecommendationEngine, CropRecommendation, WeatherRecommendation,
     PestDiseaseAlert, ResourceOptimization, MarketPricePrediction,
-    RecommendationFeedback
+    RecommendationFeedback, RecommendationJob
 )
 
 
@@ -230,3 +230,14 @@ class RecommendationFeedbackAdmin(admin.ModelAdmin):
             'fields': ('created_at',)
         })
     )
+
+
+@admin.register(RecommendationJob)
+class RecommendationJobAdmin(admin.ModelAdmin):
+    list_display = [
+        'id', 'farm', 'user', 'status', 'progress', 'current_stage', 
+        'created_at', 'finished_at'
+    ]
+    list_filter = ['status', 'created_at']
+    search_fields = ['farm__name', 'user__username', 'task_id']
+    readonly_fields = ['task_id', 'result', 'error_message', 'created_at', 'started_at', 'finished_at']
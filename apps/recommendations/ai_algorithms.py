@@ -1,61 +1,140 @@
 import random
 import json
+import time
+from contextlib import nullcontext
 from datetime import datetime, timedelta, date
 from decimal import Decimal
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Q, Avg
 from django.contrib.auth import get_user_model
 from typing import Dict, List, Tuple, Optional
+import numpy as np
 
 User = get_user_model()
 
-from apps.farms.models import Farm, FarmSection, Crop, CropCycle
+from apps.farms.models import Farm, CropCycle
 from apps.activities.models import Activity
+from core.bulk import bulk_insert, bulk_upsert
 # from apps.analytics.models import ProfitabilityAnalysis  # Temporarily commented out
 from .models import (
     RecommendationEngine, CropRecommendation, WeatherRecommendation,
     PestDiseaseAlert, ResourceOptimization, MarketPricePrediction
 )
+from .climate import get_climate_summary
+from .fingerprints import FarmFingerprints, FIELD_SCOPED_TYPES
+from .scoring import CropFeatureMatrix, FieldSoilMatrix, score_crop_suitability, top_crop_indices
+
+
+# Unique constraints used to upsert detail rows, so re-runs replace them
+BULK_CONFLICT_FIELDS = {
+    CropRecommendation: ['farm', 'field', 'recommended_crop', 'season'],
+    MarketPricePrediction: ['crop', 'region', 'prediction_date'],
+}
+
+BULK_BATCH_SIZE = 500
 
 
 class AIRecommendationEngine:
     """Central AI engine for generating farm recommendations"""
     
-    def __init__(self, farm, user):
+    def __init__(self, farm, user, batch=False, crop_matrix=None, progress_callback=None, force=False,
+                 rng=None, seed=None, dry_run=False):
         self.farm = farm
         self.user = user
         self.current_date = timezone.now().date()
+        
+        # Random source for the simulated factors; pass a seed or rng for reproducible runs
+        self.rng = rng or random.Random(seed)
+        self.np_rng = np.random.default_rng(self.rng.getrandbits(64))
+        
+        # In dry run mode recommendations are computed but nothing is written
+        self.dry_run = dry_run
+        
+        # Called as progress_callback(stage_name, completed_stages, total_stages)
+        self.progress_callback = progress_callback
+        
+        # Crop catalogue matrix, loaded once per engine unless one is shared in
+        self._crop_matrix = crop_matrix
+        
+        # Rolling weather statistics for the farm
+        self._climate = None
+        
+        # In batch mode rows are collected in memory and written together at the end
+        self.batch = batch
+        self.stage_timings = {}
+        self._pending = []
+        self._retirements = []
+        
+        # Unexpired recommendations are reused while their input fingerprint is unchanged
+        self.force = force
+        self._fingerprints = None
+        self.reused_count = 0
     
     def generate_all_recommendations(self):
         """Generate all types of recommendations for the farm"""
+        stages = [
+            ('crop_selection', self.generate_crop_recommendations),
+            ('weather_based', self.generate_weather_recommendations),
+            ('pest_disease', self.generate_pest_disease_alerts),
+            ('resource_optimization', self.generate_resource_optimizations),
+            ('market_timing', self.generate_market_timing_recommendations),
+        ]
+        
         recommendations = []
+        self.stage_timings = {}
+        self.reused_count = 0
+        total_stages = len(stages) + (1 if self.batch and not self.dry_run else 0)
         
-        # Generate different types of recommendations
-        recommendations.extend(self.generate_crop_recommendations())
-        recommendations.extend(self.generate_weather_recommendations())
-        recommendations.extend(self.generate_pest_disease_alerts())
-        recommendations.extend(self.generate_resource_optimizations())
-        recommendations.extend(self.generate_market_timing_recommendations())
+        # Batch mode writes nothing until the flush, so its stages run outside the
+        # transaction and the progress they report is visible while the run continues
+        with nullcontext() if self.batch else transaction.atomic():
+            reusable = self._get_reusable_recommendations()
+            
+            for completed, (stage_name, generate) in enumerate(stages, 1):
+                started = time.perf_counter()
+                recommendations.extend(self._run_stage(stage_name, generate, reusable))
+                self.stage_timings[stage_name] = round(time.perf_counter() - started, 4)
+                self._report_progress(stage_name, completed, total_stages)
+        
+        if self.batch and not self.dry_run:
+            started = time.perf_counter()
+            # One transaction per farm so a batch is written completely or not at all
+            with transaction.atomic():
+                self._flush_pending()
+            self.stage_timings['persist'] = round(time.perf_counter() - started, 4)
+            self._report_progress('persist', total_stages, total_stages)
+        
+        self.stage_timings['total'] = round(sum(self.stage_timings.values()), 4)
         
         return recommendations
     
-    def generate_crop_recommendations(self):
+    def generate_crop_recommendations(self, fields=None):
         """Generate AI-powered crop selection recommendations"""
         recommendations = []
         
-        # Get all fields for this farm
-        fields = FarmSection.objects.filter(farm=self.farm)
+        # Get all fields for this farm unless a subset is given
+        if fields is None:
+            fields = self.fingerprints.sections
         
-        for field in fields:
-            # Analyze field history
-            historical_crops = self._get_field_crop_history(field)
-            
-            # Get suitable crops based on various factors
-            suitable_crops = self._analyze_crop_suitability(field, historical_crops)
-            
-            for crop_data in suitable_crops[:3]:  # Top 3 recommendations
-                # Create crop recommendation record
-                crop_rec = CropRecommendation.objects.create(
+        # Analyze field history
+        last_crop_ids = self._get_last_crop_ids(fields)
+        
+        # Score every crop against every field in one pass
+        scores = score_crop_suitability(
+            self.crop_matrix, last_crop_ids, self._get_current_season(),
+            soil=FieldSoilMatrix.for_fields(fields),
+            climate=self.climate,
+            rng=self.np_rng
+        )
+        top_indices = top_crop_indices(scores['suitability'], limit=3)  # Top 3 recommendations
+        
+        for field_index, field in enumerate(fields):
+            for crop_index in top_indices[field_index]:
+                crop_data = self._build_crop_data(scores, field_index, crop_index)
+                
+                # Build crop recommendation record
+                crop_rec = CropRecommendation(
                     farm=self.farm,
                     field=field,
                     recommended_crop=crop_data['crop'],
@@ -75,8 +154,8 @@ class AIRecommendationEngine:
                     confidence_level=crop_data['confidence_level']
                 )
                 
-                # Create main recommendation engine record
-                recommendation = RecommendationEngine.objects.create(
+                # Build main recommendation engine record
+                recommendation = RecommendationEngine(
                     recommendation_type='crop_selection',
                     title=f"Plant {crop_data['crop'].name} in {field.name}",
                     description=f"Based on analysis of soil conditions, market trends, and historical data, "
@@ -96,11 +175,12 @@ class AIRecommendationEngine:
                     user=self.user,
                     valid_until=timezone.now() + timedelta(days=30),
                     metadata={
-                        'crop_recommendation_id': crop_rec.id,
+                        'crop_recommendation_id': None,
                         'factors_analyzed': crop_data['factors_analyzed']
                     }
                 )
                 
+                self._save_recommendation(crop_rec, recommendation, 'crop_recommendation_id')
                 recommendations.append(recommendation)
         
         return recommendations
@@ -109,11 +189,11 @@ class AIRecommendationEngine:
         """Generate weather-based farming recommendations"""
         recommendations = []
         
-        # Simulate weather forecast analysis
-        weather_data = self._get_weather_forecast()
+        # Analyze recent weather records
+        weather_data = self._get_weather_advisories()
         
         for forecast in weather_data:
-            weather_rec = WeatherRecommendation.objects.create(
+            weather_rec = WeatherRecommendation(
                 farm=self.farm,
                 weather_condition=forecast['condition'],
                 temperature_range=forecast['temperature_range'],
@@ -123,55 +203,59 @@ class AIRecommendationEngine:
                 pest_risk_alert=forecast['pest_risk'],
                 harvest_timing_advice=forecast['harvest_advice'],
                 field_work_recommendations=forecast['field_work'],
-                weather_data_source='AI Weather Analysis Engine',
-                forecast_accuracy=Decimal('87.5'),
+                weather_data_source='Farm weather records',
+                forecast_accuracy=Decimal(str(forecast['coverage'])),
                 valid_from=forecast['valid_from'],
                 valid_until=forecast['valid_until']
             )
             
-            # Create main recommendation
-            recommendation = RecommendationEngine.objects.create(
+            # Build main recommendation
+            recommendation = RecommendationEngine(
                 recommendation_type='weather_based',
-                title=f"Weather Advisory: {forecast['condition']}",
+                title=f"Weather Advisory: {forecast['condition'].replace('_', ' ').title()}",
                 description=forecast['description'],
                 action_required=forecast['action_required'],
                 confidence_level=forecast['confidence_level'],
                 priority=forecast['priority'],
-                model_version='weather_analysis_v1.3',
-                algorithm_used='Weather pattern analysis with ML prediction',
+                model_version='weather_analysis_v2.0',
+                algorithm_used='Rolling 7/30/90-day weather record analysis',
                 data_points_used=forecast['data_points'],
                 accuracy_score=Decimal('0.875'),
                 farm=self.farm,
                 user=self.user,
                 valid_until=forecast['valid_until'],
                 metadata={
-                    'weather_recommendation_id': weather_rec.id,
-                    'weather_source': 'multiple_apis',
+                    'weather_recommendation_id': None,
+                    'weather_source': 'weather_records',
                     'forecast_horizon': forecast['horizon_days']
                 }
             )
             
+            self._save_recommendation(weather_rec, recommendation, 'weather_recommendation_id')
             recommendations.append(recommendation)
         
         return recommendations
     
-    def generate_pest_disease_alerts(self):
+    def generate_pest_disease_alerts(self, fields=None):
         """Generate AI-powered pest and disease predictions"""
         recommendations = []
         
         # Get active crop cycles
         active_cycles = CropCycle.objects.filter(
-            farm_section__farm=self.farm,
+            field__farm=self.farm,
             planting_date__lte=self.current_date,
-            harvest_date__gte=self.current_date
-        )
+            expected_harvest_date__gte=self.current_date
+        ).select_related('crop', 'field')
+        
+        if fields is not None:
+            active_cycles = active_cycles.filter(field__in=fields)
         
         for cycle in active_cycles:
             pest_risks = self._analyze_pest_disease_risk(cycle)
             
             for risk in pest_risks:
                 if risk['probability'] > 30:  # Only alert if probability > 30%
-                    alert = PestDiseaseAlert.objects.create(
+                    alert = PestDiseaseAlert(
                         farm=self.farm,
                         crop=cycle.crop,
                         field=cycle.field,
@@ -190,8 +274,8 @@ class AIRecommendationEngine:
                         confidence_score=Decimal(str(risk['confidence_score']))
                     )
                     
-                    # Create main recommendation
-                    recommendation = RecommendationEngine.objects.create(
+                    # Build main recommendation
+                    recommendation = RecommendationEngine(
                         recommendation_type='pest_disease',
                         title=f"{risk['name']} Risk Alert",
                         description=f"High risk of {risk['name']} detected in {cycle.field.name}. "
@@ -209,11 +293,12 @@ class AIRecommendationEngine:
                         user=self.user,
                         valid_until=timezone.now() + timedelta(days=14),
                         metadata={
-                            'pest_alert_id': alert.id,
+                            'pest_alert_id': None,
                             'risk_assessment': risk['risk_assessment']
                         }
                     )
                     
+                    self._save_recommendation(alert, recommendation, 'pest_alert_id')
                     recommendations.append(recommendation)
         
         return recommendations
@@ -229,7 +314,7 @@ class AIRecommendationEngine:
             optimization = self._analyze_resource_usage(resource_type)
             
             if optimization['potential_savings'] > 100:  # Only recommend if savings > $100
-                resource_opt = ResourceOptimization.objects.create(
+                resource_opt = ResourceOptimization(
                     farm=self.farm,
                     resource_type=resource_type,
                     current_usage_amount=optimization['current_usage'],
@@ -247,8 +332,8 @@ class AIRecommendationEngine:
                     confidence_level=optimization['confidence_level']
                 )
                 
-                # Create main recommendation
-                recommendation = RecommendationEngine.objects.create(
+                # Build main recommendation
+                recommendation = RecommendationEngine(
                     recommendation_type='resource_optimization',
                     title=f"Optimize {resource_type.title()} Usage",
                     description=f"Analysis shows potential to reduce {resource_type} usage by "
@@ -265,12 +350,13 @@ class AIRecommendationEngine:
                     user=self.user,
                     valid_until=timezone.now() + timedelta(days=60),
                     metadata={
-                        'resource_optimization_id': resource_opt.id,
+                        'resource_optimization_id': None,
                         'optimization_type': resource_type,
                         'savings_breakdown': optimization['savings_breakdown']
                     }
                 )
                 
+                self._save_recommendation(resource_opt, recommendation, 'resource_optimization_id')
                 recommendations.append(recommendation)
         
         return recommendations
@@ -281,17 +367,17 @@ class AIRecommendationEngine:
         
         # Get crops that will be ready for harvest soon
         upcoming_harvests = CropCycle.objects.filter(
-            farm_section__farm=self.farm,
-            harvest_date__range=[
+            field__farm=self.farm,
+            expected_harvest_date__range=[
                 self.current_date,
                 self.current_date + timedelta(days=90)
             ]
-        )
+        ).select_related('crop')
         
         for cycle in upcoming_harvests:
             market_prediction = self._analyze_market_trends(cycle.crop)
             
-            price_prediction = MarketPricePrediction.objects.create(
+            price_prediction = MarketPricePrediction(
                 crop=cycle.crop,
                 region='Local Market',
                 current_price=market_prediction['current_price'],
@@ -309,8 +395,8 @@ class AIRecommendationEngine:
                 accuracy_score=Decimal(str(market_prediction['accuracy_score']))
             )
             
-            # Create main recommendation
-            recommendation = RecommendationEngine.objects.create(
+            # Build main recommendation
+            recommendation = RecommendationEngine(
                 recommendation_type='market_timing',
                 title=f"Market Timing for {cycle.crop.name}",
                 description=f"Price prediction for {cycle.crop.name}: {market_prediction['price_trend']}. "
@@ -328,147 +414,239 @@ class AIRecommendationEngine:
                 user=self.user,
                 valid_until=timezone.now() + timedelta(days=45),
                 metadata={
-                    'price_prediction_id': price_prediction.id,
+                    'price_prediction_id': None,
                     'market_factors': market_prediction['market_factors'],
                     'price_change_percentage': market_prediction['price_change_percentage']
                 }
             )
             
+            self._save_recommendation(price_prediction, recommendation, 'price_prediction_id')
             recommendations.append(recommendation)
         
         return recommendations
     
-    # Helper methods for data analysis
+    def _report_progress(self, stage_name, completed, total):
+        if self.progress_callback:
+            self.progress_callback(stage_name, completed, total)
     
-    def _get_field_crop_history(self, field):
-        """Get historical crop data for a field"""
-        return CropCycle.objects.filter(
-            farm_section=field,
-            harvest_date__lt=self.current_date
-        ).order_by('-harvest_date')[:5]
-    
-    def _analyze_crop_suitability(self, field, historical_crops):
-        """Analyze crop suitability based on multiple factors"""
-        # Get all available crops
-        all_crops = Crop.objects.all()
-        crop_scores = []
-        
-        for crop in all_crops:
-            # Calculate various compatibility scores
-            soil_score = self._calculate_soil_compatibility(field, crop)
-            climate_score = self._calculate_climate_compatibility(field, crop)
-            water_score = self._calculate_water_requirement_match(field, crop)
-            market_score = self._calculate_market_demand_score(crop)
-            price_score = self._calculate_price_trend_score(crop)
-            rotation_score = self._calculate_rotation_benefit(field, crop, historical_crops)
-            
-            # Calculate overall suitability score
-            suitability_score = (
-                soil_score * 0.25 +
-                climate_score * 0.20 +
-                water_score * 0.15 +
-                market_score * 0.15 +
-                price_score * 0.15 +
-                rotation_score * 0.10
-            )
-            
-            # Estimate profit potential
-            profit_potential = self._estimate_profit_potential(crop, suitability_score)
-            
-            # Determine risk level
-            risk_level = self._assess_risk_level(suitability_score, market_score)
+    # Incremental invalidation
+    
+    @property
+    def fingerprints(self):
+        if self._fingerprints is None:
+            self._fingerprints = FarmFingerprints.for_farm(self.farm)
+        return self._fingerprints
+    
+    def _get_reusable_recommendations(self):
+        """Group unexpired recommendations whose input fingerprint still matches by scope"""
+        if self.force:
+            return {}
+        
+        fingerprints = self.fingerprints
+        
+        candidates = RecommendationEngine.objects.filter(
+            farm=self.farm,
+            user=self.user,
+            input_fingerprint__in=fingerprints.all_scopes()
+        ).filter(
+            Q(valid_until__isnull=True) | Q(valid_until__gt=timezone.now())
+        )
+        
+        reusable = {}
+        for recommendation in candidates:
+            rec_type = recommendation.recommendation_type
+            if recommendation.input_fingerprint != fingerprints.for_scope(rec_type, recommendation.field_id):
+                continue
             
-            # Calculate planting and harvest dates
-            planting_dates = self._calculate_optimal_planting_dates(crop)
+            field_id = recommendation.field_id if rec_type in FIELD_SCOPED_TYPES else None
+            reusable.setdefault((rec_type, field_id), []).append(recommendation)
+        
+        return reusable
+    
+    def _run_stage(self, recommendation_type, generate, reusable):
+        """Reuse recommendations for unchanged scopes and regenerate the stale ones"""
+        reused = [
+            recommendation
+            for (rec_type, field_id), scope_recommendations in reusable.items()
+            if rec_type == recommendation_type
+            for recommendation in scope_recommendations
+            if recommendation.is_active
+        ]
+        self.reused_count += len(reused)
+        
+        if recommendation_type in FIELD_SCOPED_TYPES:
+            stale_fields = [
+                field for field in self.fingerprints.sections
+                if (recommendation_type, field.id) not in reusable
+            ]
+            if not stale_fields:
+                return reused
             
-            crop_scores.append({
-                'crop': crop,
-                'suitability_score': round(suitability_score, 2),
-                'profit_potential': profit_potential,
-                'risk_level': risk_level,
-                'soil_compatibility': soil_score,
-                'climate_compatibility': climate_score,
-                'water_requirement_match': water_score,
-                'market_demand_score': market_score,
-                'price_trend_score': price_score,
-                'competition_level': self._assess_competition_level(crop),
-                'planting_start': planting_dates['start'],
-                'planting_end': planting_dates['end'],
-                'harvest_date': planting_dates['harvest'],
-                'confidence_level': self._calculate_confidence_level(suitability_score),
-                'data_points': random.randint(150, 500),
-                'accuracy_score': Decimal(str(round(0.75 + (suitability_score / 100) * 0.20, 4))),
-                'factors_analyzed': ['soil', 'climate', 'water', 'market', 'rotation', 'price_trends']
-            })
+            self._retire_recommendations(recommendation_type, stale_fields)
+            return reused + generate(fields=stale_fields)
+        
+        if (recommendation_type, None) in reusable:
+            return reused
         
-        # Sort by suitability score
-        return sorted(crop_scores, key=lambda x: x['suitability_score'], reverse=True)
+        self._retire_recommendations(recommendation_type)
+        return generate()
     
-    def _calculate_soil_compatibility(self, field, crop):
-        """Calculate soil compatibility score (0-100)"""
-        # Simulate soil analysis based on field characteristics
-        base_score = random.uniform(60, 95)
+    def _retire_recommendations(self, recommendation_type, fields=None):
+        """Deactivate the recommendations about to be replaced, when flushing in batch mode"""
+        if self.dry_run:
+            return
         
-        # Adjust based on crop requirements (simulated)
-        if crop.name.lower() in ['rice', 'sugarcane']:
-            # Water-loving crops
-            base_score += random.uniform(-5, 10)
-        elif crop.name.lower() in ['maize', 'wheat']:
-            # Versatile crops
-            base_score += random.uniform(0, 5)
+        if self.batch:
+            self._retirements.append((recommendation_type, fields))
+            return
         
-        return min(100, max(0, base_score))
+        self._superseded(recommendation_type, fields).update(is_active=False)
     
-    def _calculate_climate_compatibility(self, field, crop):
-        """Calculate climate compatibility score (0-100)"""
-        # Simulate climate analysis
-        season = self._get_current_season()
-        base_score = random.uniform(65, 90)
+    def _superseded(self, recommendation_type, fields=None):
+        superseded = RecommendationEngine.objects.filter(
+            farm=self.farm,
+            user=self.user,
+            recommendation_type=recommendation_type,
+            is_active=True,
+            is_implemented=False
+        )
+        if fields is not None:
+            superseded = superseded.filter(field__in=fields)
+        
+        return superseded
+    
+    # Persistence helpers
+    
+    def _save_recommendation(self, record, recommendation, metadata_key):
+        """Save a detail record and its RecommendationEngine row, linking them via metadata"""
+        recommendation.input_fingerprint = self.fingerprints.for_scope(
+            recommendation.recommendation_type, recommendation.field_id
+        )
         
-        # Seasonal adjustments
-        if season == 'wet' and crop.name.lower() in ['rice', 'vegetables']:
-            base_score += random.uniform(5, 15)
-        elif season == 'dry' and crop.name.lower() in ['maize', 'millet']:
-            base_score += random.uniform(5, 10)
+        if self.dry_run:
+            return
         
-        return min(100, max(0, base_score))
+        # Both modes upsert the same way; batch mode just flushes once per farm
+        self._pending.append((record, recommendation, metadata_key))
+        if not self.batch:
+            self._flush_pending()
     
-    def _calculate_water_requirement_match(self, field, crop):
-        """Calculate water requirement compatibility (0-100)"""
-        # Simulate water availability analysis
-        return random.uniform(70, 95)
+    def _flush_pending(self):
+        """Write all pending rows with one bulk insert or upsert per model"""
+        # Retire the replaced recommendations first so the new ones stay active
+        for recommendation_type, fields in self._retirements:
+            self._superseded(recommendation_type, fields).update(is_active=False)
+        self._retirements = []
+        
+        records_by_model = {}
+        canonical = {}
+        
+        for record, recommendation, metadata_key in self._pending:
+            key = self._conflict_key(record)
+            
+            if key is not None:
+                # Rows sharing a unique key collapse into a single upserted record
+                if key in canonical:
+                    continue
+                canonical[key] = record
+            
+            records_by_model.setdefault(record.__class__, []).append(record)
+        
+        for model, records in records_by_model.items():
+            conflict_fields = BULK_CONFLICT_FIELDS.get(model)
+            
+            if conflict_fields:
+                update_fields = [
+                    field.name for field in model._meta.concrete_fields
+                    if not field.primary_key and field.name not in conflict_fields
+                    and not getattr(field, 'auto_now_add', False)
+                ]
+                bulk_upsert(model, records, conflict_fields, update_fields, batch_size=BULK_BATCH_SIZE)
+            else:
+                bulk_insert(model, records, batch_size=BULK_BATCH_SIZE)
+        
+        recommendations = []
+        for record, recommendation, metadata_key in self._pending:
+            key = self._conflict_key(record)
+            if key is not None:
+                record = canonical[key]
+            
+            recommendation.metadata[metadata_key] = record.id
+            recommendations.append(recommendation)
+        
+        bulk_insert(RecommendationEngine, recommendations, batch_size=BULK_BATCH_SIZE)
+        self._pending = []
     
-    def _calculate_market_demand_score(self, crop):
-        """Calculate market demand score (0-100)"""
-        # Simulate market demand analysis
-        high_demand_crops = ['rice', 'maize', 'tomatoes', 'onions', 'potatoes']
+    def _conflict_key(self, record):
+        """Return the unique-constraint key of a record, or None if it has no upsert key"""
+        model = record.__class__
+        conflict_fields = BULK_CONFLICT_FIELDS.get(model)
+        if not conflict_fields:
+            return None
         
-        if crop.name.lower() in high_demand_crops:
-            return random.uniform(75, 95)
-        else:
-            return random.uniform(60, 85)
+        return (model,) + tuple(
+            getattr(record, model._meta.get_field(name).attname) for name in conflict_fields
+        )
     
-    def _calculate_price_trend_score(self, crop):
-        """Calculate price trend score (0-100)"""
-        # Simulate price trend analysis
-        return random.uniform(65, 90)
+    # Helper methods for data analysis
+    
+    @property
+    def climate(self):
+        if self._climate is None:
+            self._climate = get_climate_summary(self.farm)
+        return self._climate
+    
+    @property
+    def crop_matrix(self):
+        if self._crop_matrix is None:
+            self._crop_matrix = CropFeatureMatrix.load()
+        return self._crop_matrix
     
-    def _calculate_rotation_benefit(self, field, crop, historical_crops):
-        """Calculate crop rotation benefit score (0-100)"""
-        if not historical_crops.exists():
-            return 75  # Default score for new fields
+    def _get_last_crop_ids(self, fields):
+        """Get the most recent historical crop for each field with a single query"""
+        last_crop_by_field = {}
+        history = CropCycle.objects.filter(
+            field__in=fields,
+            expected_harvest_date__lt=self.current_date
+        ).order_by('field_id', '-expected_harvest_date').values_list('field_id', 'crop_id')
         
-        last_crop = historical_crops.first().crop
+        for field_id, crop_id in history:
+            last_crop_by_field.setdefault(field_id, crop_id)
         
-        # Simple rotation logic
-        if last_crop != crop:
-            return random.uniform(80, 95)  # Good rotation
-        else:
-            return random.uniform(40, 70)  # Same crop (not ideal)
+        return [last_crop_by_field.get(field.id) for field in fields]
+    
+    def _build_crop_data(self, scores, field_index, crop_index):
+        """Build the recommendation data for one scored (field, crop) pair"""
+        crop = self.crop_matrix.crops[crop_index]
+        suitability_score = float(scores['suitability'][field_index, crop_index])
+        market_score = float(scores['market'][field_index, crop_index])
+        
+        # Calculate planting and harvest dates
+        planting_dates = self._calculate_optimal_planting_dates(crop)
+        
+        return {
+            'crop': crop,
+            'suitability_score': suitability_score,
+            'profit_potential': self._estimate_profit_potential(crop, suitability_score),
+            'risk_level': self._assess_risk_level(suitability_score, market_score),
+            'soil_compatibility': float(scores['soil'][field_index, crop_index]),
+            'climate_compatibility': float(scores['climate'][field_index, crop_index]),
+            'water_requirement_match': float(scores['water'][field_index, crop_index]),
+            'market_demand_score': market_score,
+            'price_trend_score': float(scores['price'][field_index, crop_index]),
+            'competition_level': self._assess_competition_level(crop),
+            'planting_start': planting_dates['start'],
+            'planting_end': planting_dates['end'],
+            'harvest_date': planting_dates['harvest'],
+            'confidence_level': self._calculate_confidence_level(suitability_score),
+            'data_points': self.rng.randint(150, 500),
+            'accuracy_score': Decimal(str(round(0.75 + (suitability_score / 100) * 0.20, 4))),
+            'factors_analyzed': ['soil', 'climate', 'water', 'market', 'rotation', 'price_trends']
+        }
     
     def _estimate_profit_potential(self, crop, suitability_score):
         """Estimate profit potential based on suitability score"""
-        base_profit = random.uniform(1000, 5000)  # Base profit per hectare
+        base_profit = self.rng.uniform(1000, 5000)  # Base profit per hectare
         
         # Adjust based on suitability score
         profit_multiplier = 0.5 + (suitability_score / 100) * 0.8
@@ -493,7 +671,7 @@ class AIRecommendationEngine:
         if crop.name.lower() in high_competition_crops:
             return 'high'
         else:
-            return random.choice(['low', 'medium'])
+            return self.rng.choice(['low', 'medium'])
     
     def _calculate_optimal_planting_dates(self, crop):
         """Calculate optimal planting and harvest dates"""
@@ -502,17 +680,17 @@ class AIRecommendationEngine:
         
         # Different crops have different planting windows
         if crop.name.lower() in ['rice']:
-            planting_start = today + timedelta(days=random.randint(10, 30))
+            planting_start = today + timedelta(days=self.rng.randint(10, 30))
             planting_end = planting_start + timedelta(days=21)
             harvest_date = planting_start + timedelta(days=120)
         elif crop.name.lower() in ['maize']:
-            planting_start = today + timedelta(days=random.randint(5, 25))
+            planting_start = today + timedelta(days=self.rng.randint(5, 25))
             planting_end = planting_start + timedelta(days=14)
             harvest_date = planting_start + timedelta(days=90)
         else:
-            planting_start = today + timedelta(days=random.randint(7, 21))
+            planting_start = today + timedelta(days=self.rng.randint(7, 21))
             planting_end = planting_start + timedelta(days=14)
-            harvest_date = planting_start + timedelta(days=random.randint(60, 100))
+            harvest_date = planting_start + timedelta(days=self.rng.randint(60, 100))
         
         return {
             'start': planting_start,
@@ -542,76 +720,132 @@ class AIRecommendationEngine:
         else:  # March to May
             return 'hot_dry'
     
-    def _get_weather_forecast(self):
-        """Simulate weather forecast data"""
-        forecasts = []
+    def _get_weather_advisories(self):
+        """Build weather advisories from the farm's recent weather record statistics"""
+        advisories = []
+        week, month, season = self.climate[7], self.climate[30], self.climate[90]
         
-        # Generate 7-day forecast
-        for i in range(1, 8):
-            forecast_date = timezone.now() + timedelta(days=i)
-            
-            # Simulate weather conditions
-            conditions = ['sunny', 'partly_cloudy', 'cloudy', 'rainy', 'stormy']
-            condition = random.choice(conditions)
-            
-            forecast = {
-                'condition': condition,
-                'temperature_range': f"{random.randint(22, 28)}-{random.randint(29, 35)}°C",
-                'humidity_level': f"{random.randint(60, 85)}%",
-                'precipitation': f"{random.randint(0, 25)}mm" if condition in ['rainy', 'stormy'] else "0mm",
-                'valid_from': forecast_date,
-                'valid_until': forecast_date + timedelta(hours=23, minutes=59),
-                'horizon_days': i,
-                'data_points': random.randint(50, 200),
-                'confidence_level': 'high' if i <= 3 else 'medium',
-                'priority': 'high' if condition == 'stormy' else 'medium'
-            }
-            
-            # Generate specific advice based on weather
-            if condition == 'rainy':
-                forecast.update({
-                    'description': f"Moderate to heavy rainfall expected on {forecast_date.strftime('%B %d')}. "
-                                 f"Postpone fertilizer application and harvesting activities.",
-                    'irrigation_advice': "Skip irrigation. Monitor drainage in low-lying fields.",
-                    'pest_risk': "Increased risk of fungal diseases and slug activity.",
-                    'harvest_advice': "Delay harvest if crops are ready. Wait for dry conditions.",
-                    'field_work': "Avoid heavy machinery use. Postpone tillage operations.",
-                    'action_required': "Secure equipment, protect harvested crops, check drainage systems"
-                })
-            elif condition == 'stormy':
-                forecast.update({
-                    'description': f"Severe weather warning for {forecast_date.strftime('%B %d')}. "
-                                 f"Strong winds and heavy rain expected. Take protective measures.",
-                    'irrigation_advice': "Turn off irrigation systems. Secure equipment.",
-                    'pest_risk': "Storm may bring new pest pressure. Monitor after weather clears.",
-                    'harvest_advice': "Emergency harvest if crops are mature and weather window permits.",
-                    'field_work': "No field work recommended. Secure all equipment and structures.",
-                    'action_required': "Emergency preparations: secure structures, protect livestock, check insurance"
-                })
-            elif condition == 'sunny':
-                forecast.update({
-                    'description': f"Clear sunny conditions on {forecast_date.strftime('%B %d')}. "
-                                 f"Excellent for field work and harvest activities.",
-                    'irrigation_advice': "Normal irrigation schedule. Monitor soil moisture in sandy soils.",
-                    'pest_risk': "Low pest activity. Good conditions for beneficial insects.",
-                    'harvest_advice': "Optimal conditions for harvesting. Plan harvest activities.",
-                    'field_work': "Excellent conditions for all field operations including planting and cultivation.",
-                    'action_required': "Maximize field work efficiency, plan harvest and planting activities"
-                })
-            else:  # partly_cloudy or cloudy
-                forecast.update({
-                    'description': f"Overcast conditions on {forecast_date.strftime('%B %d')}. "
-                                 f"Good working conditions with reduced heat stress.",
-                    'irrigation_advice': "Reduce irrigation frequency. Good moisture retention expected.",
-                    'pest_risk': "Monitor for increased humidity-related pest activity.",
-                    'harvest_advice': "Good harvesting conditions. Lower risk of heat stress on crops.",
-                    'field_work': "Good conditions for most field operations. Comfortable working temperatures.",
-                    'action_required': "Normal farm operations, adjust irrigation schedule as needed"
-                })
-            
-            forecasts.append(forecast)
+        # Nothing to advise on without recent weather records
+        if not week['days']:
+            return advisories
+        
+        valid_from = timezone.now()
+        rainfall = week['rainfall_total'] or 0
+        coverage = round(week['days'] / 7 * 100, 2)
+        condition = self._classify_recent_weather(week)
+        
+        base = {
+            'temperature_range': self._format_temperature_range(week),
+            'humidity_level': f"{week['humidity_avg']:.0f}%" if week['humidity_avg'] is not None else '',
+            'precipitation': f"{rainfall:.0f}mm",
+            'valid_from': valid_from,
+            'valid_until': valid_from + timedelta(days=7),
+            'horizon_days': 7,
+            'coverage': coverage,
+            'data_points': int(season['days']),
+            'confidence_level': 'high' if week['days'] >= 5 else 'medium',
+        }
+        
+        advisory = dict(base, condition=condition, priority='high' if condition == 'stormy' else 'medium')
+        
+        # Specific advice based on the past week's weather
+        if condition == 'rainy':
+            advisory.update({
+                'description': f"{rainfall:.0f}mm of rain over {week['rainy_days']:.0f} days this past week. "
+                             f"Postpone fertilizer application and harvesting activities.",
+                'irrigation_advice': "Skip irrigation. Monitor drainage in low-lying fields.",
+                'pest_risk': "Increased risk of fungal diseases and slug activity.",
+                'harvest_advice': "Delay harvest if crops are ready. Wait for dry conditions.",
+                'field_work': "Avoid heavy machinery use. Postpone tillage operations.",
+                'action_required': "Secure equipment, protect harvested crops, check drainage systems"
+            })
+        elif condition == 'stormy':
+            advisory.update({
+                'description': f"Severe weather this past week: winds up to {week['wind_max']:.0f} km/h "
+                             f"and {rainfall:.0f}mm of rain. Take protective measures.",
+                'irrigation_advice': "Turn off irrigation systems. Secure equipment.",
+                'pest_risk': "Storm may bring new pest pressure. Monitor after weather clears.",
+                'harvest_advice': "Emergency harvest if crops are mature and weather window permits.",
+                'field_work': "No field work recommended. Secure all equipment and structures.",
+                'action_required': "Emergency preparations: secure structures, protect livestock, check insurance"
+            })
+        elif condition == 'sunny':
+            advisory.update({
+                'description': "Clear, dry conditions this past week. "
+                             "Excellent for field work and harvest activities.",
+                'irrigation_advice': "Normal irrigation schedule. Monitor soil moisture in sandy soils.",
+                'pest_risk': "Low pest activity. Good conditions for beneficial insects.",
+                'harvest_advice': "Optimal conditions for harvesting. Plan harvest activities.",
+                'field_work': "Excellent conditions for all field operations including planting and cultivation.",
+                'action_required': "Maximize field work efficiency, plan harvest and planting activities"
+            })
+        else:  # cloudy
+            advisory.update({
+                'description': "Mild, overcast conditions this past week. "
+                             "Good working conditions with reduced heat stress.",
+                'irrigation_advice': "Reduce irrigation frequency. Good moisture retention expected.",
+                'pest_risk': "Monitor for increased humidity-related pest activity.",
+                'harvest_advice': "Good harvesting conditions. Lower risk of heat stress on crops.",
+                'field_work': "Good conditions for most field operations. Comfortable working temperatures.",
+                'action_required': "Normal farm operations, adjust irrigation schedule as needed"
+            })
+        
+        advisories.append(advisory)
+        
+        # Heat stress when the past week ran well above the monthly mean
+        if (week['temperature_avg'] is not None and month['temperature_avg'] is not None
+                and week['temperature_avg'] - month['temperature_avg'] >= 3):
+            advisories.append(dict(
+                base,
+                condition='heat_stress',
+                priority='high',
+                description=f"Average temperature this past week was {week['temperature_avg']:.1f}°C, "
+                           f"{week['temperature_avg'] - month['temperature_avg']:.1f}°C above the 30-day mean.",
+                irrigation_advice="Irrigate early in the morning or late in the evening to limit evaporation.",
+                pest_risk="Heat favours mites and whitefly. Inspect the undersides of leaves.",
+                harvest_advice="Harvest in the cooler hours and shade harvested produce.",
+                field_work="Schedule labour outside the hottest hours of the day.",
+                action_required="Increase irrigation frequency and mulch exposed soil"
+            ))
         
-        return forecasts
+        # Dry spell when the past month had far less rain than the seasonal rate
+        if season['days'] >= 30 and season['rainfall_total'] and month['days']:
+            expected = season['rainfall_total'] / season['days'] * month['days']
+            actual = month['rainfall_total'] or 0
+            if expected >= 10 and actual < expected * 0.5:
+                advisories.append(dict(
+                    base,
+                    condition='dry_spell',
+                    priority='high',
+                    precipitation=f"{actual:.0f}mm",
+                    description=f"Only {actual:.0f}mm of rain in the last 30 days against "
+                               f"{expected:.0f}mm expected from the 90-day pattern.",
+                    irrigation_advice="Move to a deficit irrigation schedule and prioritise crops at flowering.",
+                    pest_risk="Drought-stressed crops are more susceptible to aphids and borers.",
+                    harvest_advice="Monitor crops for early maturity caused by water stress.",
+                    field_work="Delay new plantings until soil moisture recovers.",
+                    action_required="Check water reserves and irrigate moisture-sensitive crops"
+                ))
+        
+        return advisories
+    
+    def _classify_recent_weather(self, week):
+        """Classify a week of weather statistics into an advisory condition"""
+        rainfall = week['rainfall_total'] or 0
+        
+        if (week['wind_max'] or 0) >= 50 and rainfall >= 30:
+            return 'stormy'
+        elif week['rainy_days'] >= 3 or rainfall >= 25:
+            return 'rainy'
+        elif rainfall < 2 and (week['humidity_avg'] is None or week['humidity_avg'] < 70):
+            return 'sunny'
+        else:
+            return 'cloudy'
+    
+    def _format_temperature_range(self, window):
+        if window['temperature_min'] is None or window['temperature_max'] is None:
+            return ''
+        return f"{window['temperature_min']:.0f}-{window['temperature_max']:.0f}°C"
     
     def _analyze_pest_disease_risk(self, crop_cycle):
         """Analyze pest and disease risk for a crop cycle"""
@@ -652,9 +886,9 @@ class AIRecommendationEngine:
                     'type': risk_base['type'],
                     'probability': probability,
                     'severity': self._determine_severity(probability),
-                    'confidence_score': random.uniform(0.7, 0.95),
+                    'confidence_score': self.rng.uniform(0.7, 0.95),
                     'confidence_level': 'high' if probability > 60 else 'medium',
-                    'data_points': random.randint(100, 300),
+                    'data_points': self.rng.randint(100, 300),
                     'risk_factors': self._identify_risk_factors(crop_cycle, risk_base),
                     'expected_impact': self._describe_expected_impact(risk_base, probability),
                     'recommended_actions': self._generate_treatment_recommendations(risk_base),
@@ -671,19 +905,19 @@ class AIRecommendationEngine:
     
     def _calculate_pest_disease_probability(self, crop_cycle, risk_base):
         """Calculate probability of pest/disease occurrence"""
-        base_probability = random.uniform(25, 75)
+        base_probability = self.rng.uniform(25, 75)
         
         # Adjust based on season
         season = self._get_current_season()
         if season == 'wet' and risk_base['type'] == 'disease':
-            base_probability += random.uniform(10, 20)
+            base_probability += self.rng.uniform(10, 20)
         elif season == 'dry' and risk_base['type'] == 'pest':
-            base_probability += random.uniform(5, 15)
+            base_probability += self.rng.uniform(5, 15)
         
         # Adjust based on crop age
         days_since_planting = (self.current_date - crop_cycle.planting_date).days
         if 30 <= days_since_planting <= 60:  # Vulnerable stage
-            base_probability += random.uniform(5, 15)
+            base_probability += self.rng.uniform(5, 15)
         
         return min(95, max(5, base_probability))
     
@@ -756,7 +990,7 @@ class AIRecommendationEngine:
     
     def _estimate_onset_date(self, crop_cycle, risk_base):
         """Estimate onset date for pest/disease"""
-        days_ahead = random.randint(7, 21)
+        days_ahead = self.rng.randint(7, 21)
         return self.current_date + timedelta(days=days_ahead)
     
     def _create_risk_assessment(self, probability, crop_cycle):
@@ -771,11 +1005,11 @@ class AIRecommendationEngine:
     def _analyze_resource_usage(self, resource_type):
         """Analyze resource usage and optimization opportunities"""
         # Simulate current usage data
-        current_usage = random.uniform(1000, 5000)
-        current_cost = random.uniform(500, 2500)
+        current_usage = self.rng.uniform(1000, 5000)
+        current_cost = self.rng.uniform(500, 2500)
         
         # Calculate optimization potential
-        efficiency_improvement = random.uniform(10, 35)
+        efficiency_improvement = self.rng.uniform(10, 35)
         recommended_usage = current_usage * (1 - efficiency_improvement / 100)
         potential_savings = current_cost * (efficiency_improvement / 100)
         
@@ -791,10 +1025,10 @@ class AIRecommendationEngine:
             'investment_required': Decimal(str(round(potential_savings * 0.3, 2))),
             'payback_days': int(potential_savings * 0.3 / (potential_savings / 365)) if potential_savings > 0 else None,
             'environmental_benefit': self._get_environmental_benefit(resource_type),
-            'sustainability_score': Decimal(str(round(random.uniform(70, 95), 2))),
+            'sustainability_score': Decimal(str(round(self.rng.uniform(70, 95), 2))),
             'confidence_level': 'high' if efficiency_improvement > 20 else 'medium',
-            'accuracy_score': random.uniform(0.8, 0.95),
-            'data_points': random.randint(200, 500),
+            'accuracy_score': self.rng.uniform(0.8, 0.95),
+            'data_points': self.rng.randint(200, 500),
             'action_required': self._get_resource_action(resource_type),
             'savings_breakdown': self._get_savings_breakdown(resource_type, potential_savings)
         }
@@ -871,22 +1105,22 @@ class AIRecommendationEngine:
     
     def _analyze_market_trends(self, crop):
         """Analyze market trends and generate price predictions"""
-        current_price = Decimal(str(round(random.uniform(2.0, 8.0), 2)))
+        current_price = Decimal(str(round(self.rng.uniform(2.0, 8.0), 2)))
         
         # Simulate price trend analysis
-        trend_direction = random.choice(['increasing', 'decreasing', 'stable'])
+        trend_direction = self.rng.choice(['increasing', 'decreasing', 'stable'])
         
         if trend_direction == 'increasing':
-            price_change = random.uniform(5, 25)
-            predicted_price = current_price * (1 + price_change / 100)
+            price_change = self.rng.uniform(5, 25)
+            predicted_price = float(current_price) * (1 + price_change / 100)
         elif trend_direction == 'decreasing':
-            price_change = random.uniform(-20, -5)
-            predicted_price = current_price * (1 + price_change / 100)
+            price_change = self.rng.uniform(-20, -5)
+            predicted_price = float(current_price) * (1 + price_change / 100)
         else:
-            price_change = random.uniform(-5, 5)
-            predicted_price = current_price * (1 + price_change / 100)
+            price_change = self.rng.uniform(-5, 5)
+            predicted_price = float(current_price) * (1 + price_change / 100)
         
-        prediction_date = self.current_date + timedelta(days=random.randint(15, 45))
+        prediction_date = self.current_date + timedelta(days=self.rng.randint(15, 45))
         optimal_selling_date = prediction_date if trend_direction == 'increasing' else self.current_date + timedelta(days=7)
         
         # Determine recommended action
@@ -904,35 +1138,39 @@ class AIRecommendationEngine:
             'current_price': current_price,
             'predicted_price': Decimal(str(round(predicted_price, 2))),
             'prediction_date': prediction_date,
-            'horizon_days': random.randint(30, 60),
-            'supply_demand_ratio': Decimal(str(round(random.uniform(0.8, 1.3), 4))),
-            'seasonal_factor': Decimal(str(round(random.uniform(0.9, 1.2), 4))),
-            'weather_impact': Decimal(str(round(random.uniform(0.95, 1.1), 4))),
+            'horizon_days': self.rng.randint(30, 60),
+            'supply_demand_ratio': Decimal(str(round(self.rng.uniform(0.8, 1.3), 4))),
+            'seasonal_factor': Decimal(str(round(self.rng.uniform(0.9, 1.2), 4))),
+            'weather_impact': Decimal(str(round(self.rng.uniform(0.95, 1.1), 4))),
             'recommended_action': recommended_action,
             'optimal_selling_date': optimal_selling_date,
-            'confidence_interval': f"±{random.randint(5, 15)}%",
-            'accuracy_score': random.uniform(0.75, 0.92),
+            'confidence_interval': f"±{self.rng.randint(5, 15)}%",
+            'accuracy_score': self.rng.uniform(0.75, 0.92),
             'confidence_level': 'high' if abs(price_change) > 10 else 'medium',
-            'data_points': random.randint(300, 800),
+            'data_points': self.rng.randint(300, 800),
             'price_trend': f"Price {trend_direction} by {abs(price_change):.1f}%",
             'price_change_percentage': round(price_change, 2),
             'action_required': action_required,
             'market_factors': {
-                'supply_level': random.choice(['low', 'normal', 'high']),
-                'demand_level': random.choice(['low', 'normal', 'high']),
-                'export_demand': random.choice(['weak', 'moderate', 'strong']),
-                'competing_crops': random.choice(['few', 'moderate', 'many'])
+                'supply_level': self.rng.choice(['low', 'normal', 'high']),
+                'demand_level': self.rng.choice(['low', 'normal', 'high']),
+                'export_demand': self.rng.choice(['weak', 'moderate', 'strong']),
+                'competing_crops': self.rng.choice(['few', 'moderate', 'many'])
             }
         }
         
         return prediction
 
 
-def run_ai_recommendations_for_farm(farm, user):
+def run_ai_recommendations_for_farm(farm, user, batch=False, progress_callback=None, crop_matrix=None,
+                                    force=False, seed=None, dry_run=False):
     """
     Main function to run AI recommendations for a specific farm
     """
-    engine = AIRecommendationEngine(farm, user)
+    engine = AIRecommendationEngine(
+        farm, user, batch=batch, crop_matrix=crop_matrix, progress_callback=progress_callback, force=force,
+        seed=seed, dry_run=dry_run
+    )
     recommendations = engine.generate_all_recommendations()
     
     return {
@@ -943,5 +1181,7 @@ def run_ai_recommendations_for_farm(farm, user):
         },
         'high_priority_count': len([r for r in recommendations if r.priority == 'high']),
         'urgent_count': len([r for r in recommendations if r.priority == 'urgent']),
+        'reused_count': engine.reused_count,
+        'stage_timings': engine.stage_timings,
         'recommendations': recommendations
     }
\ No newline at end of file
@@ -0,0 +1,147 @@
+import random
+import statistics
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from apps.farms.models import Farm, FarmSection, Crop, CropCycle, SoilTest, WeatherRecord
+from .ai_algorithms import AIRecommendationEngine
+from .climate import invalidate_climate_summary
+from .scoring import CropFeatureMatrix
+
+User = get_user_model()
+
+CROP_NAMES = ['Rice', 'Maize', 'Wheat', 'Tomatoes', 'Beans', 'Onions', 'Millet', 'Cassava', 'Yam', 'Sorghum']
+
+
+def build_synthetic_farm(fields=10, crops=20, cycles=3, weather_days=90, seed=None):
+    """
+    Create a synthetic farm with the given number of fields, crops and crop
+    cycles per field, plus soil tests and daily weather records.
+
+    Crop cycles and weather records are created with bulk_create, so CropCycle
+    calendar events are skipped. Returns (user, farm, crop_list).
+    """
+    rng = random.Random(seed)
+    today = timezone.now().date()
+    tag = uuid.uuid4().hex[:8]
+
+    user = User.objects.create(username=f'benchmark-{tag}', email=f'benchmark-{tag}@example.com')
+    farm = Farm.objects.create(
+        name=f'Benchmark Farm {tag}', owner=user, farm_type='crop',
+        location='Benchmark', size=Decimal(fields * 2)
+    )
+
+    crop_list = [
+        Crop.objects.create(
+            name=CROP_NAMES[i % len(CROP_NAMES)] if i < len(CROP_NAMES) else f'{CROP_NAMES[i % len(CROP_NAMES)]} {i}',
+            average_growing_period_days=rng.randint(60, 150),
+            ideal_temperature_min=Decimal(rng.randint(12, 20)),
+            ideal_temperature_max=Decimal(rng.randint(26, 35)),
+            ideal_rainfall_min=Decimal(rng.randint(300, 700)),
+            ideal_rainfall_max=Decimal(rng.randint(900, 1800)),
+            ideal_soil_ph_min=Decimal(str(round(rng.uniform(5.0, 6.0), 1))),
+            ideal_soil_ph_max=Decimal(str(round(rng.uniform(6.5, 7.5), 1))),
+        )
+        for i in range(crops)
+    ]
+
+    sections = [
+        FarmSection.objects.create(farm=farm, name=f'Field {i + 1}', size=Decimal('2.00'))
+        for i in range(fields)
+    ]
+
+    # Cycles run back to back, the most recent one still growing
+    crop_cycles = []
+    for section in sections:
+        planting_date = today - timedelta(days=40)
+        for index in range(cycles):
+            crop = rng.choice(crop_list)
+            crop_cycles.append(CropCycle(
+                field=section,
+                crop=crop,
+                planting_date=planting_date,
+                expected_harvest_date=planting_date + timedelta(days=crop.average_growing_period_days),
+                status='active' if index == 0 else 'harvested',
+            ))
+            planting_date -= timedelta(days=crop.average_growing_period_days + 30)
+    CropCycle.objects.bulk_create(crop_cycles)
+
+    # SoilTest.save() keeps the LatestSoilTest index up to date
+    for section in sections:
+        SoilTest.objects.create(
+            field=section,
+            test_date=today - timedelta(days=rng.randint(0, 365)),
+            ph=Decimal(str(round(rng.uniform(4.5, 8.0), 2))),
+            nitrogen_ppm=Decimal(rng.randint(5, 50)),
+            phosphorus_ppm=Decimal(rng.randint(5, 40)),
+            potassium_ppm=Decimal(rng.randint(50, 250)),
+            organic_matter_percentage=Decimal(str(round(rng.uniform(0.5, 5.0), 2))),
+        )
+
+    WeatherRecord.objects.bulk_create([
+        WeatherRecord(
+            farm=farm,
+            date=today - timedelta(days=day),
+            temperature_min=Decimal(rng.randint(15, 22)),
+            temperature_max=Decimal(rng.randint(27, 36)),
+            temperature_avg=Decimal(rng.randint(22, 29)),
+            rainfall_mm=Decimal(rng.choice([0, 0, 0, rng.randint(1, 40)])),
+            humidity_percentage=Decimal(rng.randint(40, 90)),
+            wind_speed_kmh=Decimal(rng.randint(2, 40)),
+        )
+        for day in range(weather_days)
+    ])
+
+    return user, farm, crop_list
+
+
+def benchmark_recommendations(fields=10, crops=20, cycles=3, weather_days=90, repeat=3, seed=42, persist=False):
+    """
+    Time each generate_* stage of the engine on a synthetic farm.
+
+    Runs are seeded, so every repeat computes the same recommendations. With
+    persist=False the engine runs in dry run mode and only computation is
+    timed; with persist=True the batch writes are included as a 'persist'
+    stage. The synthetic farm is rolled back afterwards.
+
+    Returns {'stages': {stage: {'mean', 'min', 'max'}}, 'total_recommendations': n}
+    with timings in seconds.
+    """
+    timings = {}
+    total_recommendations = 0
+
+    with transaction.atomic():
+        user, farm, crop_list = build_synthetic_farm(fields, crops, cycles, weather_days, seed=seed)
+        crop_matrix = CropFeatureMatrix(crop_list)
+
+        for _ in range(repeat):
+            engine = AIRecommendationEngine(
+                farm, user, batch=True, crop_matrix=crop_matrix,
+                force=True, seed=seed, dry_run=not persist
+            )
+            total_recommendations = len(engine.generate_all_recommendations())
+
+            for stage, seconds in engine.stage_timings.items():
+                timings.setdefault(stage, []).append(seconds)
+
+        transaction.set_rollback(True)
+
+    # Don't leave the rolled back farm's climate statistics in the cache
+    invalidate_climate_summary(farm.id)
+
+    return {
+        'stages': {
+            stage: {
+                'mean': round(statistics.mean(samples), 4),
+                'min': round(min(samples), 4),
+                'max': round(max(samples), 4),
+            }
+            for stage, samples in timings.items()
+        },
+        'total_recommendations': total_recommendations,
+    }
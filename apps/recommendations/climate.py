@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, Max, Min, Q, Sum
+from django.utils import timezone
+
+from apps.farms.models import WeatherRecord
+
+
+# Rolling windows, in days, summarised for every farm
+CLIMATE_WINDOWS = (7, 30, 90)
+
+# Rainfall at or above which a day counts as rainy
+RAINY_DAY_MM = 1
+
+CLIMATE_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def climate_cache_key(farm_id, day):
+    return f'climate_summary:{farm_id}:{day.isoformat()}'
+
+
+def compute_climate_summary(farm, today=None):
+    """
+    Aggregate a farm's WeatherRecords over every rolling window in one query.
+
+    Returns {window_days: {statistic: value}} with None for statistics that
+    have no data in the window.
+    """
+    today = today or timezone.now().date()
+
+    aggregates = {}
+    for window in CLIMATE_WINDOWS:
+        in_window = Q(date__gt=today - timedelta(days=window))
+        aggregates.update({
+            f'days_{window}': Count('id', filter=in_window),
+            f'temperature_avg_{window}': Avg('temperature_avg', filter=in_window),
+            f'temperature_min_{window}': Min('temperature_min', filter=in_window),
+            f'temperature_max_{window}': Max('temperature_max', filter=in_window),
+            f'rainfall_total_{window}': Sum('rainfall_mm', filter=in_window),
+            f'rainy_days_{window}': Count('id', filter=in_window & Q(rainfall_mm__gte=RAINY_DAY_MM)),
+            f'humidity_avg_{window}': Avg('humidity_percentage', filter=in_window),
+            f'wind_max_{window}': Max('wind_speed_kmh', filter=in_window),
+        })
+
+    row = WeatherRecord.objects.filter(
+        farm=farm,
+        date__gt=today - timedelta(days=max(CLIMATE_WINDOWS)),
+        date__lte=today
+    ).aggregate(**aggregates)
+
+    summary = {}
+    for window in CLIMATE_WINDOWS:
+        suffix = f'_{window}'
+        summary[window] = {
+            name[:-len(suffix)]: value if value is None or isinstance(value, int) else round(float(value), 2)
+            for name, value in row.items()
+            if name.endswith(suffix)
+        }
+
+    return summary
+
+
+def get_climate_summary(farm, today=None):
+    """Return the farm's climate summary, cached until a new WeatherRecord is written"""
+    today = today or timezone.now().date()
+    key = climate_cache_key(farm.id, today)
+
+    summary = cache.get(key)
+    if summary is None:
+        summary = compute_climate_summary(farm, today)
+        cache.set(key, summary, CLIMATE_CACHE_TIMEOUT)
+
+    return summary
+
+
+def invalidate_climate_summary(farm_id):
+    """Drop the cached climate summary of a farm after its weather data changed"""
+    cache.delete(climate_cache_key(farm_id, timezone.now().date()))
+
+
+def annual_rainfall(window_stats):
+    """Extrapolate a window's rainfall to an annual total, None without enough data"""
+    if not window_stats['days'] or window_stats['rainfall_total'] is None:
+        return None
+    return window_stats['rainfall_total'] / window_stats['days'] * 365
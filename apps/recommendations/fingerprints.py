@@ -0,0 +1,87 @@
+import hashlib
+
+from django.db.models import Count, Max
+
+from apps.activities.models import Activity
+from apps.farms.models import FarmSection, CropCycle, SoilTest, WeatherRecord
+
+
+# Recommendation types generated per field; every other type is farm-wide
+FIELD_SCOPED_TYPES = {'crop_selection', 'pest_disease'}
+
+
+def _digest(*parts):
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _latest_by_field(queryset):
+    # The row count makes deletions visible as well as inserts and updates
+    rows = queryset.values('field_id').annotate(latest=Max('updated_at'), total=Count('id'))
+    return {row['field_id']: (row['latest'], row['total']) for row in rows}
+
+
+class FarmFingerprints:
+    """
+    Cheap fingerprints of the data recommendations are computed from.
+
+    Each field fingerprint covers the field itself and the latest change to
+    its CropCycles, SoilTests and Activities. The farm fingerprint combines
+    all field fingerprints with the latest WeatherRecord change, corrections
+    to earlier observations included.
+    """
+
+    def __init__(self, fields, cycles, soil_tests, activities, weather):
+        self.sections = list(fields)
+        self.weather = _digest('weather', weather)
+        self.fields = {
+            field.id: _digest(
+                field.id, field.updated_at,
+                cycles.get(field.id), soil_tests.get(field.id), activities.get(field.id)
+            )
+            for field in self.sections
+        }
+        self.farm = _digest(self.weather, *sorted(self.fields.values()))
+
+    @classmethod
+    def for_farms(cls, farm_ids):
+        """Compute the fingerprints of several farms with one grouped query per source"""
+        fields_by_farm = {farm_id: [] for farm_id in farm_ids}
+        for field in FarmSection.objects.filter(farm_id__in=farm_ids):
+            fields_by_farm[field.farm_id].append(field)
+        
+        cycles = _latest_by_field(CropCycle.objects.filter(field__farm_id__in=farm_ids))
+        soil_tests = _latest_by_field(SoilTest.objects.filter(field__farm_id__in=farm_ids))
+        activities = _latest_by_field(Activity.objects.filter(field__farm_id__in=farm_ids))
+        weather = {
+            row['farm_id']: (row['latest'], row['total'])
+            for row in WeatherRecord.objects.filter(farm_id__in=farm_ids).values('farm_id').annotate(
+                latest=Max('updated_at'), total=Count('id')
+            )
+        }
+        
+        return {
+            farm_id: cls(fields, cycles, soil_tests, activities, weather.get(farm_id, (None, 0)))
+            for farm_id, fields in fields_by_farm.items()
+        }
+
+    @classmethod
+    def for_farm(cls, farm):
+        """Compute all fingerprints for a farm with one grouped query per source"""
+        return cls.for_farms([farm.id])[farm.id]
+
+    def for_scope(self, recommendation_type, field_id=None):
+        """Return the fingerprint of the inputs behind one recommendation scope"""
+        if recommendation_type == 'crop_selection':
+            # Crop suitability also depends on the farm's climate
+            return _digest(self.fields.get(field_id, ''), self.weather)
+        if recommendation_type in FIELD_SCOPED_TYPES:
+            return self.fields.get(field_id, '')
+        if recommendation_type == 'weather_based':
+            return self.weather
+        return self.farm
+
+    def all_scopes(self):
+        """Return every fingerprint a current recommendation of this farm can carry"""
+        fingerprints = {self.farm, self.weather, *self.fields.values()}
+        fingerprints.update(self.for_scope('crop_selection', field_id) for field_id in self.fields)
+        return fingerprints
@@ -0,0 +1,129 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models import F
+from django.utils import timezone
+
+from apps.farms.models import Farm
+from .ai_algorithms import run_ai_recommendations_for_farm
+from .fingerprints import FarmFingerprints
+from .models import RecommendationEngine
+from .scoring import CropFeatureMatrix
+
+
+# Crop catalogue loaded once per pool worker by _init_worker
+_worker_crop_matrix = None
+
+# Farms whose inputs are fingerprinted together when looking for stale ones
+STALENESS_BATCH_SIZE = 500
+
+
+def get_stale_farm_ids(farm_ids):
+    """
+    Return the farms the engine would not wholly reuse on a refresh.
+
+    A farm is stale when it has no current recommendation, when one of its
+    active recommendations has expired, or when one was computed from
+    inputs whose FarmFingerprints have since changed: its fields, crop
+    cycles, soil tests, activities or weather, deletions included.
+    """
+    now = timezone.now()
+    stale = []
+
+    for start in range(0, len(farm_ids), STALENESS_BATCH_SIZE):
+        batch = farm_ids[start:start + STALENESS_BATCH_SIZE]
+        fingerprints = FarmFingerprints.for_farms(batch)
+        recommendations = RecommendationEngine.objects.filter(
+            farm_id__in=batch, user_id=F('farm__owner_id'), is_active=True, is_implemented=False
+        ).values_list('farm_id', 'recommendation_type', 'field_id', 'input_fingerprint', 'valid_until')
+
+        current, changed = set(), set()
+        for farm_id, recommendation_type, field_id, input_fingerprint, valid_until in recommendations:
+            if valid_until is not None and valid_until <= now:
+                changed.add(farm_id)
+            elif input_fingerprint != fingerprints[farm_id].for_scope(recommendation_type, field_id):
+                changed.add(farm_id)
+            else:
+                current.add(farm_id)
+
+        stale.extend(farm_id for farm_id in batch if farm_id in changed or farm_id not in current)
+
+    return stale
+
+
+def _init_worker():
+    global _worker_crop_matrix
+
+    # Forked workers must not reuse the parent's database connections
+    connections.close_all()
+    _worker_crop_matrix = CropFeatureMatrix.load()
+
+
+def refresh_farm_chunk(farm_ids, crop_matrix=None, force=False):
+    """Refresh recommendations for a shard of farms, reusing one crop catalogue"""
+    crop_matrix = crop_matrix or _worker_crop_matrix or CropFeatureMatrix.load()
+    stats = {'refreshed': 0, 'recommendations': 0, 'reused': 0, 'failed': {}}
+
+    for farm in Farm.objects.filter(id__in=farm_ids).select_related('owner'):
+        try:
+            result = run_ai_recommendations_for_farm(
+                farm, farm.owner, batch=True, crop_matrix=crop_matrix, force=force
+            )
+        except Exception as e:
+            stats['failed'][farm.id] = str(e)
+            continue
+
+        stats['refreshed'] += 1
+        stats['recommendations'] += result['total_recommendations']
+        stats['reused'] += result['reused_count']
+
+    return stats
+
+
+def refresh_fleet_recommendations(workers=None, chunk_size=None, force=False):
+    """
+    Regenerate recommendations for every active farm whose inputs changed.
+
+    Farms are sharded into chunks of chunk_size and spread over a pool of
+    worker processes. With a single worker the chunks run in this process.
+    """
+    workers = workers or settings.RECOMMENDATION_REFRESH_WORKERS
+    if connection.vendor == 'sqlite':
+        # SQLite allows a single writer, extra processes only contend for the lock
+        workers = 1
+    chunk_size = chunk_size or settings.RECOMMENDATION_REFRESH_CHUNK_SIZE
+    started = time.perf_counter()
+
+    farm_ids = list(Farm.objects.filter(is_active=True).order_by('id').values_list('id', flat=True))
+    stale_ids = farm_ids if force else get_stale_farm_ids(farm_ids)
+    chunks = [stale_ids[i:i + chunk_size] for i in range(0, len(stale_ids), chunk_size)]
+
+    if workers > 1 and len(chunks) > 1:
+        # Connections are not fork safe, so drop them before the pool starts
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            chunk_stats = list(executor.map(partial(refresh_farm_chunk, force=force), chunks))
+    else:
+        crop_matrix = CropFeatureMatrix.load()
+        chunk_stats = [refresh_farm_chunk(chunk, crop_matrix, force=force) for chunk in chunks]
+
+    elapsed = time.perf_counter() - started
+    refreshed = sum(stats['refreshed'] for stats in chunk_stats)
+    failed = {}
+    for stats in chunk_stats:
+        failed.update(stats['failed'])
+
+    return {
+        'active_farms': len(farm_ids),
+        'skipped_farms': len(farm_ids) - len(stale_ids),
+        'refreshed_farms': refreshed,
+        'failed_farms': failed,
+        'total_recommendations': sum(stats['recommendations'] for stats in chunk_stats),
+        'reused_recommendations': sum(stats['reused'] for stats in chunk_stats),
+        'workers': workers if len(chunks) > 1 else 1,
+        'elapsed_seconds': round(elapsed, 3),
+        'farms_per_second': round(refreshed / elapsed, 2) if elapsed else 0,
+    }
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from apps.recommendations.benchmark import benchmark_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Time each recommendation engine stage on a synthetic farm (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fields', type=int, default=10)
+        parser.add_argument('--crops', type=int, default=20)
+        parser.add_argument('--cycles', type=int, default=3, help='Crop cycles per field')
+        parser.add_argument('--weather-days', type=int, default=90)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--persist', action='store_true', help='Include the batch database writes')
+
+    def handle(self, *args, **options):
+        result = benchmark_recommendations(
+            fields=options['fields'],
+            crops=options['crops'],
+            cycles=options['cycles'],
+            weather_days=options['weather_days'],
+            repeat=options['repeat'],
+            seed=options['seed'],
+            persist=options['persist']
+        )
+
+        self.stdout.write(
+            f"{options['fields']} fields, {options['crops']} crops, {options['cycles']} cycles/field, "
+            f"{options['repeat']} runs, {result['total_recommendations']} recommendations per run"
+        )
+        self.stdout.write(f"{'stage':<25}{'mean (s)':>12}{'min (s)':>12}{'max (s)':>12}")
+        for stage, timing in result['stages'].items():
+            self.stdout.write(f"{stage:<25}{timing['mean']:>12.4f}{timing['min']:>12.4f}{timing['max']:>12.4f}")
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 12:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0002_recommendationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recommendationengine',
+            name='input_fingerprint',
+            field=models.CharField(blank=True, max_length=40),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-18 13:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0003_recommendationengine_input_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='croprecommendation',
+            name='bulk_key',
+            field=models.UUIDField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='marketpriceprediction',
+            name='bulk_key',
+            field=models.UUIDField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='pestdiseasealert',
+            name='bulk_key',
+            field=models.UUIDField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='recommendationengine',
+            name='bulk_key',
+            field=models.UUIDField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='resourceoptimization',
+            name='bulk_key',
+            field=models.UUIDField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='weatherrecommendation',
+            name='bulk_key',
+            field=models.UUIDField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
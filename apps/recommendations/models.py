@@ -4,10 +4,12 @@ from django.utils import timezone
 from decimal import Decimal
 import json
 
+from core.bulk import BulkInsertKey
+
 User = get_user_model()
 
 
-class RecommendationEngine(models.Model):
+class RecommendationEngine(BulkInsertKey):
     RECOMMENDATION_TYPES = [
         ('crop_selection', 'Crop Selection'),
         ('planting_timing', 'Planting Timing'),
@@ -66,6 +68,9 @@ class RecommendationEngine(models.Model):
     # Additional data storage
     metadata = models.JSONField(default=dict, blank=True)
     
+    # Fingerprint of the farm data this recommendation was computed from
+    input_fingerprint = models.CharField(max_length=40, blank=True)
+    
     class Meta:
         ordering = ['-created_at']
         indexes = [
@@ -86,7 +91,7 @@ class RecommendationEngine(models.Model):
         return (timezone.now() - self.created_at).days
 
 
-class CropRecommendation(models.Model):
+class CropRecommendation(BulkInsertKey):
     farm = models.ForeignKey('farms.Farm', on_delete=models.CASCADE)
     field = models.ForeignKey('farms.FarmSection', on_delete=models.CASCADE, null=True, blank=True)
     recommended_crop = models.ForeignKey('farms.Crop', on_delete=models.CASCADE)
@@ -132,7 +137,7 @@ class CropRecommendation(models.Model):
         return f"{self.recommended_crop.name} for {self.farm.name}{field_name} ({self.season})"
 
 
-class WeatherRecommendation(models.Model):
+class WeatherRecommendation(BulkInsertKey):
     farm = models.ForeignKey('farms.Farm', on_delete=models.CASCADE)
     weather_condition = models.CharField(max_length=50)
     temperature_range = models.CharField(max_length=20, blank=True)
@@ -160,7 +165,7 @@ class WeatherRecommendation(models.Model):
         return f"Weather advice for {self.farm.name} - {self.weather_condition}"
 
 
-class PestDiseaseAlert(models.Model):
+class PestDiseaseAlert(BulkInsertKey):
     SEVERITY_LEVELS = [
         ('low', 'Low Risk'),
         ('medium', 'Medium Risk'),
@@ -213,7 +218,7 @@ class PestDiseaseAlert(models.Model):
         return f"{self.pest_or_disease_name} alert for {self.farm.name}"
 
 
-class ResourceOptimization(models.Model):
+class ResourceOptimization(BulkInsertKey):
     RESOURCE_TYPES = [
         ('water', 'Water/Irrigation'),
         ('fertilizer', 'Fertilizer'),
@@ -258,7 +263,7 @@ class ResourceOptimization(models.Model):
         return f"{self.get_resource_type_display()} optimization for {self.farm.name}"
 
 
-class MarketPricePrediction(models.Model):
+class MarketPricePrediction(BulkInsertKey):
     crop = models.ForeignKey('farms.Crop', on_delete=models.CASCADE)
     region = models.CharField(max_length=100, default='Local Market')
     
@@ -334,4 +339,57 @@ class RecommendationFeedback(models.Model):
         unique_together = ['recommendation', 'user']
     
     def __str__(self):
-        return f"Feedback for {self.recommendation.title} by {self.user.username}"
\ No newline at end of file
+        return f"Feedback for {self.recommendation.title} by {self.user.username}"
+
+class RecommendationJob(models.Model):
+    """Background recommendation generation run for a farm"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    farm = models.ForeignKey('farms.Farm', on_delete=models.CASCADE, related_name='recommendation_jobs')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recommendation_jobs')
+    task_id = models.CharField(max_length=255, blank=True)
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    progress = models.PositiveSmallIntegerField(default=0)  # Percentage 0-100
+    current_stage = models.CharField(max_length=50, blank=True)
+    
+    # Summary of the run: totals, recommendations_by_type, stage timings
+    result = models.JSONField(default=dict, blank=True)
+    error_message = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['farm', 'user', 'status']),
+        ]
+    
+    def __str__(self):
+        return f"Recommendation job #{self.id} for {self.farm.name} ({self.get_status_display()})"
+    
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+    
+    def as_dict(self):
+        """Polling payload for the job status endpoint"""
+        return {
+            'job_id': self.id,
+            'farm_id': self.farm_id,
+            'status': self.status,
+            'progress': self.progress,
+            'current_stage': self.current_stage,
+            'result': self.result,
+            'error_message': self.error_message,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
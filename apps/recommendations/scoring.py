@@ -0,0 +1,292 @@
+import numpy as np
+
+from apps.farms.models import Crop, LatestSoilTest
+from .climate import annual_rainfall
+
+
+# Weights of each factor in the overall suitability score
+SUITABILITY_WEIGHTS = {
+    'soil': 0.25,
+    'climate': 0.20,
+    'water': 0.15,
+    'market': 0.15,
+    'price': 0.15,
+    'rotation': 0.10,
+}
+
+# Crop name groups used by the seasonal and market adjustments
+WET_SEASON_CROPS = ['rice', 'vegetables']
+DRY_SEASON_CROPS = ['maize', 'millet']
+HIGH_DEMAND_CROPS = ['rice', 'maize', 'tomatoes', 'onions', 'potatoes']
+HIGH_COMPETITION_CROPS = ['rice', 'maize', 'wheat']
+
+# Soil scoring: score used when a field has no soil test or a crop has no pH range,
+# points lost per pH unit outside the crop's ideal range and nutrient levels (ppm,
+# organic matter in %) above which a field counts as fully supplied
+SOIL_DEFAULT_SCORE = 70.0
+SOIL_PH_PENALTY_PER_UNIT = 25.0
+SOIL_PH_WEIGHT = 0.7
+SOIL_NUTRIENT_SUFFICIENCY = {
+    'nitrogen_ppm': 25.0,
+    'phosphorus_ppm': 20.0,
+    'potassium_ppm': 150.0,
+    'organic_matter_percentage': 3.0,
+}
+
+# Climate scoring: points lost per degree outside the crop's temperature range
+# and per percent of annual rainfall outside its rainfall range, and the
+# seasonal bonus used when a farm has no weather records yet
+CLIMATE_DEFAULT_SCORE = 70.0
+CLIMATE_TEMPERATURE_PENALTY_PER_DEGREE = 8.0
+CLIMATE_RAINFALL_PENALTY_PER_PERCENT = 1.0
+CLIMATE_TEMPERATURE_WEIGHT = 0.6
+SEASONAL_BONUS = {'wet': 10.0, 'dry': 7.5}
+
+# Demand and competition classes
+CLASS_NORMAL = 0
+CLASS_HIGH = 1
+
+
+class CropFeatureMatrix:
+    """Crop catalogue packed into a compact numeric matrix for vectorized scoring"""
+
+    # Column layout of the feature matrix
+    TEMPERATURE_MIN = 0
+    TEMPERATURE_MAX = 1
+    RAINFALL_MIN = 2
+    RAINFALL_MAX = 3
+    SOIL_PH_MIN = 4
+    SOIL_PH_MAX = 5
+    GROWING_PERIOD = 6
+    DEMAND_CLASS = 7
+    COMPETITION_CLASS = 8
+    WET_SEASON = 9
+    DRY_SEASON = 10
+
+    NUMERIC_FIELDS = [
+        'ideal_temperature_min', 'ideal_temperature_max',
+        'ideal_rainfall_min', 'ideal_rainfall_max',
+        'ideal_soil_ph_min', 'ideal_soil_ph_max',
+        'average_growing_period_days',
+    ]
+
+    def __init__(self, crops):
+        self.crops = list(crops)
+        self.crop_ids = np.array([crop.id for crop in self.crops], dtype=np.int64)
+        self.index_by_id = {crop.id: index for index, crop in enumerate(self.crops)}
+        self.features = np.full((len(self.crops), 11), np.nan, dtype=np.float64)
+
+        for index, crop in enumerate(self.crops):
+            row = self.features[index]
+
+            # Missing catalogue values stay NaN
+            for column, field_name in enumerate(self.NUMERIC_FIELDS):
+                value = getattr(crop, field_name)
+                if value is not None:
+                    row[column] = float(value)
+
+            # Name-based classes are resolved once here instead of per field
+            name = crop.name.lower()
+            row[self.DEMAND_CLASS] = CLASS_HIGH if name in HIGH_DEMAND_CROPS else CLASS_NORMAL
+            row[self.COMPETITION_CLASS] = CLASS_HIGH if name in HIGH_COMPETITION_CROPS else CLASS_NORMAL
+            row[self.WET_SEASON] = name in WET_SEASON_CROPS
+            row[self.DRY_SEASON] = name in DRY_SEASON_CROPS
+
+    @classmethod
+    def load(cls):
+        """Load the whole Crop catalogue in a single query"""
+        return cls(Crop.objects.all().order_by('id'))
+
+    def __len__(self):
+        return len(self.crops)
+
+    def column(self, column):
+        return self.features[:, column]
+
+
+class FieldSoilMatrix:
+    """Latest soil test of each field packed into a matrix, one row per field"""
+
+    PH = 0
+    NUTRIENT_FIELDS = list(SOIL_NUTRIENT_SUFFICIENCY)
+    VALUE_FIELDS = ['ph'] + NUTRIENT_FIELDS
+
+    def __init__(self, field_ids, soil_tests_by_field):
+        self.field_ids = list(field_ids)
+        self.values = np.full((len(self.field_ids), len(self.VALUE_FIELDS)), np.nan, dtype=np.float64)
+
+        for index, field_id in enumerate(self.field_ids):
+            soil_test = soil_tests_by_field.get(field_id)
+            if soil_test is None:
+                continue
+
+            for column, field_name in enumerate(self.VALUE_FIELDS):
+                value = getattr(soil_test, field_name)
+                if value is not None:
+                    self.values[index, column] = float(value)
+
+    @classmethod
+    def for_fields(cls, fields):
+        """Load the latest soil test of every field from the LatestSoilTest index in one query"""
+        field_ids = [field.id for field in fields]
+        entries = LatestSoilTest.objects.filter(field_id__in=field_ids).select_related('soil_test')
+        return cls(field_ids, {entry.field_id: entry.soil_test for entry in entries})
+
+    def __len__(self):
+        return len(self.field_ids)
+
+    def nutrient_scores(self):
+        """Score each field's nutrient supply 0-100, NaN where nothing was measured"""
+        sufficiency = np.array([SOIL_NUTRIENT_SUFFICIENCY[name] for name in self.NUTRIENT_FIELDS])
+        supplied = np.minimum(self.values[:, 1:] / sufficiency, 1.0) * 100
+        measured = ~np.isnan(supplied)
+
+        totals = np.where(measured, supplied, 0).sum(axis=1)
+        counts = measured.sum(axis=1)
+        return np.divide(totals, counts, out=np.full(len(self), np.nan), where=counts > 0)
+
+
+def _range_distance(value, low, high):
+    """Distance of value outside [low, high] per crop, ignoring missing bounds"""
+    with np.errstate(invalid='ignore'):
+        below = np.where(np.isnan(low), 0, np.maximum(low - value, 0))
+        above = np.where(np.isnan(high), 0, np.maximum(value - high, 0))
+    return below + above
+
+
+def score_soil_compatibility(matrix, soil):
+    """
+    Score every crop against every field's latest soil test.
+
+    The pH score drops SOIL_PH_PENALTY_PER_UNIT points per pH unit outside the
+    crop's ideal range and the nutrient score measures N/P/K and organic matter
+    against sufficiency levels. Unknown values fall back to SOIL_DEFAULT_SCORE.
+    """
+    ph = soil.values[:, FieldSoilMatrix.PH][:, np.newaxis]
+    ph_min = matrix.column(CropFeatureMatrix.SOIL_PH_MIN)[np.newaxis, :]
+    ph_max = matrix.column(CropFeatureMatrix.SOIL_PH_MAX)[np.newaxis, :]
+
+    ph_score = np.clip(100 - _range_distance(ph, ph_min, ph_max) * SOIL_PH_PENALTY_PER_UNIT, 0, 100)
+
+    unknown_ph = np.isnan(ph) | (np.isnan(ph_min) & np.isnan(ph_max))
+    ph_score = np.where(unknown_ph, SOIL_DEFAULT_SCORE, ph_score)
+
+    nutrients = soil.nutrient_scores()
+    nutrients = np.where(np.isnan(nutrients), SOIL_DEFAULT_SCORE, nutrients)[:, np.newaxis]
+
+    return ph_score * SOIL_PH_WEIGHT + nutrients * (1 - SOIL_PH_WEIGHT)
+
+
+def score_climate_compatibility(matrix, climate, season):
+    """
+    Score every crop against the farm's recent climate.
+
+    climate is a summary from apps.recommendations.climate: the 30-day mean
+    temperature is compared with each crop's temperature range and the 90-day
+    rainfall, extrapolated to a year, with its rainfall range. Without any
+    weather records the score falls back to a seasonal default.
+    """
+    temp_min = matrix.column(CropFeatureMatrix.TEMPERATURE_MIN)
+    temp_max = matrix.column(CropFeatureMatrix.TEMPERATURE_MAX)
+    rain_min = matrix.column(CropFeatureMatrix.RAINFALL_MIN)
+    rain_max = matrix.column(CropFeatureMatrix.RAINFALL_MAX)
+
+    temperature = climate[30]['temperature_avg'] if climate else None
+    if temperature is None and climate:
+        temperature = climate[90]['temperature_avg']
+    rainfall = annual_rainfall(climate[90]) if climate else None
+
+    if temperature is None and rainfall is None:
+        scores = np.full(len(matrix), CLIMATE_DEFAULT_SCORE)
+        if season == 'wet':
+            scores += np.where(matrix.column(CropFeatureMatrix.WET_SEASON) == 1, SEASONAL_BONUS['wet'], 0)
+        elif season == 'dry':
+            scores += np.where(matrix.column(CropFeatureMatrix.DRY_SEASON) == 1, SEASONAL_BONUS['dry'], 0)
+        return scores
+
+    temperature_score = np.full(len(matrix), CLIMATE_DEFAULT_SCORE)
+    if temperature is not None:
+        distance = _range_distance(temperature, temp_min, temp_max)
+        known = ~(np.isnan(temp_min) & np.isnan(temp_max))
+        temperature_score = np.where(
+            known, 100 - distance * CLIMATE_TEMPERATURE_PENALTY_PER_DEGREE, CLIMATE_DEFAULT_SCORE
+        )
+
+    rainfall_score = np.full(len(matrix), CLIMATE_DEFAULT_SCORE)
+    if rainfall is not None:
+        distance = _range_distance(rainfall, rain_min, rain_max)
+        reference = np.where(rainfall < np.nan_to_num(rain_min), rain_min, rain_max)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percent_off = np.where(distance > 0, distance / reference * 100, 0)
+        known = ~(np.isnan(rain_min) & np.isnan(rain_max))
+        rainfall_score = np.where(
+            known, 100 - percent_off * CLIMATE_RAINFALL_PENALTY_PER_PERCENT, CLIMATE_DEFAULT_SCORE
+        )
+
+    scores = (
+        temperature_score * CLIMATE_TEMPERATURE_WEIGHT
+        + rainfall_score * (1 - CLIMATE_TEMPERATURE_WEIGHT)
+    )
+    return np.clip(np.nan_to_num(scores, nan=CLIMATE_DEFAULT_SCORE), 0, 100)
+
+
+def score_crop_suitability(matrix, last_crop_ids, season, soil=None, climate=None, rng=None):
+    """
+    Score every crop in the matrix against every field in one pass.
+
+    last_crop_ids holds the most recent crop id for each field (None for new
+    fields), soil the matching FieldSoilMatrix and climate the farm's climate
+    summary. Returns a dict of (fields x crops) arrays, one per factor plus the
+    weighted 'suitability' score.
+    """
+    rng = rng or np.random.default_rng()
+    shape = (len(last_crop_ids), len(matrix))
+
+    # Soil compatibility from each field's latest soil test
+    if soil is None:
+        soil = FieldSoilMatrix([None] * len(last_crop_ids), {})
+    soil_scores = np.broadcast_to(score_soil_compatibility(matrix, soil), shape)
+
+    # Climate compatibility from the farm's weather records
+    climate_scores = np.broadcast_to(score_climate_compatibility(matrix, climate, season), shape)
+
+    # Water requirement match
+    water = rng.uniform(70, 95, shape)
+
+    # Market demand by demand class
+    high_demand = matrix.column(CropFeatureMatrix.DEMAND_CLASS) == CLASS_HIGH
+    market = np.where(high_demand, rng.uniform(75, 95, shape), rng.uniform(60, 85, shape))
+
+    # Price trend
+    price = rng.uniform(65, 90, shape)
+
+    # Rotation benefit against the last crop grown in each field
+    last_ids = np.array([crop_id if crop_id is not None else -1 for crop_id in last_crop_ids], dtype=np.int64)
+    same_crop = matrix.crop_ids[np.newaxis, :] == last_ids[:, np.newaxis]
+    rotation = np.where(same_crop, rng.uniform(40, 70, shape), rng.uniform(80, 95, shape))
+    rotation[last_ids == -1, :] = 75  # Default score for new fields
+
+    scores = {
+        'soil': soil_scores,
+        'climate': climate_scores,
+        'water': water,
+        'market': market,
+        'price': price,
+        'rotation': rotation,
+    }
+
+    scores['suitability'] = np.round(
+        sum(scores[factor] * weight for factor, weight in SUITABILITY_WEIGHTS.items()),
+        2
+    )
+
+    return scores
+
+
+def top_crop_indices(suitability, limit=3):
+    """Return the indices of the best scoring crops for each field, best first"""
+    if suitability.shape[1] == 0:
+        return np.empty((suitability.shape[0], 0), dtype=np.int64)
+
+    limit = min(limit, suitability.shape[1])
+    return np.argsort(-suitability, axis=1, kind='stable')[:, :limit]
@@ -1,3 +1,261 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.activities.models import Activity
+from apps.farms.models import CropCycle, FarmSection, WeatherRecord
+from apps.farms.weather_ingest import ingest_weather
+from tasks.recommendations import generate_farm_recommendations
+from .ai_algorithms import run_ai_recommendations_for_farm
+from .benchmark import build_synthetic_farm
+from .climate import climate_cache_key, get_climate_summary
+from .fingerprints import FarmFingerprints
+from .fleet import get_stale_farm_ids, refresh_fleet_recommendations
+from .models import CropRecommendation, MarketPricePrediction, RecommendationEngine, RecommendationJob
+
+
+class RecommendationEngineTestCase(TestCase):
+    def setUp(self):
+        self.user, self.farm, self.crops = build_synthetic_farm(fields=3, crops=5, cycles=2, weather_days=30, seed=1)
+
+    def run_engine(self, **kwargs):
+        return run_ai_recommendations_for_farm(self.farm, self.user, seed=7, **kwargs)
+
+    def assertMetadataLinksExist(self):
+        """Every active recommendation points at a stored detail row"""
+        for recommendation in RecommendationEngine.objects.filter(farm=self.farm, is_active=True):
+            if 'crop_recommendation_id' in recommendation.metadata:
+                self.assertTrue(CropRecommendation.objects.filter(id=recommendation.metadata['crop_recommendation_id']).exists())
+            if 'price_prediction_id' in recommendation.metadata:
+                self.assertTrue(MarketPricePrediction.objects.filter(id=recommendation.metadata['price_prediction_id']).exists())
+
+
+class RecommendationPersistenceTest(RecommendationEngineTestCase):
+    def test_rerun_replaces_detail_rows(self):
+        self.run_engine()
+        crop_recommendations = CropRecommendation.objects.count()
+
+        result = self.run_engine(force=True)
+
+        self.assertGreater(result['total_recommendations'], 0)
+        self.assertEqual(CropRecommendation.objects.count(), crop_recommendations)
+        self.assertMetadataLinksExist()
+
+    def test_batch_rerun_replaces_detail_rows(self):
+        self.run_engine(batch=True)
+        crop_recommendations = CropRecommendation.objects.count()
+
+        self.run_engine(batch=True, force=True)
+
+        self.assertEqual(CropRecommendation.objects.count(), crop_recommendations)
+        self.assertMetadataLinksExist()
+
+    def test_dry_run_writes_nothing(self):
+        result = self.run_engine(dry_run=True)
+
+        self.assertGreater(result['total_recommendations'], 0)
+        self.assertFalse(RecommendationEngine.objects.filter(farm=self.farm).exists())
+
+    def test_unchanged_inputs_are_reused(self):
+        self.run_engine(batch=True)
+
+        result = self.run_engine(batch=True)
+
+        self.assertEqual(result['reused_count'], result['total_recommendations'])
+
+
+class RecommendationPersistenceOnMySQLTest(RecommendationEngineTestCase):
+    """MySQL can't upsert on a named key nor return ids from bulk inserts"""
+
+    def setUp(self):
+        super().setUp()
+        features = type(connection.features)
+        for name in ('can_return_rows_from_bulk_insert', 'supports_update_conflicts_with_target'):
+            patcher = mock.patch.object(features, name, new_callable=mock.PropertyMock, return_value=False)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_rerun_replaces_detail_rows(self):
+        for batch in (True, False):
+            self.run_engine(batch=batch, force=True)
+
+        self.assertMetadataLinksExist()
+        self.assertEqual(
+            CropRecommendation.objects.filter(farm=self.farm).count(),
+            RecommendationEngine.objects.filter(
+                farm=self.farm, recommendation_type='crop_selection', is_active=True
+            ).count()
+        )
+
+    def test_batch_inserts_each_model_in_one_statement(self):
+        with CaptureQueriesContext(connection) as queries:
+            result = self.run_engine(batch=True)
+
+        inserts = [query['sql'].split('"')[1] for query in queries if query['sql'].startswith('INSERT INTO')]
+        self.assertEqual(inserts.count('recommendations_recommendationengine'), 1)
+        self.assertEqual(len(inserts), len(set(inserts)))
+        self.assertEqual(
+            sorted(recommendation.id for recommendation in result['recommendations']),
+            sorted(RecommendationEngine.objects.filter(farm=self.farm, is_active=True).values_list('id', flat=True))
+        )
+        self.assertMetadataLinksExist()
+
+
+class FarmFingerprintsTest(RecommendationEngineTestCase):
+    def test_weather_correction_changes_fingerprint(self):
+        before = FarmFingerprints.for_farm(self.farm)
+        record = WeatherRecord.objects.filter(farm=self.farm).first()
+
+        ingest_weather([{
+            'farm_id': self.farm.id, 'date': record.date.isoformat(),
+            'rainfall_mm': str((record.rainfall_mm or 0) + 10)
+        }])
+
+        after = FarmFingerprints.for_farm(self.farm)
+        self.assertNotEqual(after.weather, before.weather)
+        self.assertEqual(after.fields, before.fields)
+
+    def test_unchanged_inputs_keep_fingerprint(self):
+        self.assertEqual(FarmFingerprints.for_farm(self.farm).farm, FarmFingerprints.for_farm(self.farm).farm)
+
+
+class ClimateSummaryCacheTest(RecommendationEngineTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        get_climate_summary(self.farm)
+
+    def assertCached(self, cached=True):
+        key = climate_cache_key(self.farm.id, timezone.now().date())
+        self.assertEqual(cache.get(key) is not None, cached)
+
+    def test_summary_is_cached(self):
+        self.assertCached()
+
+    def test_saved_record_invalidates(self):
+        record = WeatherRecord.objects.filter(farm=self.farm).first()
+        record.rainfall_mm = 30
+        record.save()
+        self.assertCached(False)
+
+    def test_deleted_record_invalidates(self):
+        WeatherRecord.objects.filter(farm=self.farm).first().delete()
+        self.assertCached(False)
+
+    def test_ingested_feed_invalidates(self):
+        ingest_weather([{'farm_id': self.farm.id, 'date': '2001-01-01', 'rainfall_mm': '3'}])
+        self.assertCached(False)
+
+
+class FleetStalenessTest(RecommendationEngineTestCase):
+    def setUp(self):
+        super().setUp()
+        self.run_engine(batch=True)
+
+    def assertStale(self, stale=True):
+        self.assertEqual(get_stale_farm_ids([self.farm.id]), [self.farm.id] if stale else [])
+
+    def test_fresh_farm_is_not_stale(self):
+        self.assertStale(False)
+
+    def test_never_refreshed_farm_is_stale(self):
+        RecommendationEngine.objects.filter(farm=self.farm).delete()
+        self.assertStale()
+
+    def test_new_activity_makes_farm_stale(self):
+        field = FarmSection.objects.filter(farm=self.farm).first()
+        Activity.objects.create(
+            field=field, activity_type='irrigation', title='Irrigate', planned_date=timezone.now().date(), created_by=self.user
+        )
+        self.assertStale()
+
+    def test_deleted_crop_cycle_makes_farm_stale(self):
+        CropCycle.objects.filter(field__farm=self.farm).first().delete()
+        self.assertStale()
+
+    def test_renamed_field_makes_farm_stale(self):
+        field = FarmSection.objects.filter(farm=self.farm).first()
+        field.name = 'Renamed'
+        field.save()
+        self.assertStale()
+
+    def test_weather_correction_makes_farm_stale(self):
+        record = WeatherRecord.objects.filter(farm=self.farm).first()
+        ingest_weather([{'farm_id': self.farm.id, 'date': record.date.isoformat(), 'rainfall_mm': '99'}])
+        self.assertStale()
+
+    def test_expired_recommendations_make_farm_stale(self):
+        RecommendationEngine.objects.filter(farm=self.farm).update(valid_until=timezone.now() - timedelta(days=1))
+        self.assertStale()
+
+    def test_refresh_skips_fresh_farms(self):
+        result = refresh_fleet_recommendations(workers=1)
+
+        self.assertEqual(result['refreshed_farms'], 0)
+        self.assertEqual(result['skipped_farms'], result['active_farms'])
+
+
+class RecommendationJobTest(RecommendationEngineTestCase):
+    def test_job_completes_with_summary(self):
+        job = RecommendationJob.objects.create(farm=self.farm, user=self.user)
+
+        generate_farm_recommendations.apply(args=[job.id])
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(job.progress, 100)
+        self.assertEqual(job.current_stage, 'persist')
+        self.assertEqual(
+            sorted(job.result['recommendation_ids']),
+            sorted(RecommendationEngine.objects.filter(farm=self.farm, is_active=True).values_list('id', flat=True))
+        )
+
+    def test_failed_job_records_error(self):
+        job = RecommendationJob.objects.create(farm=self.farm, user=self.user)
+
+        with mock.patch('tasks.recommendations.run_ai_recommendations_for_farm', side_effect=ValueError('no crops')):
+            generate_farm_recommendations.apply(args=[job.id])
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.error_message, 'no crops')
+        self.assertIsNotNone(job.finished_at)
+
+    def test_generate_queues_one_job_per_farm(self):
+        self.client.force_login(self.user)
+
+        with mock.patch('apps.recommendations.views.generate_farm_recommendations.delay') as delay:
+            first = self.client.post(
+                reverse('recommendations:generate'), {'farm_id': self.farm.id}, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+            )
+            second = self.client.post(
+                reverse('recommendations:generate'), {'farm_id': self.farm.id}, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+            )
+
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(second.json()['job_id'], first.json()['job_id'])
+        delay.assert_called_once_with(first.json()['job_id'])
+
+        status = self.client.get(first.json()['status_url'])
+        self.assertEqual(status.json()['status'], 'pending')
+
+
+class RecommendationJobProgressTest(TransactionTestCase):
+    def test_progress_is_written_outside_the_farm_transaction(self):
+        user, farm, _ = build_synthetic_farm(fields=2, crops=4, cycles=1, weather_days=10, seed=1)
+        reported = []
+
+        def progress_callback(stage_name, completed, total):
+            # Committed straight away, so pollers see it while the job runs
+            reported.append((stage_name, connection.in_atomic_block))
+
+        run_ai_recommendations_for_farm(farm, user, batch=True, progress_callback=progress_callback)
+
+        self.assertEqual(reported[-1][0], 'persist')
+        self.assertEqual([stage for stage, in_transaction in reported if in_transaction], [])
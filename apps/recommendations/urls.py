@@ -9,6 +9,7 @@ urlpatterns = [
     
     # Main recommendation views
     path('generate/', views.generate_recommendations, name='generate'),
+    path('jobs/<int:job_id>/', views.recommendation_job_status, name='job_status'),
     path('list/', views.recommendations_list, name='list'),
     path('detail/<int:recommendation_id>/', views.recommendation_detail, name='detail'),
     
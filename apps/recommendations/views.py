@@ -1,4 +1,5 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
@@ -11,9 +12,9 @@ from apps.farms.models import Farm
 from .models import (
     RecommendationEngine, CropRecommendation, WeatherRecommendation,
     PestDiseaseAlert, ResourceOptimization, MarketPricePrediction,
-    RecommendationFeedback
+    RecommendationFeedback, RecommendationJob
 )
-from .ai_algorithms import run_ai_recommendations_for_farm
+from tasks.recommendations import generate_farm_recommendations
 
 
 @login_required
@@ -79,9 +80,18 @@ def recommendations_dashboard(request):
         ).aggregate(avg_rating=Avg('usefulness_rating'))['avg_rating'] or 0
     }
     
+    # Get the generation job being tracked, if any
+    active_job = None
+    job_id = request.GET.get('job_id')
+    if job_id:
+        active_job = RecommendationJob.objects.filter(
+            id=job_id, farm=selected_farm, user=request.user
+        ).first()
+    
     context = {
         'selected_farm': selected_farm,
         'user_farms': user_farms,
+        'active_job': active_job,
         'recommendations_by_type': recommendations_by_type,
         'urgent_recommendations': urgent_recommendations,
         'recent_alerts': recent_alerts,
@@ -95,38 +105,59 @@ def recommendations_dashboard(request):
 
 @login_required
 def generate_recommendations(request):
-    """Generate new AI recommendations for a farm"""
+    """Queue AI recommendation generation for a farm"""
     
     if request.method == 'POST':
         farm_id = request.POST.get('farm_id')
         farm = get_object_or_404(Farm, id=farm_id, owner=request.user)
+        wants_json = request.headers.get('x-requested-with') == 'XMLHttpRequest'
         
-        try:
-            # Run AI recommendation engine
-            result = run_ai_recommendations_for_farm(farm, request.user)
-            
-            messages.success(
-                request, 
-                f"Generated {result['total_recommendations']} new recommendations for {farm.name}. "
-                f"{result['urgent_count']} urgent recommendations require immediate attention."
-            )
-            
-            # Add detailed breakdown message
-            if result['recommendations_by_type']:
-                breakdown = []
-                for rec_type, count in result['recommendations_by_type'].items():
-                    if count > 0:
-                        breakdown.append(f"{count} {rec_type.replace('_', ' ')}")
+        # Reuse a job that is already queued or running for this farm
+        job = RecommendationJob.objects.filter(
+            farm=farm,
+            user=request.user,
+            status__in=['pending', 'running']
+        ).first()
+        
+        if not job:
+            job = RecommendationJob.objects.create(farm=farm, user=request.user)
+            try:
+                generate_farm_recommendations.delay(job.id)
+            except Exception as e:
+                job.status = 'failed'
+                job.error_message = str(e)
+                job.finished_at = timezone.now()
+                job.save(update_fields=['status', 'error_message', 'finished_at'])
                 
-                if breakdown:
-                    messages.info(request, f"Breakdown: {', '.join(breakdown)}")
-            
-        except Exception as e:
-            messages.error(request, f"Error generating recommendations: {str(e)}")
+                if wants_json:
+                    return JsonResponse({'status': 'error', 'message': str(e)}, status=503)
+                messages.error(request, f"Error generating recommendations: {str(e)}")
+                return redirect('recommendations:dashboard')
+        
+        status_url = reverse('recommendations:job_status', args=[job.id])
+        
+        if wants_json:
+            return JsonResponse({
+                'status': 'success',
+                'job_id': job.id,
+                'status_url': status_url,
+            }, status=202)
+        
+        messages.info(request, f"Generating recommendations for {farm.name}. This page will update when they are ready.")
+        return redirect(f"{reverse('recommendations:dashboard')}?farm_id={farm.id}&job_id={job.id}")
     
     return redirect('recommendations:dashboard')
 
 
+@login_required
+def recommendation_job_status(request, job_id):
+    """Polling endpoint for a recommendation generation job"""
+    
+    job = get_object_or_404(RecommendationJob, id=job_id, user=request.user)
+    
+    return JsonResponse(job.as_dict())
+
+
 @login_required
 def recommendation_detail(request, recommendation_id):
     """Detailed view of a specific recommendation"""
@@ -0,0 +1,105 @@
+import uuid
+
+from django.db import connections, models, router
+
+
+class BulkInsertKey(models.Model):
+    """
+    Adds bulk_key, a per-row UUID that bulk_insert() sets on databases that
+    don't return primary keys from bulk inserts, so it can read them back.
+    """
+    bulk_key = models.UUIDField(null=True, blank=True, editable=False, db_index=True)
+
+    class Meta:
+        abstract = True
+
+
+def _features(model):
+    return connections[router.db_for_write(model)].features
+
+
+def _pks_by_key(model, instances, attnames):
+    """Primary keys of the stored rows matching the instances' attnames values, keyed by those values"""
+    return {
+        tuple(row[1:]): row[0]
+        for row in model.objects.filter(**{
+            f'{attname}__in': {getattr(instance, attname) for instance in instances}
+            for attname in attnames
+        }).values_list('pk', *attnames)
+    }
+
+
+def bulk_insert(model, instances, batch_size=None):
+    """
+    Insert instances with bulk_create and set their primary keys, on every
+    database. Like bulk_create, it skips the model's save() and sends no
+    signals.
+
+    Databases that don't return the inserted rows, MySQL included, get the
+    keys back with one more query through the rows' bulk_key, so the model
+    must then be a BulkInsertKey.
+    """
+    if _features(model).can_return_rows_from_bulk_insert or not instances:
+        return model.objects.bulk_create(instances, batch_size=batch_size)
+
+    if not issubclass(model, BulkInsertKey):
+        raise TypeError(f"{model.__name__} must be a BulkInsertKey to read back its bulk inserted keys")
+
+    for instance in instances:
+        instance.bulk_key = uuid.uuid4()
+    model.objects.bulk_create(instances, batch_size=batch_size)
+
+    pks = _pks_by_key(model, instances, ['bulk_key'])
+    for instance in instances:
+        instance.pk = pks[(instance.bulk_key,)]
+    return instances
+
+
+def bulk_upsert(model, instances, unique_fields, update_fields, batch_size=None):
+    """
+    Insert instances, updating instead the rows that already exist with the
+    same unique_fields, and set their primary keys. The instances must not
+    repeat a key; call inside a transaction.
+
+    Uses INSERT ... ON CONFLICT where the database supports it. MySQL can't
+    name the conflicting key, so there the existing rows are looked up in
+    one query, updated with bulk_update and the rest inserted with
+    bulk_insert.
+    """
+    features = _features(model)
+    if features.supports_update_conflicts_with_target and features.can_return_rows_from_bulk_insert:
+        return model.objects.bulk_create(
+            instances,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=update_fields
+        )
+
+    if not instances:
+        return instances
+
+    attnames = [model._meta.get_field(name).attname for name in unique_fields]
+    existing = _pks_by_key(model, instances, attnames)
+    # bulk_update doesn't touch auto_now fields by itself
+    auto_now_fields = [
+        field for field in map(model._meta.get_field, update_fields)
+        if getattr(field, 'auto_now', False)
+    ]
+
+    updated, inserted = [], []
+    for instance in instances:
+        pk = existing.get(tuple(getattr(instance, attname) for attname in attnames))
+        if pk is None:
+            inserted.append(instance)
+            continue
+        instance.pk = pk
+        instance._state.adding = False
+        for field in auto_now_fields:
+            field.pre_save(instance, add=False)
+        updated.append(instance)
+
+    if updated:
+        model.objects.bulk_update(updated, update_fields, batch_size=batch_size)
+    bulk_insert(model, inserted, batch_size=batch_size)
+    return instances
@@ -0,0 +1,109 @@
+from decimal import Decimal
+
+MASS = 'mass'
+VOLUME = 'volume'
+AREA = 'area'
+
+# Canonical base unit of each dimension, the unit normalized quantities are stored in
+BASE_UNITS = {
+    MASS: 'kg',
+    VOLUME: 'litre',
+    AREA: 'hectare',
+}
+
+# Canonical units with their dimension and size in the base unit
+UNITS = {
+    'kg': (MASS, Decimal('1')),
+    'g': (MASS, Decimal('0.001')),
+    'tonne': (MASS, Decimal('1000')),
+    'quintal': (MASS, Decimal('100')),
+    'lb': (MASS, Decimal('0.45359237')),
+    'oz': (MASS, Decimal('0.028349523125')),
+    'litre': (VOLUME, Decimal('1')),
+    'ml': (VOLUME, Decimal('0.001')),
+    'm3': (VOLUME, Decimal('1000')),
+    'gallon': (VOLUME, Decimal('3.785411784')),
+    'hectare': (AREA, Decimal('1')),
+    'acre': (AREA, Decimal('0.40468564224')),
+    'm2': (AREA, Decimal('0.0001')),
+}
+
+# Spellings found in free-text unit fields, compared lowercased without dots.
+# Containers such as bags, crates or baskets hold different amounts per crop
+# and input, so they are deliberately left out and never normalized.
+UNIT_ALIASES = {
+    'kg': ['kg', 'kgs', 'kilo', 'kilos', 'kilogram', 'kilograms', 'kilogramme', 'kilogrammes'],
+    'g': ['g', 'gm', 'gms', 'gram', 'grams', 'gramme', 'grammes'],
+    'tonne': ['t', 'ton', 'tons', 'tonne', 'tonnes', 'metric ton', 'metric tons', 'metric tonne', 'metric tonnes'],
+    'quintal': ['quintal', 'quintals'],
+    'lb': ['lb', 'lbs', 'pound', 'pounds'],
+    'oz': ['oz', 'ounce', 'ounces'],
+    'litre': ['l', 'lt', 'ltr', 'ltrs', 'litre', 'litres', 'liter', 'liters'],
+    'ml': ['ml', 'millilitre', 'millilitres', 'milliliter', 'milliliters'],
+    'm3': ['m3', 'm³', 'cubic metre', 'cubic metres', 'cubic meter', 'cubic meters'],
+    'gallon': ['gal', 'gals', 'gallon', 'gallons'],
+    'hectare': ['ha', 'hectare', 'hectares'],
+    'acre': ['ac', 'acre', 'acres'],
+    'm2': ['m2', 'm²', 'sqm', 'sq m', 'square metre', 'square metres', 'square meter', 'square meters'],
+}
+
+_CANONICAL = {alias: unit for unit, aliases in UNIT_ALIASES.items() for alias in aliases}
+
+# Places normalized quantities are stored with
+NORMALIZED_PLACES = Decimal('0.0001')
+
+
+def canonical_unit(unit):
+    """Canonical name of a free-text unit, or None when it isn't in the registry"""
+    if not unit:
+        return None
+    return _CANONICAL.get(' '.join(unit.lower().replace('.', '').split()))
+
+
+def unit_dimension(unit):
+    canonical = canonical_unit(unit)
+    return UNITS[canonical][0] if canonical else None
+
+
+def normalize(quantity, unit):
+    """
+    Quantity in its dimension's base unit, as (quantity, base unit), or
+    (None, '') when the quantity is missing or the unit is unknown
+    """
+    canonical = canonical_unit(unit)
+    if quantity is None or canonical is None:
+        return None, ''
+    dimension, factor = UNITS[canonical]
+    return (Decimal(str(quantity)) * factor).quantize(NORMALIZED_PLACES), BASE_UNITS[dimension]
+
+
+def convert(quantity, from_unit, to_unit):
+    """Convert a quantity between two units of the same dimension"""
+    source, target = canonical_unit(from_unit), canonical_unit(to_unit)
+    if source is None or target is None:
+        raise ValueError(f"Unknown unit '{from_unit if source is None else to_unit}'")
+    if UNITS[source][0] != UNITS[target][0]:
+        raise ValueError(f"Can't convert {from_unit} ({UNITS[source][0]}) to {to_unit} ({UNITS[target][0]})")
+    return Decimal(str(quantity)) * UNITS[source][1] / UNITS[target][1]
+
+
+class NormalizedQuantityMixin:
+    """
+    Keeps a model's normalized_quantity and normalized_unit fields in step
+    with its free-text quantity and unit, so totals can be summed in SQL.
+    Bulk inserts skip save() and must call normalize_quantity() themselves.
+    """
+    quantity_field = 'quantity'
+    unit_field = 'unit'
+
+    def quantity_unit(self):
+        return getattr(self, self.unit_field)
+
+    def normalize_quantity(self):
+        self.normalized_quantity, self.normalized_unit = normalize(
+            getattr(self, self.quantity_field), self.quantity_unit()
+        )
+
+    def save(self, *args, **kwargs):
+        self.normalize_quantity()
+        super().save(*args, **kwargs)
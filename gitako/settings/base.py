@@ -50,6 +50,7 @@ LOCAL_APPS = [
     'apps.financials',
     'apps.site_config',
     'apps.dashboard', 
+    'apps.api',
 
 ]
 
@@ -248,6 +249,40 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_IMPORTS = [
+    'tasks.notifications',
+    'tasks.scheduled_tasks',
+    'tasks.recommendations',
+    'tasks.weather',
+    'tasks.calendar',
+]
+# Run tasks inline (no broker needed) for local development and tests
+CELERY_TASK_ALWAYS_EAGER = os.getenv('CELERY_TASK_ALWAYS_EAGER', 'False') == 'True'
+
+# Cache shared by the web processes and the Celery workers, so cached pages
+# see the invalidations background tasks issue. Defaults to the broker's Redis
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('CACHE_URL', 'redis://localhost:6379/1'),
+        'KEY_PREFIX': 'gitako',
+    }
+}
+
+# Nightly fleet-wide recommendation refresh
+RECOMMENDATION_REFRESH_WORKERS = int(os.getenv('RECOMMENDATION_REFRESH_WORKERS', '4'))
+RECOMMENDATION_REFRESH_CHUNK_SIZE = int(os.getenv('RECOMMENDATION_REFRESH_CHUNK_SIZE', '25'))
+
+# Calendar uploads with more rows than this are imported by a background task
+CALENDAR_IMPORT_BACKGROUND_ROWS = int(os.getenv('CALENDAR_IMPORT_BACKGROUND_ROWS', '1000'))
+
+# Offline sync: how far each pull reaches back for rows committed late, and
+# how long tombstones are kept before devices must resync from scratch
+SYNC_CURSOR_LAG_SECONDS = int(os.getenv('SYNC_CURSOR_LAG_SECONDS', '60'))
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv('SYNC_TOMBSTONE_RETENTION_DAYS', '90'))
+
+# How long the offline ids of pushed records are remembered to drop replayed uploads
+OFFLINE_SUBMISSION_RETENTION_DAYS = int(os.getenv('OFFLINE_SUBMISSION_RETENTION_DAYS', '30'))
 
 # FCM Django settings for push notifications
 FCM_DJANGO_SETTINGS = {
@@ -7,5 +7,13 @@ INSTALLED_APPS += [
     'django_extensions',
 ]
 
+# Eager tasks run in the web process, so its own memory cache sees every invalidation
+if CELERY_TASK_ALWAYS_EAGER:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Email backend for development
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
\ No newline at end of file
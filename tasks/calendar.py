@@ -0,0 +1,48 @@
+from celery import shared_task
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from tasks.celery import app  # noqa: F401 - binds shared tasks to the Django-configured app
+
+from apps.farms.calendar_import import CalendarEventImporter
+from apps.farms.models import CalendarImportJob
+
+
+@shared_task(bind=True)
+def import_calendar_events(self, job_id):
+    """
+    Import the uploaded workbook of a CalendarImportJob and attach the per-row error report
+    """
+    job = CalendarImportJob.objects.select_related('user').get(id=job_id)
+
+    job.status = 'running'
+    job.started_at = timezone.now()
+    if self.request.id:
+        job.task_id = self.request.id
+    job.save(update_fields=['status', 'started_at', 'task_id'])
+
+    importer = CalendarEventImporter(job.user)
+    try:
+        with job.source_file.open('rb') as source:
+            stats = importer.run(source)
+    except Exception as e:
+        CalendarImportJob.objects.filter(id=job.id).update(
+            status='failed',
+            error_message=str(e),
+            finished_at=timezone.now()
+        )
+        raise
+
+    if importer.errors:
+        job.error_report.save(f'calendar_import_{job.id}_errors.csv', ContentFile(importer.error_report()), save=False)
+
+    # The upload is no longer needed once its events are in
+    job.source_file.delete(save=False)
+
+    job.status = 'completed'
+    job.total_rows = stats['total_rows']
+    job.created_count = stats['created_count']
+    job.error_count = stats['error_count']
+    job.finished_at = timezone.now()
+    job.save()
+
+    return stats
@@ -0,0 +1,64 @@
+from celery import shared_task
+from django.utils import timezone
+from tasks.celery import app  # noqa: F401 - binds shared tasks to the Django-configured app
+
+from apps.recommendations.ai_algorithms import run_ai_recommendations_for_farm
+from apps.recommendations.models import RecommendationJob
+
+
+def summarize_recommendation_result(result):
+    """
+    Reduce the engine result to a JSON-serializable summary
+    """
+    return {
+        'total_recommendations': result['total_recommendations'],
+        'recommendations_by_type': result['recommendations_by_type'],
+        'high_priority_count': result['high_priority_count'],
+        'urgent_count': result['urgent_count'],
+        'reused_count': result['reused_count'],
+        'stage_timings': result['stage_timings'],
+        'recommendation_ids': [rec.id for rec in result['recommendations']],
+    }
+
+
+@shared_task(bind=True)
+def generate_farm_recommendations(self, job_id):
+    """
+    Run the AI recommendation engine for a RecommendationJob, recording progress on the job
+    """
+    job = RecommendationJob.objects.select_related('farm', 'user').get(id=job_id)
+
+    job.status = 'running'
+    job.started_at = timezone.now()
+    if self.request.id:
+        job.task_id = self.request.id
+    job.save(update_fields=['status', 'started_at', 'task_id'])
+
+    def record_progress(stage_name, completed, total):
+        # Progress is stored on the job so polling works without a result backend
+        RecommendationJob.objects.filter(id=job.id).update(
+            current_stage=stage_name,
+            progress=int(completed * 100 / total)
+        )
+
+    try:
+        result = run_ai_recommendations_for_farm(
+            job.farm, job.user, batch=True, progress_callback=record_progress
+        )
+    except Exception as e:
+        RecommendationJob.objects.filter(id=job.id).update(
+            status='failed',
+            error_message=str(e),
+            finished_at=timezone.now()
+        )
+        raise
+
+    summary = summarize_recommendation_result(result)
+    RecommendationJob.objects.filter(id=job.id).update(
+        status='completed',
+        progress=100,
+        result=summary,
+        finished_at=timezone.now()
+    )
+
+    return summary
@@ -2,6 +2,10 @@ from celery import shared_task
 from celery.schedules import crontab
 from tasks.celery import app
 
+from apps.api.offline_push import prune_offline_submissions
+from apps.api.sync import prune_tombstones
+from apps.recommendations.fleet import refresh_fleet_recommendations
+
 @shared_task
 def daily_farm_report():
     """
@@ -18,6 +22,27 @@ def weather_alerts():
     # Logic to check weather conditions and send alerts
     return "Weather alerts checked"
 
+@shared_task
+def refresh_recommendations():
+    """
+    Refresh AI recommendations for every active farm whose inputs changed
+    """
+    return refresh_fleet_recommendations()
+
+@shared_task
+def prune_sync_tombstones():
+    """
+    Drop offline sync tombstones past their retention period
+    """
+    return prune_tombstones()
+
+@shared_task
+def prune_offline_ids():
+    """
+    Forget the offline ids of pushed records past their retention period
+    """
+    return prune_offline_submissions()
+
 # Register periodic tasks
 app.conf.beat_schedule = {
     'daily-farm-report': {
@@ -28,4 +53,16 @@ app.conf.beat_schedule = {
         'task': 'tasks.scheduled_tasks.weather_alerts',
         'schedule': crontab(hour='*/3', minute=0),  # Run every 3 hours
     },
+    'nightly-recommendation-refresh': {
+        'task': 'tasks.scheduled_tasks.refresh_recommendations',
+        'schedule': crontab(hour=2, minute=0),  # Run at 2:00 AM every day
+    },
+    'prune-sync-tombstones': {
+        'task': 'tasks.scheduled_tasks.prune_sync_tombstones',
+        'schedule': crontab(hour=3, minute=30),  # Run at 3:30 AM every day
+    },
+    'prune-offline-ids': {
+        'task': 'tasks.scheduled_tasks.prune_offline_ids',
+        'schedule': crontab(hour=3, minute=45),  # Run at 3:45 AM every day
+    },
 }
\ No newline at end of file
@@ -0,0 +1,13 @@
+from celery import shared_task
+from tasks.celery import app  # noqa: F401 - binds shared tasks to the Django-configured app
+
+from apps.farms.weather_ingest import DEFAULT_CHUNK_SIZE, get_weather_provider, ingest_weather
+
+
+@shared_task
+def ingest_weather_file(source, file_format=None, provider=None, chunk_size=DEFAULT_CHUNK_SIZE, data_source='api'):
+    """
+    Stream weather observations from a file or provider into WeatherRecord
+    """
+    weather_provider = get_weather_provider(source, file_format, provider)
+    return ingest_weather(weather_provider, chunk_size=chunk_size, data_source=data_source)